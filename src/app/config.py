@@ -1,5 +1,5 @@
 import os
-from typing import Dict, Any, ClassVar
+from typing import Dict, Any, ClassVar, List, Optional
 from pydantic_settings import BaseSettings
 from dotenv import load_dotenv
 
@@ -15,12 +15,54 @@ class Settings(BaseSettings):
     HOST: str = "0.0.0.0"
     PORT: int = 8000
     DEBUG: bool = False
+    JSON_BACKEND: str = "auto"
 
     OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY", "")
 
+    REDIS_URL: str = "redis://localhost:6379/0"
+    REDIS_LOG_TTL: int = 604800
+    REDIS_OPTIONAL: bool = True
+    REDIS_MAX_CONNECTIONS: int = 20
+    REDIS_HEALTH_CHECK_INTERVAL: int = 30
+    REDIS_SOCKET_TIMEOUT: float = 5.0
+    REDIS_CONNECT_TIMEOUT: float = 5.0
+    REDIS_LOG_BUFFER_SIZE: int = 1000
+    REDIS_RECONNECT_MAX_DELAY: float = 60.0
+
+    LOG_RECORD_ENCODING: str = "auto"
+    LOG_COMPRESSION: str = "auto"
+    LOG_COMPRESSION_THRESHOLD: int = 1024
+    LOG_MAX_FIELD_LENGTH: int = 2000
+    LOG_REDACT_HEADERS: List[str] = [
+        "authorization",
+        "proxy-authorization",
+        "cookie",
+        "set-cookie",
+        "x-api-key",
+    ]
+    LOG_REDACT_FIELDS: List[str] = ["api_key", "password", "token"]
+
+    LOG_SAMPLE_RATE: float = 1.0
+    LOG_PATH_SAMPLE_RATES: Dict[str, float] = {}
+    LOG_STATUS_SAMPLE_RATES: Dict[str, float] = {}
+    LOG_BODY_SAMPLE_RATE: float = 1.0
+    LOG_EXCLUDED_PATHS: List[str] = ["/health", "/chat/health", "/metrics"]
+    LOG_SLOW_REQUEST_THRESHOLD: float = 5.0
+    LOG_ALWAYS_KEEP_STATUS: int = 400
+    LOG_BODY_TTL: int = 86400
+    LOG_ROLLUP_TTL: int = 604800
+
+    SERVICES_CONFIG_PATH: Optional[str] = None
+    CONFIG_WATCH_INTERVAL: float = 0.0
+
     @property
     def LLM_CONFIG(self) -> Dict[str, Any]:
-        """LLM configuration with proper defaults."""
+        """
+        LLM configuration with proper defaults.
+
+        Builds a new dict on every access; request paths read the frozen
+        copy of ``app.core.config_snapshot.get_config()`` instead.
+        """
         return {
             "provider": "openai",
             "api_key": self.OPENAI_API_KEY,
@@ -36,24 +78,129 @@ class Settings(BaseSettings):
             "image_model": "dall-e-3", 
             "image_size": "1024x1024",
             "image_quality": "standard",
-            "image_style": "vivid"
+            "image_style": "vivid",
+            "image_response_format": self.IMAGE_RESPONSE_FORMAT,
+            "image_variants": self.IMAGE_VARIANTS,
+            "image_max_parallel": self.IMAGE_MAX_PARALLEL,
+            "image_store_ttl": self.IMAGE_STORE_TTL,
         }
 
+    IMAGE_RESPONSE_FORMAT: str = "url"
+    IMAGE_VARIANTS: int = 1
+    IMAGE_MAX_VARIANTS: int = 8
+    IMAGE_MAX_PARALLEL: int = 4
+    IMAGE_STORE_TTL: int = 3600
+    IMAGE_PIPELINE_ENABLED: bool = True
+    IMAGE_THUMBNAIL_SIZE: int = 256
+    IMAGE_WEB_SIZE: int = 1024
+    IMAGE_WEB_FORMAT: str = "webp"
+    IMAGE_WEB_QUALITY: int = 80
+
+    SEMANTIC_CACHE_ENABLED: bool = False
+    SEMANTIC_CACHE_MODEL: Optional[str] = None
+    SEMANTIC_CACHE_DIM: int = 1024
+    SEMANTIC_CACHE_THRESHOLD: float = 0.9
+    SEMANTIC_CACHE_MAX_ENTRIES: int = 5000
+    SEMANTIC_CACHE_TTL: Optional[float] = 86400
+    SEMANTIC_CACHE_PATH: Optional[str] = "data/semantic_cache.npz"
+
+    SESSION_MAX_TOKENS: int = 2000
+    SESSION_MAX_TURNS: int = 20
+    SESSION_SUMMARY_MAX_TOKENS: int = 300
+    SESSION_TTL: int = 86400
+    SESSION_LOCAL_CACHE_SIZE: int = 1000
+    SESSION_LOCAL_CACHE_TTL: float = 30.0
+
+    JOB_WORKERS: int = 4
+    JOB_QUEUE_SIZE: int = 100
+    JOB_TIMEOUT: float = 300.0
+    JOB_TTL: int = 3600
+    JOB_MAX_WAIT: float = 30.0
+
+    SCHEDULER_MAX_CONCURRENCY: int = 8
+    SCHEDULER_CLASS_WEIGHTS: Dict[str, float] = {"interactive": 4.0, "standard": 2.0, "bulk": 1.0}
+    SCHEDULER_DEFAULT_CLASS: str = "standard"
+    SCHEDULER_TENANT_HEADER: str = "X-API-Key"
+    SCHEDULER_TENANT_CLASSES: Dict[str, str] = {}
+    SCHEDULER_QUEUE_TIMEOUT: Optional[float] = 120.0
+
+    STREAM_COALESCE_MS: float = 50.0
+    STREAM_COALESCE_BYTES: int = 512
+    STREAM_FLUSH_FIRST_CHUNK: bool = True
+    STREAM_HEARTBEAT_INTERVAL: Optional[float] = 15.0
+    STREAM_MAX_PENDING_CHUNKS: int = 64
+    STREAM_REPLAY_MAX_CHUNKS: int = 256
+    STREAM_REPLAY_MAX_STREAMS: int = 1000
+    STREAM_REPLAY_TTL: int = 600
+    STREAM_REPLAY_POLL_INTERVAL: float = 0.5
+    WS_MAX_STREAMS: int = 8
+    WS_SEND_QUEUE_SIZE: int = 256
+
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MIN_SIZE: int = 1024
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4
+
+    FAST_PATH_ENABLED: bool = True
+    FAST_PATH_CACHE_SIZE: int = 1024
+    FAST_PATH_CACHE_TTL: float = 60.0
+
+    EXECUTOR_THREAD_WORKERS: int = 4
+    EXECUTOR_PROCESS_WORKERS: int = 2
+    EXECUTOR_OFFLOAD_MIN_BYTES: int = 16384
+    LOOP_MONITOR_ENABLED: bool = True
+    LOOP_MONITOR_INTERVAL: float = 0.5
+    LOOP_BLOCK_THRESHOLD: float = 0.1
+
+    REQUEST_MAX_BODY_SIZE: int = 65536
+    # Also the hard limit of ChatRequest.query; endpoint overrides can only lower it.
+    REQUEST_MAX_QUERY_LENGTH: int = 8000
+    REQUEST_ENDPOINT_LIMITS: Dict[str, Dict[str, int]] = {
+        "/images": {"max_body_size": 8192},
+        "/chat/message": {"max_query_length": 4000},
+    }
+
+    MODEL_ROUTING_ENABLED: bool = False
+    MODEL_ROUTING_FAST_MODEL: Optional[str] = "gpt-4o-mini"
+    MODEL_ROUTING_COMPLEXITY_THRESHOLD: float = 0.3
+
     AVAILABLE_SERVICES: ClassVar[Dict[str, Dict[str, Any]]] = {
         "inventor": {
             "name": "Inventor of Imaginary Tools",
             "description": "Creates whimsical inventions to solve problems",
             "temperature": 0.8,
+            "semantic_cache_threshold": 0.8,
+            "priority_class": "standard",
+            "scheduler_cost": 1.0,
+            "model": "gpt-4",
+            "max_tokens": 600,
+            "stop": ["\nProblem:"],
+            "routable": True,
         },
         "translator": {
             "name": "Translator of Unspoken Feelings",
             "description": "Interprets subtext and emotions in messages",
             "temperature": 0.7,
+            "semantic_cache_threshold": 0.72,
+            "priority_class": "interactive",
+            "scheduler_cost": 1.0,
+            "model": "gpt-4",
+            "max_tokens": 300,
+            "stop": ["\nMessage:"],
+            "routable": True,
         },
         "curator": {
             "name": "Dream Healer and Curator of Surreal Art",
             "description": "Transforms dreams into surreal art and stories",
             "temperature": 0.9,
+            "semantic_cache_threshold": 0.9,
+            "priority_class": "standard",
+            "scheduler_cost": 3.0,
+            "model": "gpt-4",
+            "max_tokens": 1200,
+            "stop": ["\nDream:"],
+            # The image prompt and story need the full model.
+            "routable": False,
         },
     }
 
@@ -0,0 +1,301 @@
+import asyncio
+import json
+import logging
+import os
+import signal
+import time
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+from dotenv import dotenv_values
+
+from app.exceptions import ConfigurationError, InvalidServiceTypeError
+
+logger = logging.getLogger(__name__)
+
+# Upstream limit on the number of stop sequences of one call.
+MAX_STOP_SEQUENCES = 4
+
+
+@dataclass(frozen=True)
+class ModelProfile:
+    """
+    Model settings of one service.
+
+    Args:
+        model: Model used for the service's calls
+        max_tokens: Completion budget of one answer
+        stop: Stop sequences that end the answer early
+        routable: Whether simple queries may be sent to the fast model
+    """
+
+    model: str
+    max_tokens: int
+    stop: Tuple[str, ...] = ()
+    routable: bool = True
+
+    @classmethod
+    def from_service(
+        cls, service_settings: Dict[str, Any], config: Dict[str, Any]
+    ) -> "ModelProfile":
+        """Build the profile of a service, falling back to the LLM config."""
+        return cls(
+            model=service_settings.get("model") or config.get("model", "gpt-4"),
+            max_tokens=service_settings.get("max_tokens") or config.get("max_tokens", 1500),
+            stop=tuple(service_settings.get("stop") or ()),
+            routable=service_settings.get("routable", True),
+        )
+
+
+@dataclass(frozen=True)
+class ServiceConfig:
+    """Resolved, validated settings of one chat service."""
+
+    service_type: str
+    name: str
+    description: str
+    temperature: float
+    priority_class: Optional[str]
+    scheduler_cost: float
+    profile: ModelProfile
+    details: Mapping[str, Any]
+
+
+@dataclass(frozen=True)
+class ConfigSnapshot:
+    """
+    Immutable view of the LLM and service configuration.
+
+    Built once and swapped as a whole on reload, so a request that holds a
+    snapshot sees consistent values however long it runs.
+    """
+
+    version: int
+    loaded_at: float
+    llm: Mapping[str, Any]
+    services: Mapping[str, ServiceConfig]
+
+    def service(self, service_type: str) -> ServiceConfig:
+        """
+        Return the configuration of a service.
+
+        Raises:
+            InvalidServiceTypeError: If the service is not configured
+        """
+        try:
+            return self.services[service_type]
+        except KeyError:
+            raise InvalidServiceTypeError(f"Service type '{service_type}' is not configured")
+
+
+def _load_overrides(path: Optional[str]) -> Dict[str, Dict[str, Any]]:
+    """Read per-service overrides from a JSON file, empty when there is none."""
+    if not path or not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            overrides = json.load(f)
+    except (OSError, ValueError) as e:
+        raise ConfigurationError(f"Invalid services config file {path}: {e}")
+    if not isinstance(overrides, dict) or not all(isinstance(v, dict) for v in overrides.values()):
+        raise ConfigurationError(f"Services config file {path} must map service names to objects")
+    return overrides
+
+
+def _build_service(
+    service_type: str, details: Dict[str, Any], llm: Mapping[str, Any], class_weights: Mapping[str, float]
+) -> ServiceConfig:
+    temperature = float(details.get("temperature", llm.get("temperature", 0.7)))
+    if not 0 <= temperature <= 2:
+        raise ConfigurationError(f"{service_type}: temperature must be between 0 and 2")
+
+    profile = ModelProfile.from_service(details, llm)
+    if not profile.model:
+        raise ConfigurationError(f"{service_type}: model is required")
+    if not isinstance(profile.max_tokens, int) or profile.max_tokens <= 0:
+        raise ConfigurationError(f"{service_type}: max_tokens must be a positive integer")
+    if len(profile.stop) > MAX_STOP_SEQUENCES or not all(isinstance(s, str) and s for s in profile.stop):
+        raise ConfigurationError(
+            f"{service_type}: stop must be at most {MAX_STOP_SEQUENCES} non-empty strings"
+        )
+
+    priority_class = details.get("priority_class")
+    if priority_class is not None and priority_class not in class_weights:
+        raise ConfigurationError(f"{service_type}: unknown priority class {priority_class}")
+    scheduler_cost = float(details.get("scheduler_cost", 1.0))
+    if scheduler_cost <= 0:
+        raise ConfigurationError(f"{service_type}: scheduler_cost must be positive")
+
+    return ServiceConfig(
+        service_type=service_type,
+        name=details.get("name", service_type),
+        description=details.get("description", ""),
+        temperature=temperature,
+        priority_class=priority_class,
+        scheduler_cost=scheduler_cost,
+        profile=profile,
+        details=MappingProxyType(dict(details)),
+    )
+
+
+def build_snapshot(settings, version: int = 1) -> ConfigSnapshot:
+    """
+    Resolve and validate the configuration held by a ``Settings`` instance.
+
+    Services are ``AVAILABLE_SERVICES`` with the overrides of the
+    ``SERVICES_CONFIG_PATH`` file, if any, applied on top.
+
+    Raises:
+        ConfigurationError: If a value is invalid
+    """
+    llm = MappingProxyType(dict(settings.LLM_CONFIG))
+    overrides = _load_overrides(settings.SERVICES_CONFIG_PATH)
+    unknown = set(overrides) - set(settings.AVAILABLE_SERVICES)
+    if unknown:
+        raise ConfigurationError(f"Unknown services in config file: {', '.join(sorted(unknown))}")
+
+    services = {
+        service_type: _build_service(
+            service_type,
+            {**details, **overrides.get(service_type, {})},
+            llm,
+            settings.SCHEDULER_CLASS_WEIGHTS,
+        )
+        for service_type, details in settings.AVAILABLE_SERVICES.items()
+    }
+    return ConfigSnapshot(
+        version=version,
+        loaded_at=time.time(),
+        llm=llm,
+        services=MappingProxyType(services),
+    )
+
+
+class ConfigManager:
+    """
+    Holder of the current ``ConfigSnapshot`` with hot reload.
+
+    ``reload`` re-reads the environment, the ``.env`` file and the services
+    config file, validates the result and swaps the snapshot; an invalid
+    configuration is logged and the previous snapshot stays in place. A
+    reload is triggered by SIGHUP, or by a change of either file when
+    ``watch_interval`` is set. Only the LLM and service configuration is
+    reloaded; other settings still need a restart.
+    """
+
+    def __init__(self, settings, env_file: str = ".env", watch_interval: float = 0.0):
+        self.settings = settings
+        self.env_file = env_file
+        self.watch_interval = watch_interval
+        self._snapshot: Optional[ConfigSnapshot] = None
+        self._dotenv = dotenv_values(env_file) if os.path.exists(env_file) else {}
+        self._watch_task: Optional[asyncio.Task] = None
+        self._mtimes: Tuple[Optional[float], ...] = ()
+
+    @property
+    def snapshot(self) -> ConfigSnapshot:
+        """The current snapshot, built on first use."""
+        if self._snapshot is None:
+            self._snapshot = build_snapshot(self.settings)
+        return self._snapshot
+
+    def reload(self) -> bool:
+        """
+        Rebuild the snapshot from the current environment and files.
+
+        Returns:
+            bool: True if the new configuration was applied
+        """
+        from app.config import Settings
+
+        try:
+            self._refresh_dotenv()
+            settings = Settings()
+            snapshot = build_snapshot(settings, version=self.snapshot.version + 1)
+        except Exception as e:
+            logger.error(f"Configuration reload failed, keeping version {self.snapshot.version}: {e}")
+            return False
+
+        self.settings = settings
+        self._snapshot = snapshot
+        logger.info(f"Configuration reloaded (version {snapshot.version})")
+        return True
+
+    def start(self) -> None:
+        """Build the snapshot and install the SIGHUP handler and file watcher."""
+        snapshot = self.snapshot
+        logger.info(f"Configuration version {snapshot.version} loaded for {len(snapshot.services)} services")
+        try:
+            asyncio.get_running_loop().add_signal_handler(signal.SIGHUP, self.reload)
+        except (AttributeError, NotImplementedError, RuntimeError, ValueError):
+            logger.info("SIGHUP configuration reload is not available on this platform")
+        if self.watch_interval > 0 and self._watch_task is None:
+            self._mtimes = self._file_mtimes()
+            self._watch_task = asyncio.create_task(self._watch(), name="config-watch")
+
+    async def stop(self) -> None:
+        """Remove the SIGHUP handler and stop the file watcher."""
+        try:
+            asyncio.get_running_loop().remove_signal_handler(signal.SIGHUP)
+        except (AttributeError, NotImplementedError, RuntimeError, ValueError):
+            pass
+        if self._watch_task is not None:
+            self._watch_task.cancel()
+            try:
+                await self._watch_task
+            except asyncio.CancelledError:
+                pass
+            self._watch_task = None
+
+    async def _watch(self) -> None:
+        while True:
+            await asyncio.sleep(self.watch_interval)
+            mtimes = self._file_mtimes()
+            if mtimes != self._mtimes:
+                self._mtimes = mtimes
+                self.reload()
+
+    def _file_mtimes(self) -> Tuple[Optional[float], ...]:
+        mtimes = []
+        for path in (self.env_file, self.settings.SERVICES_CONFIG_PATH):
+            try:
+                mtimes.append(os.stat(path).st_mtime if path else None)
+            except OSError:
+                mtimes.append(None)
+        return tuple(mtimes)
+
+    def _refresh_dotenv(self) -> None:
+        """
+        Apply changed ``.env`` values to the environment.
+
+        A variable is only updated if its current value came from the file,
+        so values set by the deployment keep taking precedence.
+        """
+        if not os.path.exists(self.env_file):
+            return
+        values = dotenv_values(self.env_file)
+        for key, value in values.items():
+            if value is None:
+                continue
+            if key not in os.environ or os.environ[key] == self._dotenv.get(key):
+                os.environ[key] = value
+        self._dotenv = values
+
+
+_config_manager: Optional[ConfigManager] = None
+
+
+def get_config_manager() -> ConfigManager:
+    """Return the process-wide configuration manager."""
+    global _config_manager
+    from app.config import settings
+
+    if _config_manager is None:
+        _config_manager = ConfigManager(settings, watch_interval=settings.CONFIG_WATCH_INTERVAL)
+    return _config_manager
+
+
+def get_config() -> ConfigSnapshot:
+    """Return the current configuration snapshot."""
+    return (_config_manager or get_config_manager()).snapshot
@@ -0,0 +1,230 @@
+import asyncio
+import functools
+import logging
+import multiprocessing
+import sys
+import threading
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class Executors:
+    """
+    Shared worker pools for work that would otherwise stall the event loop.
+
+    The thread pool takes blocking calls and work that releases the GIL,
+    such as zlib, brotli and zstd compression, Pillow and NumPy. Pure Python
+    code gains less, since the loop only gets the GIL back every switch
+    interval, and a single C call that holds the GIL, such as ``json`` or
+    ``orjson`` parsing, blocks the loop just the same in a thread; run those
+    inline. The process pool takes pure CPU-bound functions, such as image
+    resampling, whose arguments and results are cheap to pickle. Both pools
+    start on first use.
+
+    Args:
+        thread_workers: Threads in the thread pool
+        process_workers: Processes in the process pool
+        offload_min_bytes: Payload size below which ``offload`` runs inline,
+            because a thread hop costs more than parsing a small payload
+    """
+
+    def __init__(self, thread_workers: int = 4, process_workers: int = 2, offload_min_bytes: int = 16384):
+        self.thread_workers = thread_workers
+        self.process_workers = process_workers
+        self.offload_min_bytes = offload_min_bytes
+        self._threads: Optional[ThreadPoolExecutor] = None
+        self._processes: Optional[ProcessPoolExecutor] = None
+
+    @classmethod
+    def from_settings(cls, settings) -> "Executors":
+        """Create the worker pools from application settings."""
+        return cls(
+            thread_workers=settings.EXECUTOR_THREAD_WORKERS,
+            process_workers=settings.EXECUTOR_PROCESS_WORKERS,
+            offload_min_bytes=settings.EXECUTOR_OFFLOAD_MIN_BYTES,
+        )
+
+    async def run_in_thread(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Run a function in the thread pool."""
+        if kwargs:
+            func = functools.partial(func, **kwargs)
+        return await asyncio.get_running_loop().run_in_executor(self._get_threads(), func, *args)
+
+    async def run_in_process(self, func: Callable[..., T], *args: Any) -> T:
+        """
+        Run a picklable, module-level function in the process pool.
+
+        Raises:
+            BrokenProcessPool: If a worker died; the pool is replaced on the next call
+        """
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._get_processes(), func, *args)
+        except BrokenProcessPool:
+            # A crashed worker breaks the whole pool; start a fresh one next time.
+            self._shutdown_processes()
+            raise
+
+    async def offload(self, func: Callable[..., T], *args: Any, size: int) -> T:
+        """
+        Run a function inline for small payloads and in the thread pool for large ones.
+
+        Only worth it for functions that release the GIL for most of their
+        run, such as compression.
+
+        Args:
+            func: The function to run
+            *args: Its arguments
+            size: Size of the payload it works on, in bytes or characters
+        """
+        if size < self.offload_min_bytes:
+            return func(*args)
+        return await self.run_in_thread(func, *args)
+
+    def _get_threads(self) -> ThreadPoolExecutor:
+        if self._threads is None:
+            self._threads = ThreadPoolExecutor(max_workers=self.thread_workers, thread_name_prefix="cpu")
+        return self._threads
+
+    def _get_processes(self) -> ProcessPoolExecutor:
+        if self._processes is None:
+            # Spawned workers don't inherit the event loop's threads and sockets.
+            self._processes = ProcessPoolExecutor(
+                max_workers=self.process_workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._processes
+
+    def _shutdown_processes(self) -> None:
+        if self._processes is not None:
+            self._processes.shutdown(wait=False, cancel_futures=True)
+            self._processes = None
+
+    def shutdown(self) -> None:
+        """Stop both pools; queued work is cancelled."""
+        if self._threads is not None:
+            self._threads.shutdown(wait=False, cancel_futures=True)
+            self._threads = None
+        self._shutdown_processes()
+
+
+class LoopMonitor:
+    """
+    Measure event loop lag and report callbacks that block the loop.
+
+    A task sleeps for ``interval`` and records how late it wakes up: that
+    delay is the time other callbacks held the loop. A watchdog thread
+    checks the task's heartbeat, and when the loop has been stuck for longer
+    than ``threshold`` it logs the loop thread's stack while the blocking
+    callback is still running, so the warning names the culprit.
+
+    Args:
+        interval: Seconds between lag samples
+        threshold: Lag in seconds above which the loop counts as blocked
+        stack_depth: Innermost frames included in a block report
+    """
+
+    def __init__(self, interval: float = 0.5, threshold: float = 0.1, stack_depth: int = 8):
+        self.interval = interval
+        self.threshold = threshold
+        self.stack_depth = stack_depth
+        self.lag = 0.0
+        self.max_lag = 0.0
+        self.samples = 0
+        self.blocked = 0
+        self._total_lag = 0.0
+        self._beat = time.monotonic()
+        self._reported_beat = 0.0
+        self._loop_thread: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    @classmethod
+    def from_settings(cls, settings) -> "LoopMonitor":
+        """Create a loop monitor from application settings."""
+        return cls(interval=settings.LOOP_MONITOR_INTERVAL, threshold=settings.LOOP_BLOCK_THRESHOLD)
+
+    def start(self) -> None:
+        """Start sampling the running loop and watching it from a thread."""
+        if self._task is not None:
+            return
+        self._loop_thread = threading.get_ident()
+        self._beat = time.monotonic()
+        self._stopped.clear()
+        self._task = asyncio.create_task(self._sample(), name="loop-monitor")
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        """Stop sampling and the watchdog thread."""
+        self._stopped.set()
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._watchdog is not None:
+            self._watchdog.join(timeout=1.0)
+            self._watchdog = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Lag figures in milliseconds and the number of blocking episodes seen."""
+        return {
+            "lag_ms": round(self.lag * 1000, 3),
+            "mean_lag_ms": round(self._total_lag / self.samples * 1000, 3) if self.samples else 0.0,
+            "max_lag_ms": round(self.max_lag * 1000, 3),
+            "blocked": self.blocked,
+            "samples": self.samples,
+            "threshold_ms": self.threshold * 1000,
+        }
+
+    async def _sample(self) -> None:
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(now - expected, 0.0)
+            self._beat = now
+            self.lag = lag
+            self.max_lag = max(self.max_lag, lag)
+            self._total_lag += lag
+            self.samples += 1
+            if lag > self.threshold:
+                self.blocked += 1
+                logger.warning(f"Event loop was blocked for {lag * 1000:.0f} ms")
+
+    def _watch(self) -> None:
+        period = min(self.interval, self.threshold) / 2
+        while not self._stopped.wait(period):
+            beat = self._beat
+            stalled = time.monotonic() - beat - self.interval
+            if stalled > self.threshold and beat != self._reported_beat:
+                self._reported_beat = beat
+                self._report(stalled)
+
+    def _report(self, stalled: float) -> None:
+        frame = sys._current_frames().get(self._loop_thread)
+        if frame is None:
+            return
+        stack = "".join(traceback.format_stack(frame)[-self.stack_depth:])
+        logger.warning(
+            f"Event loop blocked for over {stalled * 1000:.0f} ms, currently in:\n{stack}"
+        )
+
+
+_executors: Optional[Executors] = None
+
+
+def get_executors() -> Executors:
+    """Return the shared worker pools, created from settings on first use."""
+    global _executors
+    if _executors is None:
+        from app.config import settings
+
+        _executors = Executors.from_settings(settings)
+    return _executors
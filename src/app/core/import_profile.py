@@ -0,0 +1,148 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+from dataclasses import dataclass, field
+from typing import List, Optional, Sequence, Tuple
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Heavy SDKs that must only be imported on first use, never by ``main:app``.
+DEFAULT_FORBIDDEN = ("openai", "aiohttp", "tenacity", "numpy", "redis", "uvicorn")
+DEFAULT_MAX_SECONDS = 1.5
+DEFAULT_MAX_MODULES = 650
+
+_MEASURE = (
+    "import json, sys, time\n"
+    "start = time.perf_counter()\n"
+    "import {target}\n"
+    "seconds = time.perf_counter() - start\n"
+    "print(json.dumps({{'seconds': seconds, 'modules': sorted(sys.modules)}}))\n"
+)
+
+
+@dataclass
+class ImportProfile:
+    """
+    Cost of importing a module in a fresh interpreter.
+
+    Args:
+        target: The module imported
+        seconds: Best wall time of the import over the runs
+        modules: Modules loaded once the import is done
+        timings: ``(module, self_us, cumulative_us)`` from ``-X importtime``
+    """
+
+    target: str
+    seconds: float
+    modules: List[str]
+    timings: List[Tuple[str, int, int]] = field(default_factory=list)
+
+    def slowest(self, count: int) -> List[Tuple[str, int, int]]:
+        """Return the modules with the highest cumulative import time."""
+        return sorted(self.timings, key=lambda timing: timing[2], reverse=True)[:count]
+
+
+def _run(target: str, cwd: str, importtime: bool) -> Tuple[dict, str]:
+    command = [sys.executable]
+    if importtime:
+        command += ["-X", "importtime"]
+    command += ["-c", _MEASURE.format(target=target)]
+    result = subprocess.run(command, cwd=cwd, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1]), result.stderr
+
+
+def _parse_importtime(output: str) -> List[Tuple[str, int, int]]:
+    timings = []
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        try:
+            timings.append((parts[2].strip(), int(parts[0]), int(parts[1])))
+        except (IndexError, ValueError):
+            continue  # Header line
+    return timings
+
+
+def profile_imports(target: str = "main", cwd: str = SRC_DIR, repeat: int = 3) -> ImportProfile:
+    """
+    Measure the import of a module in fresh interpreters.
+
+    The wall time is the best of ``repeat`` plain runs, since ``-X
+    importtime`` itself slows the import down; one extra run collects the
+    per-module breakdown.
+
+    Args:
+        target: Module to import
+        cwd: Directory the interpreters run in
+        repeat: Number of timed runs
+
+    Returns:
+        ImportProfile: The measurements
+    """
+    runs = [_run(target, cwd, importtime=False)[0] for _ in range(max(repeat, 1))]
+    _, stderr = _run(target, cwd, importtime=True)
+    return ImportProfile(
+        target=target,
+        seconds=min(run["seconds"] for run in runs),
+        modules=runs[0]["modules"],
+        timings=_parse_importtime(stderr),
+    )
+
+
+def check_budget(
+    profile: ImportProfile,
+    max_seconds: Optional[float] = DEFAULT_MAX_SECONDS,
+    max_modules: Optional[int] = DEFAULT_MAX_MODULES,
+    forbidden: Sequence[str] = DEFAULT_FORBIDDEN,
+) -> List[str]:
+    """
+    Compare a profile with the import budget.
+
+    Returns:
+        List[str]: One message per exceeded limit, empty if within budget
+    """
+    violations = []
+    if max_seconds is not None and profile.seconds > max_seconds:
+        violations.append(f"import took {profile.seconds:.3f}s, budget is {max_seconds:.3f}s")
+    if max_modules is not None and len(profile.modules) > max_modules:
+        violations.append(f"{len(profile.modules)} modules loaded, budget is {max_modules}")
+    for name in forbidden:
+        if any(module == name or module.startswith(f"{name}.") for module in profile.modules):
+            violations.append(f"{name} is imported at startup")
+    return violations
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Report the import time of the application and check it against a budget."
+    )
+    parser.add_argument("--target", default="main", help="module to import (default: main)")
+    parser.add_argument("--top", type=int, default=20, help="number of slowest modules to list")
+    parser.add_argument("--repeat", type=int, default=3, help="number of timed runs")
+    parser.add_argument("--max-seconds", type=float, default=DEFAULT_MAX_SECONDS)
+    parser.add_argument("--max-modules", type=int, default=DEFAULT_MAX_MODULES)
+    parser.add_argument(
+        "--forbid",
+        nargs="*",
+        default=list(DEFAULT_FORBIDDEN),
+        help="top-level packages that must not be imported",
+    )
+    args = parser.parse_args(argv)
+
+    profile = profile_imports(args.target, repeat=args.repeat)
+    print(f"import {profile.target}: {profile.seconds:.3f}s, {len(profile.modules)} modules")
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    for name, self_us, cumulative_us in profile.slowest(args.top):
+        print(f"{cumulative_us / 1000:>14.1f} {self_us / 1000:>9.1f}  {name}")
+
+    violations = check_budget(profile, args.max_seconds, args.max_modules, args.forbid)
+    for violation in violations:
+        print(f"BUDGET EXCEEDED: {violation}")
+    return 1 if violations else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Any, AsyncGenerator
+from typing import Dict, Any, AsyncGenerator, List, Optional
 
 
 class LLMProvider(ABC):
@@ -24,12 +24,16 @@ class ChatService(ABC):
     """Abstract interface for chat services."""
 
     @abstractmethod
-    async def process_query(self, query: str) -> str:
+    async def process_query(
+        self, query: str, history: Optional[List[Dict[str, str]]] = None
+    ) -> str:
         """Process a user query and return a response."""
         pass
 
     @abstractmethod
-    async def process_query_stream(self, query: str) -> AsyncGenerator[str, None]:
+    async def process_query_stream(
+        self, query: str, history: Optional[List[Dict[str, str]]] = None
+    ) -> AsyncGenerator[str, None]:
         """Process a user query and yield streaming response chunks."""
         pass
 
@@ -44,7 +48,9 @@ class ServiceFactory(ABC):
     """Abstract interface for service factories."""
 
     @abstractmethod
-    def create_service(self, service_type: str, config: Dict[str, Any]) -> ChatService:
+    def create_service(
+        self, service_type: str, config: Dict[str, Any], **options
+    ) -> ChatService:
         """Create a service instance."""
         pass
 
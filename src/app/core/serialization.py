@@ -0,0 +1,128 @@
+import datetime
+import enum
+import json
+import logging
+import uuid
+from abc import ABC, abstractmethod
+from typing import Any, Union
+
+from app.config import settings
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+
+def default_hook(obj: Any) -> Any:
+    """Convert values the JSON encoders don't handle natively."""
+    if isinstance(obj, (datetime.datetime, datetime.date, datetime.time)):
+        return obj.isoformat()
+    if isinstance(obj, uuid.UUID):
+        return str(obj)
+    if isinstance(obj, enum.Enum):
+        return obj.value
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    if isinstance(obj, (bytes, bytearray)):
+        return obj.decode("utf-8", errors="replace")
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class JSONSerializer(ABC):
+    """Abstract interface for JSON serializer backends."""
+
+    name: str = ""
+
+    @abstractmethod
+    def dumps(self, obj: Any) -> bytes:
+        """Serialize an object to compact UTF-8 encoded JSON."""
+        pass
+
+    @abstractmethod
+    def loads(self, data: Union[str, bytes]) -> Any:
+        """Deserialize JSON text or bytes."""
+        pass
+
+    def dumps_str(self, obj: Any) -> str:
+        """Serialize an object to a JSON string."""
+        return self.dumps(obj).decode("utf-8")
+
+
+class StdlibJSONSerializer(JSONSerializer):
+    """Serializer backed by the standard library json module."""
+
+    name = "json"
+
+    def dumps(self, obj: Any) -> bytes:
+        return json.dumps(
+            obj, default=default_hook, separators=(",", ":"), ensure_ascii=False
+        ).encode("utf-8")
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        return json.loads(data)
+
+
+class OrjsonSerializer(JSONSerializer):
+    """Serializer backed by orjson, which encodes datetimes and UUIDs natively."""
+
+    name = "orjson"
+
+    def __init__(self):
+        if orjson is None:
+            raise ImportError("orjson is not installed")
+        self._options = orjson.OPT_NON_STR_KEYS
+
+    def dumps(self, obj: Any) -> bytes:
+        return orjson.dumps(obj, default=default_hook, option=self._options)
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        return orjson.loads(data)
+
+
+def get_serializer(backend: str = "auto") -> JSONSerializer:
+    """
+    Create a serializer for the requested backend.
+
+    Args:
+        backend: "orjson", "json" or "auto" (orjson when installed)
+
+    Returns:
+        JSONSerializer: The serializer instance
+    """
+    if backend in ("auto", "orjson") and orjson is not None:
+        return OrjsonSerializer()
+    if backend == "orjson":
+        logger.warning("orjson requested but not installed, falling back to json")
+    return StdlibJSONSerializer()
+
+
+class NDJSONLineEncoder:
+    """
+    Encode NDJSON lines that share a set of static fields.
+
+    The static fields (e.g. ``chat_type``) are encoded once, so each line only
+    serializes its dynamic part and appends the pre-encoded tail.
+    """
+
+    def __init__(self, serializer: JSONSerializer, **static_fields: Any):
+        self.serializer = serializer
+        if static_fields:
+            encoded = serializer.dumps(static_fields)
+            self._tail = b"," + encoded[1:] + b"\n"
+        else:
+            self._tail = b"}\n"
+        self._static_only = serializer.dumps(static_fields) + b"\n"
+
+    def encode(self, **fields: Any) -> bytes:
+        """Encode one line holding the given fields plus the static ones."""
+        if not fields:
+            return self._static_only
+        return self.serializer.dumps(fields)[:-1] + self._tail
+
+
+serializer = get_serializer(settings.JSON_BACKEND)
@@ -0,0 +1,75 @@
+import re
+from typing import List, Optional, Tuple
+
+WORD_PATTERN = re.compile(r"\w+", re.UNICODE)
+CONTRACTION_PATTERN = re.compile(r"\w+(?:'\w+)*", re.UNICODE)
+STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have i in is it its me my of on or "
+    "so that the this to was we were with you your".split()
+)
+NEGATIONS = frozenset(
+    "not no never nothing nobody none neither nor nowhere without cannot".split()
+)
+AUXILIARIES = frozenset(
+    "am been being can could did do does had may might must shall should will would".split()
+)
+QUANTIFIERS = frozenset(
+    "always never ever sometimes often rarely seldom all every everyone everybody "
+    "everything nobody nothing none only".split()
+)
+
+
+def tokenize(text: str, max_terms: Optional[int] = None, unique: bool = True) -> List[str]:
+    """
+    Split text into lowercased words, dropping stopwords and single characters.
+
+    Args:
+        text: Text to split
+        max_terms: Stop after this many terms
+        unique: Skip repeated words
+
+    Returns:
+        List[str]: The terms in order of appearance
+    """
+    terms = []
+    seen = set()
+    for token in WORD_PATTERN.findall(text.lower()):
+        if len(token) < 2 or token in STOPWORDS:
+            continue
+        if unique:
+            if token in seen:
+                continue
+            seen.add(token)
+        terms.append(token)
+        if max_terms is not None and len(terms) >= max_terms:
+            break
+    return terms
+
+
+def polarity(text: str) -> Tuple[str, ...]:
+    """
+    Words that decide what a sentence asserts, which similarity scores miss.
+
+    Quantifiers are returned as they are, and a negation as ``not:<word>``
+    with the first content word after it, so "I don't care" and "it's not
+    fine" differ although both contain one negation.
+
+    Args:
+        text: Text to scan
+
+    Returns:
+        Tuple[str, ...]: The sorted markers, empty for a plain statement
+    """
+    markers = []
+    negated = False
+    for token in CONTRACTION_PATTERN.findall(text.lower().replace("\u2019", "'")):
+        if token in QUANTIFIERS:
+            markers.append(token)
+        if token in NEGATIONS or token.endswith("n't"):
+            negated = True
+        elif negated and token not in STOPWORDS and token not in AUXILIARIES and "'" not in token:
+            markers.append(f"not:{token}")
+            negated = False
+    if negated:
+        markers.append("not")
+    return tuple(sorted(markers))
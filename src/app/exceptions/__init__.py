@@ -11,6 +11,9 @@ from .exceptions import (
     ConnectionClosedError,
     TimeoutError,
     ImageGenerationError,
+    JobQueueFullError,
+    StreamNotFoundError,
+    StreamExpiredError,
 )
 
 __all__ = [
@@ -26,4 +29,7 @@ __all__ = [
     "ConnectionClosedError",
     "TimeoutError",
     "ImageGenerationError",
+    "JobQueueFullError",
+    "StreamNotFoundError",
+    "StreamExpiredError",
 ]
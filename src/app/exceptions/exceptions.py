@@ -68,3 +68,21 @@ class ImageGenerationError(APIError):
     """Exception raised when image generation fails."""
 
     pass
+
+
+class JobQueueFullError(AsyncProcessingError):
+    """Exception raised when the background job queue is at capacity."""
+
+    pass
+
+
+class StreamNotFoundError(AsyncProcessingError):
+    """Exception raised when a resumable stream is unknown or has expired."""
+
+    pass
+
+
+class StreamExpiredError(StreamNotFoundError):
+    """Exception raised when the requested part of a stream is no longer buffered."""
+
+    pass
@@ -0,0 +1,180 @@
+import logging
+import zlib
+from typing import Iterable, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.executors import get_executors
+
+try:
+    import brotli
+except ImportError:
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_EXCLUDED_MEDIA_TYPES = (
+    "image/",
+    "audio/",
+    "video/",
+    "application/zip",
+    "application/gzip",
+    "application/octet-stream",
+)
+
+
+class _GzipCompressor:
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        out = self._compressor.compress(data)
+        return out + self._compressor.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+class _BrotliCompressor:
+    def __init__(self, quality: int):
+        self._compressor = brotli.Compressor(quality=quality, mode=brotli.MODE_TEXT)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        out = self._compressor.process(data)
+        return out + (self._compressor.finish() if final else self._compressor.flush())
+
+
+class CompressionMiddleware:
+    """
+    Negotiated brotli/gzip compression for buffered and streaming responses.
+
+    Buffered bodies smaller than ``minimum_size`` are sent as-is. Streaming
+    bodies are compressed chunk by chunk and flushed after every ASGI body
+    message, so each coalesced batch reaches the client immediately instead
+    of waiting in the compressor's window. Brotli is preferred when the
+    client accepts it and the ``brotli`` package is installed.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+        excluded_media_types: Iterable[str] = DEFAULT_EXCLUDED_MEDIA_TYPES,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.excluded_media_types = tuple(excluded_media_types)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = self._negotiate(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressionResponder(self, send, encoding)
+        await self.app(scope, receive, responder.send)
+
+    @staticmethod
+    def _negotiate(accept_encoding: str) -> Optional[str]:
+        """Pick ``br`` or ``gzip`` from an Accept-Encoding header."""
+        accepted = {}
+        for part in accept_encoding.lower().split(","):
+            name, _, params = part.strip().partition(";")
+            quality = 1.0
+            params = params.strip()
+            if params.startswith("q="):
+                try:
+                    quality = float(params[2:])
+                except ValueError:
+                    quality = 0.0
+            if name:
+                accepted[name] = quality
+
+        wildcard = accepted.get("*", 0.0)
+        if brotli is not None and accepted.get("br", wildcard) > 0:
+            return "br"
+        if accepted.get("gzip", wildcard) > 0:
+            return "gzip"
+        return None
+
+    def _compressor(self, encoding: str):
+        if encoding == "br":
+            return _BrotliCompressor(self.brotli_quality)
+        return _GzipCompressor(self.gzip_level)
+
+    def _is_compressible(self, headers: MutableHeaders) -> bool:
+        if "content-encoding" in headers:
+            return False
+        content_type = headers.get("content-type", "")
+        return not content_type.startswith(self.excluded_media_types)
+
+
+class _CompressionResponder:
+    """Rewrites the messages of one response."""
+
+    def __init__(self, middleware: CompressionMiddleware, send: Send, encoding: str):
+        self.middleware = middleware
+        self._send = send
+        self.encoding = encoding
+        self.start_message: Optional[Message] = None
+        self.compressor = None
+        self.passthrough = False
+
+    async def send(self, message: Message) -> None:
+        message_type = message["type"]
+        if message_type == "http.response.start":
+            self.start_message = message
+            return
+        if message_type != "http.response.body" or self.passthrough:
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.compressor is None:
+            headers = MutableHeaders(raw=self.start_message["headers"])
+            if not self.middleware._is_compressible(headers) or (
+                not more_body and len(body) < self.middleware.minimum_size
+            ):
+                self.passthrough = True
+                await self._send(self.start_message)
+                await self._send(message)
+                return
+
+            self.compressor = self.middleware._compressor(self.encoding)
+            headers["Content-Encoding"] = self.encoding
+            headers.add_vary_header("Accept-Encoding")
+            if more_body:
+                if "content-length" in headers:
+                    del headers["content-length"]
+            else:
+                body = await self._compress(body, final=True)
+                headers["Content-Length"] = str(len(body))
+                await self._send(self.start_message)
+                await self._send({"type": "http.response.body", "body": body})
+                return
+            await self._send(self.start_message)
+
+        if not body and more_body:
+            return
+        await self._send(
+            {
+                "type": "http.response.body",
+                "body": await self._compress(body, final=not more_body),
+                "more_body": more_body,
+            }
+        )
+
+    async def _compress(self, body: bytes, final: bool) -> bytes:
+        # zlib and brotli release the GIL, so large bodies compress in parallel with the loop.
+        return await get_executors().offload(self.compressor.compress, body, final, size=len(body))
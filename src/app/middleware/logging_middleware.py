@@ -1,83 +1,232 @@
 import time
-import json
 import uuid
 from fastapi import Request, Response
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.types import ASGIApp
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional, Tuple
 from app.services.redis_service import RedisService
+from app.services.logs.retention_policy import LogRetentionPolicy, LogDecision
+from app.services.logs.rollups import LogRollups
+from app.services.logs.search_index import LogSearchIndex
+from app.config import settings
+from app.core.serialization import serializer
+from app.middleware.request_intake import get_request_body
 import logging
 
 logger = logging.getLogger(__name__)
 
+SUMMARY_EXCLUDED_FIELDS = ("headers", "body")
+
+STREAMING_MEDIA_TYPES = ("text/event-stream", "application/x-ndjson")
+STREAM_CAPTURE_LIMIT = 4096
+BODY_LOG_LIMIT = 4096
+UNMATCHED_ROUTE = "<unmatched>"
+BINARY_MEDIA_TYPES = ("image/", "audio/", "video/", "application/octet-stream")
+
+
 class LoggingMiddleware(BaseHTTPMiddleware):
-    def __init__(self, app: ASGIApp, redis_service: RedisService):
+    def __init__(
+        self,
+        app: ASGIApp,
+        redis_service: RedisService,
+        policy: Optional[LogRetentionPolicy] = None,
+        rollups: Optional[LogRollups] = None,
+        search_index: Optional[LogSearchIndex] = None,
+    ):
         super().__init__(app)
         self.redis_service = redis_service
+        self.policy = policy or LogRetentionPolicy()
+        self.rollups = rollups
+        self.search_index = search_index
 
     async def dispatch(self, request: Request, call_next):
+        if self.policy.is_excluded(request.url.path):
+            return await call_next(request)
+
         request_id = str(uuid.uuid4())
         start_time = time.time()
         
-        request_body = await self._get_request_body(request)
         request_log = {
             "request_id": request_id,
             "method": request.method,
             "path": request.url.path,
-            "query_params": dict(request.query_params),
+            "query_params": {
+                name: _truncate(value, BODY_LOG_LIMIT) for name, value in request.query_params.items()
+            },
             "headers": dict(request.headers),
             "client_ip": request.client.host if request.client else None,
-            "body": request_body,
             "timestamp": start_time,
         }
         
-        if not self.redis_service.connection_error:
-            await self.redis_service.store_log(f"request:{request_id}", request_log)
-        
-        response = await self._get_response(request, call_next)
-        
+        response = await call_next(request)
+        # Read by the intake middleware while the request was handled.
+        request_body, request_log["body"] = self._get_request_body(request)
+        if response.headers.get("content-type", "").startswith(STREAMING_MEDIA_TYPES):
+            # Pass streams through untouched and log once the last chunk is sent.
+            response.body_iterator = self._log_stream(
+                request,
+                response,
+                response.body_iterator,
+                request_id,
+                request_log,
+                request_body,
+                start_time,
+            )
+            return response
+
+        response = await self._buffer_response(response)
+        await self._log_request(
+            request,
+            request_id,
+            request_log,
+            request_body,
+            start_time,
+            response.status_code,
+            dict(response.headers),
+            lambda: self._get_response_payload(request, response),
+        )
+        return response
+
+    async def _log_stream(
+        self,
+        request: Request,
+        response: Response,
+        body_iterator: AsyncIterator[bytes],
+        request_id: str,
+        request_log: dict,
+        request_body: Any,
+        start_time: float,
+    ) -> AsyncIterator[bytes]:
+        """Forward a streaming body while keeping a bounded prefix of it for the log."""
+        captured = bytearray()
+
+        async def get_payload() -> dict:
+            return {"raw": captured.decode("utf-8", errors="replace")}
+
+        try:
+            async for chunk in body_iterator:
+                if len(captured) < STREAM_CAPTURE_LIMIT:
+                    if isinstance(chunk, str):
+                        chunk = chunk.encode("utf-8")
+                    captured += chunk[: STREAM_CAPTURE_LIMIT - len(captured)]
+                yield chunk
+        finally:
+            await self._log_request(
+                request,
+                request_id,
+                request_log,
+                request_body,
+                start_time,
+                response.status_code,
+                dict(response.headers),
+                get_payload,
+            )
+
+    async def _log_request(
+        self,
+        request: Request,
+        request_id: str,
+        request_log: dict,
+        request_body: Any,
+        start_time: float,
+        status_code: int,
+        response_headers: dict,
+        get_payload: Callable[[], Awaitable[Any]],
+    ) -> None:
+        """Record rollups, apply the retention policy and store the request's logs."""
         process_time = time.time() - start_time
-        if not self.redis_service.connection_error:
-            response_body = response.body.decode() if hasattr(response, "body") else ""
+        chat_type = request_body.get("prompt") if isinstance(request_body, dict) else None
+        chat_type = chat_type or request.query_params.get("prompt")
+        if chat_type not in settings.AVAILABLE_SERVICES:
+            # Image prompts and invalid values would each create new keys.
+            chat_type = None
+        # Keyed by route template, so ids in paths don't create new keys.
+        route_path = _route_path(request)
+        if self.rollups:
+            await self.rollups.record(
+                path=route_path,
+                status_code=status_code,
+                process_time=process_time,
+                service_type=chat_type,
+                token_usage=getattr(request.state, "token_usage", None),
+            )
+
+        decision = self.policy.decide(request.url.path, status_code, process_time)
+        if decision.store_summary:
             response_log = {
                 "request_id": request_id,
-                "status_code": response.status_code,
-                "headers": dict(response.headers),
-                "body": self._parse_response_body(response_body),
+                "status_code": status_code,
+                "headers": response_headers,
+                "body": await get_payload() if decision.store_body else None,
                 "process_time": process_time,
                 "timestamp": time.time(),
             }
-            
-            await self.redis_service.store_log(f"response:{request_id}", response_log)
+            await self._store_logs(request_id, request_log, response_log, decision)
+            if self.search_index:
+                await self.search_index.index(
+                    request_id=request_id,
+                    timestamp=start_time,
+                    path=route_path,
+                    status_code=status_code,
+                    process_time=process_time,
+                    chat_type=chat_type,
+                    query_text=request_body.get("query") if isinstance(request_body, dict) else None,
+                )
         
         logger.info(
             f"RequestID: {request_id} | "
             f"Method: {request.method} | "
             f"Path: {request.url.path} | "
-            f"Status: {response.status_code} | "
+            f"Status: {status_code} | "
             f"Duration: {process_time:.3f}s"
         )
-        
-        return response
-    
-    async def _get_request_body(self, request: Request) -> dict:
-        """Extract and parse request body."""
-        try:
-            body = await request.body()
-            body_str = body.decode()
-            if body_str:
-                try:
-                    return json.loads(body_str)
-                except json.JSONDecodeError:
-                    return {"raw": body_str}
-            return {}
-        except Exception as e:
-            logger.error(f"Error parsing request body: {e}")
-            return {"error": "Failed to parse request body"}
-    
-    async def _get_response(self, request: Request, call_next):
-        """Get response with body preserved."""
-        response = await call_next(request)
-        
+
+    async def _store_logs(
+        self, request_id: str, request_log: dict, response_log: dict, decision: LogDecision
+    ) -> None:
+        """Store the summary record and, when sampled, the full record with bodies."""
+        summary = {
+            "request": {k: v for k, v in request_log.items() if k not in SUMMARY_EXCLUDED_FIELDS},
+            "response": {k: v for k, v in response_log.items() if k not in SUMMARY_EXCLUDED_FIELDS},
+        }
+        await self.redis_service.store_record(
+            f"log:{request_id}", summary, ttl=decision.summary_ttl
+        )
+
+        if decision.store_body:
+            size_hint = _content_length(request_log["headers"]) + _content_length(response_log["headers"])
+            await self.redis_service.store_record(
+                f"logbody:{request_id}",
+                {"request": request_log, "response": response_log},
+                ttl=decision.body_ttl,
+                size_hint=size_hint,
+            )
+
+    async def _get_response_payload(self, request: Request, response: Response):
+        """Use the payload object handed over by the route, parsing the body only as a fallback."""
+        response_payload = getattr(request.state, "response_payload", None)
+        if response_payload is None:
+            content_type = response.headers.get("content-type", "")
+            if content_type.startswith(BINARY_MEDIA_TYPES):
+                return {"raw": f"<{len(response.body)} bytes of {content_type}>"}
+            response_body = response.body.decode() if hasattr(response, "body") else ""
+            response_payload = self._parse_response_body(response_body)
+        return response_payload
+
+    def _get_request_body(self, request: Request) -> Tuple[Any, Any]:
+        """
+        The parsed request body and the form it is logged in.
+
+        Large and rejected bodies are logged as a prefix with their size and
+        SHA-256 only.
+        """
+        body = get_request_body(request.scope)
+        if body is None:
+            return {}, {}
+        return (body.json if body.parsed else {}), body.to_log(BODY_LOG_LIMIT)
+
+    async def _buffer_response(self, response):
+        """Read the whole response body so it can be logged and replayed."""
         response_body = b""
         async for chunk in response.body_iterator:
             response_body += chunk
@@ -95,6 +244,27 @@ class LoggingMiddleware(BaseHTTPMiddleware):
             return {}
         
         try:
-            return json.loads(body)
-        except json.JSONDecodeError:
+            return serializer.loads(body)
+        except ValueError:
             return {"raw": body[:1000] + ("..." if len(body) > 1000 else "")}
+
+
+def _content_length(headers: dict) -> int:
+    value = headers.get("content-length", "")
+    return int(value) if value.isdigit() else 0
+
+
+def _truncate(value: str, limit: int) -> str:
+    return value if len(value) <= limit else value[:limit] + "..."
+
+
+def _route_path(request: Request) -> str:
+    """
+    The template of the route that handled a request, e.g. ``/chat/jobs/{job_id}``.
+
+    Set by the router, or as ``route_path`` by the fast path, which bypasses it.
+    """
+    route = request.scope.get("route")
+    if route is not None:
+        return route.path
+    return request.scope.get("route_path", UNMATCHED_ROUTE)
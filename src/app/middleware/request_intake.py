@@ -0,0 +1,264 @@
+import hashlib
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import parse_qsl
+
+from fastapi import Request
+from fastapi.routing import APIRoute
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.serialization import serializer
+
+logger = logging.getLogger(__name__)
+
+BODY_METHODS = ("POST", "PUT", "PATCH")
+STATE_KEY = "request_body"
+
+
+@dataclass
+class RequestBody:
+    """
+    A request body read once by ``RequestIntakeMiddleware``.
+
+    Shared through the request state with the logging middleware, the fast
+    path and ``SharedBodyRoute`` handlers, so nothing downstream reads or
+    parses the body again.
+
+    Args:
+        raw: The whole body, or only its first bytes when it was rejected
+        size: Bytes received
+        complete: False when the body was rejected before it was read in full
+        json: The parsed JSON document, if ``parsed``
+        parsed: Whether the body was parsed as JSON successfully
+        sha256: Digest of the bytes received, computed while reading a rejected body
+    """
+
+    raw: bytes = b""
+    size: int = 0
+    complete: bool = True
+    json: Any = None
+    parsed: bool = False
+    sha256: Optional[str] = None
+
+    def to_log(self, limit: int) -> Any:
+        """
+        The body as it should be logged.
+
+        Bodies larger than ``limit`` bytes, and rejected bodies, are logged
+        as a truncated prefix with their size and SHA-256 instead of in full.
+        """
+        if self.complete and self.size <= limit:
+            if self.parsed:
+                return self.json
+            return {"raw": self.raw.decode("utf-8", errors="replace")} if self.raw else {}
+        return {
+            "truncated": self.raw[:limit].decode("utf-8", errors="replace"),
+            "size": self.size,
+            "complete": self.complete,
+            "sha256": self.sha256 or hashlib.sha256(self.raw).hexdigest(),
+        }
+
+
+def get_request_body(scope: Scope) -> Optional[RequestBody]:
+    """Return the body the intake middleware read for a request, None if it read none."""
+    return scope.get("state", {}).get(STATE_KEY)
+
+
+class RequestIntakeMiddleware:
+    """
+    Bounded intake of request bodies, rejecting oversized requests early.
+
+    Requests whose ``Content-Length`` is over the endpoint's body limit are
+    answered with 413 without reading past the first body message. Other
+    bodies are read chunk by chunk and rejected with 413 as soon as they go
+    over the limit, so an oversized body is never held in memory. Accepted
+    bodies are parsed once, and the ``query`` of chat requests, from the
+    JSON body or the query string, is checked against the endpoint's length
+    limit.
+
+    The body is then replayed to the application and shared through the
+    request state as a ``RequestBody``. Add it inside the logging
+    middleware, which logs rejected requests with the body's prefix and
+    hash only.
+
+    Args:
+        app: The ASGI application
+        max_body_size: Default body limit in bytes
+        max_query_length: Default limit of the ``query`` field in characters
+        endpoints: Per-path overrides, ``{path: {"max_body_size": ..., "max_query_length": ...}}``;
+            query limits above ``max_query_length`` are lowered to it
+        log_prefix: Bytes of a rejected body kept for the log
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        max_body_size: int = 65536,
+        max_query_length: int = 8000,
+        endpoints: Optional[Dict[str, Dict[str, int]]] = None,
+        log_prefix: int = 1024,
+    ):
+        self.app = app
+        self.default_limits = (max_body_size, max_query_length)
+        self.limits: Dict[str, Tuple[int, int]] = {
+            path: (
+                limits.get("max_body_size", max_body_size),
+                # Models cap the query at the default, so overrides can only lower it.
+                min(limits.get("max_query_length", max_query_length), max_query_length),
+            )
+            for path, limits in (endpoints or {}).items()
+        }
+        self.log_prefix = log_prefix
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        max_body_size, max_query_length = self.limits.get(scope["path"], self.default_limits)
+        if _query_length(scope) > max_query_length:
+            await self._reject(scope, send, f"Query is limited to {max_query_length} characters")
+            return
+        if scope["method"] not in BODY_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        declared = headers.get("content-length", "")
+        if declared.isdigit() and int(declared) > max_body_size:
+            # Reject on the header; only the first message is read, for the log.
+            body = await self._read_rejected(receive, b"", 0)
+            body.size = max(body.size, int(declared))
+            scope.setdefault("state", {})[STATE_KEY] = body
+            await self._reject(scope, send, f"Request body is limited to {max_body_size} bytes")
+            return
+
+        body = await self._read(receive, max_body_size)
+        if body is None:
+            return
+        scope.setdefault("state", {})[STATE_KEY] = body
+        if not body.complete:
+            await self._reject(scope, send, f"Request body is limited to {max_body_size} bytes")
+            return
+
+        if body.raw and _is_json(headers.get("content-type")):
+            try:
+                # Bounded by the body limit; a thread would not free the loop
+                # anyway, since the parser holds the GIL throughout.
+                body.json = serializer.loads(body.raw)
+                body.parsed = True
+            except ValueError:
+                pass
+        if body.parsed and isinstance(body.json, dict):
+            query = body.json.get("query")
+            if isinstance(query, str) and len(query) > max_query_length:
+                await self._reject(scope, send, f"Query is limited to {max_query_length} characters")
+                return
+
+        await self.app(scope, _replay(body.raw, receive), send)
+
+    async def _read(self, receive: Receive, max_body_size: int) -> Optional[RequestBody]:
+        """Read a body up to a limit, None if the client disconnected."""
+        chunks = []
+        size = 0
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return None
+            chunk = message.get("body", b"")
+            size += len(chunk)
+            if size > max_body_size:
+                return await self._read_rejected(receive, b"".join(chunks) + chunk, size)
+            chunks.append(chunk)
+            if not message.get("more_body", False):
+                return RequestBody(raw=b"".join(chunks), size=size)
+
+    async def _read_rejected(self, receive: Receive, received: bytes, size: int) -> RequestBody:
+        """
+        Keep the prefix and digest of a rejected body.
+
+        When nothing was received yet, the first body message is read, so
+        the log shows what was sent; the rest of the body is left unread.
+        """
+        if not received:
+            message = await receive()
+            if message["type"] == "http.request":
+                received = message.get("body", b"")
+                size = len(received)
+        return RequestBody(
+            raw=received[: self.log_prefix],
+            size=size,
+            complete=False,
+            sha256=hashlib.sha256(received).hexdigest(),
+        )
+
+    async def _reject(self, scope: Scope, send: Send, detail: str) -> None:
+        logger.warning(f"Rejected {scope['method']} {scope['path']}: {detail}")
+        response = JSONResponse({"detail": detail}, status_code=413, headers={"Connection": "close"})
+        await response(scope, _no_body, send)
+
+
+class SharedBodyRequest(Request):
+    """A request whose body and JSON come from the intake middleware when it read them."""
+
+    async def body(self) -> bytes:
+        shared = get_request_body(self.scope)
+        if shared is not None and shared.complete:
+            return shared.raw
+        return await super().body()
+
+    async def json(self) -> Any:
+        shared = get_request_body(self.scope)
+        if shared is not None and shared.parsed:
+            return shared.json
+        return await super().json()
+
+
+class SharedBodyRoute(APIRoute):
+    """Route class that hands endpoints the body parsed by the intake middleware."""
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+
+        async def shared_body_handler(request: Request):
+            return await handler(SharedBodyRequest(request.scope, request.receive))
+
+        return shared_body_handler
+
+
+def _query_length(scope: Scope) -> int:
+    """Length of the ``query`` parameter of the query string, 0 if absent."""
+    query_string = scope.get("query_string", b"")
+    if b"query=" not in query_string:
+        return 0
+    params = parse_qsl(query_string.decode("latin-1"), keep_blank_values=True)
+    return max((len(value) for name, value in params if name == "query"), default=0)
+
+
+def _is_json(content_type: Optional[str]) -> bool:
+    # FastAPI parses bodies without a content type as JSON too.
+    if not content_type:
+        return True
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    return media_type == "application/json" or media_type.endswith("+json")
+
+
+def _replay(body: bytes, receive: Receive) -> Receive:
+    """A ``receive`` that returns the already-read body, then defers to the client."""
+    sent = False
+
+    async def replay() -> Message:
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        return await receive()
+
+    return replay
+
+
+async def _no_body() -> Message:
+    return {"type": "http.request", "body": b"", "more_body": False}
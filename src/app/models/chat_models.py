@@ -1,6 +1,7 @@
 from pydantic import BaseModel, Field
-from typing import Optional, Literal
+from typing import Dict, List, Optional, Literal
 from enum import Enum
+from app.config import settings
 
 
 class ChatType(str, Enum):
@@ -9,14 +10,62 @@ class ChatType(str, Enum):
     CURATOR = "curator"
 
 
+class StreamOptions(BaseModel):
+    coalesce_ms: Optional[float] = Field(
+        None, ge=0, le=1000, description="Longest time a chunk is held back to batch it with the next ones"
+    )
+    coalesce_bytes: Optional[int] = Field(
+        None, ge=1, le=65536, description="Send a batch once it reaches this many characters"
+    )
+
+
 class ChatRequest(BaseModel):
     prompt: Literal["inventor", "translator", "curator"] = Field(
         ..., description="The type of chat service to use"
     )
-    query: str = Field(..., description="The message/query to send to the LLM")
+    query: str = Field(
+        ..., max_length=settings.REQUEST_MAX_QUERY_LENGTH, description="The message/query to send to the LLM"
+    )
+    user_id: Optional[str] = Field(
+        None,
+        max_length=128,
+        description="User identifier; when set, the conversation continues the user's session",
+    )
+    stream_options: Optional[StreamOptions] = Field(
+        None, description="Chunk batching for streaming endpoints; server defaults when omitted"
+    )
 
 
 class ChatResponse(BaseModel):
     response: str = Field(..., description="The response from the chatbot")
     chat_type: str = Field(..., description="The type of chat service used")
     image_url: Optional[str] = Field(None, description="URL to an image for the Dream Curator")
+    thumbnail_url: Optional[str] = Field(None, description="URL of a small preview of the image")
+    image_id: Optional[str] = Field(
+        None, description="Stored image variants; GET /images/{image_id}/next shows another"
+    )
+    fields: Optional[Dict[str, str]] = Field(
+        None, description="The sections of the response, parsed by the service's output format"
+    )
+
+
+class ImageRequest(BaseModel):
+    prompt: str = Field(..., min_length=1, description="Description of the image")
+    n: int = Field(1, ge=1, description="Number of variants to generate in one request")
+    show: int = Field(1, ge=1, description="Number of variants to return now; the rest are kept")
+    response_format: Optional[Literal["url", "b64_json"]] = Field(
+        None, description="Upstream response format; server default when omitted"
+    )
+
+
+class ImageVariant(BaseModel):
+    index: int = Field(..., description="Position of the variant in its set")
+    url: Optional[str] = Field(None, description="URL of the image")
+    thumbnail_url: Optional[str] = Field(None, description="URL of a small preview of the image")
+    revised_prompt: Optional[str] = Field(None, description="The prompt the model actually used")
+
+
+class ImageSet(BaseModel):
+    image_id: Optional[str] = Field(None, description="The stored variants; None if they could not be stored")
+    variants: List[ImageVariant] = Field(default_factory=list)
+    remaining: int = Field(0, description="Stored variants not shown yet")
@@ -1,53 +1,193 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query, Request
 from fastapi.responses import StreamingResponse
-from app.models.chat_models import ChatRequest, ChatResponse
+from app.models.chat_models import ChatRequest, ChatResponse, ChatType
+from app.models.message import MessageHistory
 from app.services.chat_service_factory import ChatServiceFactory
+from app.core.interfaces import ChatService
 from app.services.llm.openai_provider import OpenAIProvider
+from app.services.llm.scheduler import get_scheduler
 from app.config import settings
+from app.core.config_snapshot import get_config
+from app.core.serialization import serializer, NDJSONLineEncoder
+from app.services.streaming import CoalescingOptions, ReplayBuffer, StreamReplayStore, coalesce
+from app.services.chat.output_format import with_fields
+from app.services.image import ImageStore
+from app.middleware.request_intake import SharedBodyRoute
 from app.exceptions import (
     InvalidServiceTypeError,
     ChatServiceError,
     AsyncProcessingError
 )
+from typing import AsyncIterator, Optional, Tuple
 import logging
-import json
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(
     prefix="/chat",
     tags=["chat"],
+    route_class=SharedBodyRoute,
 )
 
 factory = ChatServiceFactory()
 
+coalescing = CoalescingOptions.from_settings(settings)
 
-@router.post("/message", response_model=ChatResponse)
-async def send_message(request: ChatRequest):
+# Ask proxies (nginx) not to buffer streamed responses.
+STREAM_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+def get_session_store(request: Request):
+    """Return the shared session store."""
+    return request.app.state.session_store
+
+
+def get_stream_replay(request: Request) -> StreamReplayStore:
+    """Return the shared stream replay store."""
+    return request.app.state.stream_replay
+
+
+def get_image_store(request: Request) -> ImageStore:
+    """Return the shared image variant store."""
+    return request.app.state.image_store
+
+
+def get_coalescing(request: ChatRequest) -> CoalescingOptions:
+    """Return the chunk batching options of a streaming request."""
+    options = request.stream_options
+    if options is None:
+        return coalescing
+    return coalescing.with_overrides(options.coalesce_ms, options.coalesce_bytes)
+
+
+def create_service(request: ChatRequest, **options) -> ChatService:
+    """Create the service of a request from the current configuration snapshot."""
+    snapshot = get_config()
+    return factory.create_service(request.prompt, snapshot.llm, snapshot=snapshot, **options)
+
+
+def get_tenant(request: Request) -> Optional[str]:
+    """Return the tenant key used to schedule the request's LLM calls."""
+    return request.headers.get(settings.SCHEDULER_TENANT_HEADER)
+
+
+async def complete_chat(
+    request: ChatRequest, sessions, **options
+) -> Tuple[ChatResponse, ChatService]:
     """
-    Send a message to the chatbot and get a response.
+    Run a chat request to completion, continuing the user's session if any.
 
     Args:
-        request: ChatRequest containing prompt type and query
-        background_tasks: FastAPI background tasks
+        request: ChatRequest containing prompt type, query and optional user_id
+        sessions: Session store holding conversation history
+        **options: Service options such as tenant, priority_class and image_store
 
     Returns:
-        ChatResponse: The chatbot's response
+        Tuple[ChatResponse, ChatService]: The response and the service that produced it
     """
+    service = create_service(request, **options)
+    history = (
+        await sessions.get_messages(request.prompt, request.user_id)
+        if request.user_id
+        else None
+    )
+    result = await service.process_query(query=request.query, history=history)
+
+    # Handle both string and dict responses (for services with images, ok? in future, i will add more types, maybe...)
+    if isinstance(result, dict):
+        response = ChatResponse(
+            response=result.get("response", ""),
+            chat_type=request.prompt,
+            image_url=result.get("image_url"),
+            thumbnail_url=result.get("thumbnail_url"),
+            image_id=result.get("image_id"),
+            fields=result.get("fields") or None,
+        )
+    else:
+        fields = service.parse_output(result) if service.last_error is None else None
+        response = ChatResponse(
+            response=result, chat_type=request.prompt, image_url=None, fields=fields or None
+        )
 
-    try:
-        service = factory.create_service(request.prompt, settings.LLM_CONFIG)
-        result = await service.process_query(query=request.query)
-        
-        # Handle both string and dict responses (for services with images, ok? in future, i will add more types, maybe...)
-        if isinstance(result, dict):
-            return ChatResponse(
-                response=result.get("response", ""),
-                chat_type=request.prompt,
-                image_url=result.get("image_url")
+    if request.user_id and service.last_error is None:
+        await sessions.append(
+            request.prompt,
+            request.user_id,
+            service.prompt_template.format_user(request.query),
+            response.response,
+        )
+    return response, service
+
+
+async def open_chat_stream(
+    request: ChatRequest, sessions, **options
+) -> Tuple[ChatService, AsyncIterator[str]]:
+    """
+    Start streaming a chat request, continuing the user's session if any.
+
+    The exchange is appended to the session once the stream completes.
+
+    Args:
+        request: ChatRequest containing prompt type, query and optional user_id
+        sessions: Session store holding conversation history
+        **options: Service options such as tenant and priority_class
+
+    Returns:
+        Tuple[ChatService, AsyncIterator[str]]: The service and its stream of text deltas
+    """
+    service = create_service(request, **options)
+    history = (
+        await sessions.get_messages(request.prompt, request.user_id)
+        if request.user_id
+        else None
+    )
+
+    async def deltas() -> AsyncIterator[str]:
+        parts = []
+        async for chunk in service.process_query_stream(request.query, history):
+            parts.append(chunk)
+            yield chunk
+
+        if request.user_id and service.last_error is None:
+            await sessions.append(
+                request.prompt,
+                request.user_id,
+                service.prompt_template.format_user(request.query),
+                "".join(parts),
             )
-        else:
-            return ChatResponse(response=result, chat_type=request.prompt, image_url=None)
+
+    return service, deltas()
+
+
+async def answer_message(
+    request: ChatRequest, http_request: Request
+) -> Tuple[ChatResponse, ChatService]:
+    """
+    Answer a validated ``/chat/message`` request.
+
+    Shared by the route and the raw ASGI fast path.
+
+    Args:
+        request: ChatRequest containing prompt type, query and optional user_id
+        http_request: The raw request, used to hand the payload to the logging middleware
+
+    Returns:
+        Tuple[ChatResponse, ChatService]: The response and the service that produced it
+
+    Raises:
+        HTTPException: With the status code of a failed request
+    """
+    try:
+        response, service = await complete_chat(
+            request,
+            get_session_store(http_request),
+            tenant=get_tenant(http_request),
+            image_store=get_image_store(http_request),
+        )
+
+        http_request.state.response_payload = response
+        http_request.state.token_usage = service.last_usage
+        return response, service
 
     except InvalidServiceTypeError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -57,41 +197,118 @@ async def send_message(request: ChatRequest):
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
 
+@router.post("/message", response_model=ChatResponse)
+async def send_message(request: ChatRequest, http_request: Request):
+    """
+    Send a message to the chatbot and get a response.
+
+    Served by ``ChatFastPath`` when it is enabled; this route remains for
+    the OpenAPI schema and as the fallback.
+
+    Args:
+        request: ChatRequest containing prompt type, query and optional user_id
+        http_request: The raw request, used to hand the payload to the logging middleware
+
+    Returns:
+        ChatResponse: The chatbot's response
+    """
+    response, _ = await answer_message(request, http_request)
+    return response
+
+
+def start_replayable_stream(
+    request: ChatRequest, service: ChatService, deltas: AsyncIterator[str], replay
+) -> ReplayBuffer:
+    """
+    Coalesce a chat stream and buffer it for replay in the background.
+
+    Parsed fields of the service's output format are added to the stream
+    as they complete, followed by the service's own events such as images.
+    The upstream generation keeps going if the client disconnects, so the
+    client can resume with the returned buffer's ``stream_id``.
+    """
+    return replay.start(
+        service.decorate_stream(
+            with_fields(
+                coalesce(deltas, get_coalescing(request), max_pending=settings.STREAM_MAX_PENDING_CHUNKS),
+                service.OUTPUT_FORMAT,
+            )
+        ),
+        request.prompt,
+        usage=lambda: service.last_usage,
+    )
+
+
+async def ndjson_events(
+    replay, stream_id: str, chat_type: str, after_seq: int = 0, http_request: Optional[Request] = None
+) -> AsyncIterator[bytes]:
+    """
+    Encode a replayable stream as NDJSON lines carrying sequence numbers.
+
+    Text lines have a ``chunk``; parsed fields arrive as lines with
+    ``field`` and ``value``, and image renditions as lines with ``image``,
+    ``url`` and ``image_id``.
+
+    Args:
+        replay: Stream replay store
+        stream_id: The stream to follow
+        chat_type: The chat service, included in every line
+        after_seq: Last sequence number the client received
+        http_request: The raw request, to report token usage to the logging
+            middleware; left out when resuming so usage is counted once
+    """
+    encoder = NDJSONLineEncoder(serializer, chat_type=chat_type)
+    try:
+        async for seq, chunk in replay.follow(stream_id, after_seq):
+            if isinstance(chunk, dict):
+                yield encoder.encode(seq=seq, **chunk)
+            else:
+                yield encoder.encode(chunk=chunk, seq=seq)
+        if http_request is not None:
+            state = await replay.describe(stream_id)
+            http_request.state.token_usage = state and state["usage"]
+
+    except AsyncProcessingError as e:
+        logger.error(f"Async processing error: {e}")
+        yield serializer.dumps({"error": f"Processing error: {str(e)}"}) + b"\n"
+    except Exception as e:
+        logger.error(f"Unexpected error during streaming: {e}")
+        yield serializer.dumps(
+            {"error": f"An unexpected error occurred: {str(e)}"}
+        ) + b"\n"
+
+
 @router.post("/message/stream")
-async def stream_message(request: ChatRequest):
+async def stream_message(request: ChatRequest, http_request: Request):
     """
     Send a message to the chatbot and get a streaming response.
 
+    Every line carries a ``seq`` number and the response has an
+    ``X-Stream-ID`` header; a client that loses the connection can resume
+    with ``GET /chat/message/stream/{stream_id}?last_seq=...``.
+
     Args:
-        request: ChatRequest containing prompt type and query
+        request: ChatRequest containing prompt type, query and optional user_id
+        http_request: The raw request, used to report token usage to the logging middleware
 
     Returns:
         StreamingResponse: The chatbot's response as a stream of data
     """
 
     try:
-        service = factory.create_service(request.prompt, settings.LLM_CONFIG)
-
-        async def response_generator():
-            try:
-                response_stream = await service.process_query_stream(request.query)
-
-                async for chunk in response_stream:
-                    yield json.dumps(
-                        {"chunk": chunk, "chat_type": request.prompt}
-                    ) + "\n"
-
-            except AsyncProcessingError as e:
-                logger.error(f"Async processing error: {e}")
-                yield json.dumps({"error": f"Processing error: {str(e)}"}) + "\n"
-            except Exception as e:
-                logger.error(f"Unexpected error during streaming: {e}")
-                yield json.dumps(
-                    {"error": f"An unexpected error occurred: {str(e)}"}
-                ) + "\n"
+        service, deltas = await open_chat_stream(
+            request,
+            get_session_store(http_request),
+            tenant=get_tenant(http_request),
+            image_store=get_image_store(http_request),
+        )
+        replay = get_stream_replay(http_request)
+        stream = start_replayable_stream(request, service, deltas, replay)
 
         return StreamingResponse(
-            response_generator(), media_type="application/x-ndjson"
+            ndjson_events(replay, stream.stream_id, request.prompt, http_request=http_request),
+            media_type="application/x-ndjson",
+            headers={**STREAM_HEADERS, "X-Stream-ID": stream.stream_id},
         )
 
     except InvalidServiceTypeError as e:
@@ -105,6 +322,58 @@ async def stream_message(request: ChatRequest):
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
 
+@router.get("/message/stream/{stream_id}")
+async def resume_stream(
+    stream_id: str,
+    http_request: Request,
+    last_seq: int = Query(0, ge=0, description="Last sequence number received"),
+):
+    """
+    Resume a stream after the last chunk the client received.
+
+    Returns:
+        StreamingResponse: The remaining lines, followed live if the
+            generation is still running
+    """
+    replay = get_stream_replay(http_request)
+    state = await replay.describe(stream_id)
+    if state is None:
+        raise HTTPException(status_code=404, detail=f"Stream not found: {stream_id}")
+    if last_seq + 1 < state["replayable_from"]:
+        raise HTTPException(
+            status_code=410, detail=f"Stream {stream_id} can no longer be replayed from {last_seq}"
+        )
+
+    return StreamingResponse(
+        ndjson_events(replay, stream_id, state["chat_type"], after_seq=last_seq, http_request=http_request),
+        media_type="application/x-ndjson",
+        headers={**STREAM_HEADERS, "X-Stream-ID": stream_id},
+    )
+
+
+@router.get("/sessions/{chat_type}/{user_id}", response_model=MessageHistory)
+async def get_session(chat_type: ChatType, user_id: str, request: Request):
+    """
+    Get the stored conversation history of a user for one service.
+
+    Returns:
+        MessageHistory: The history as it will be sent to the LLM
+    """
+    return await get_session_store(request).get_history(chat_type.value, user_id)
+
+
+@router.delete("/sessions/{chat_type}/{user_id}")
+async def clear_session(chat_type: ChatType, user_id: str, request: Request):
+    """
+    Forget the conversation history of a user for one service.
+
+    Returns:
+        dict: Confirmation message
+    """
+    await get_session_store(request).clear(chat_type.value, user_id)
+    return {"message": f"Session for {user_id} cleared"}
+
+
 @router.get("/services")
 async def get_available_services():
     """
@@ -115,7 +384,10 @@ async def get_available_services():
     """
     return {
         "services": factory.get_available_services(),
-        "service_details": settings.AVAILABLE_SERVICES,
+        "service_details": {
+            service_type: dict(service_config.details)
+            for service_type, service_config in get_config().services.items()
+        },
     }
 
 
@@ -128,7 +400,7 @@ async def health_check():
         dict: Health status
     """
     try:
-        provider = OpenAIProvider(settings.LLM_CONFIG)
+        provider = OpenAIProvider(get_config().llm)
         llm_health = await provider.health_check()
 
         services = factory.get_available_services()
@@ -136,6 +408,7 @@ async def health_check():
         return {
             "status": "healthy",
             "llm_provider": llm_health,
+            "scheduler": get_scheduler().stats(),
             "available_services": services,
             "service_count": len(services),
         }
@@ -153,7 +426,7 @@ async def get_model_info():
         dict: Model information
     """
     try:
-        provider = OpenAIProvider(settings.LLM_CONFIG)
+        provider = OpenAIProvider(get_config().llm)
         model_info = await provider.get_model_info()
 
         return {
@@ -0,0 +1,170 @@
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+from fastapi import HTTPException, Request
+from pydantic import TypeAdapter, ValidationError
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.config_snapshot import get_config
+from app.core.serialization import serializer
+from app.middleware.request_intake import get_request_body
+from app.models.chat_models import ChatRequest, ChatResponse
+from app.routers import chat
+from app.services.cache import get_semantic_cache
+
+logger = logging.getLogger(__name__)
+
+# Validators and serializers built once, instead of per request by the router.
+CHAT_REQUEST_ADAPTER = TypeAdapter(ChatRequest)
+CHAT_RESPONSE_ADAPTER = TypeAdapter(ChatResponse)
+
+JSON_HEADERS = [(b"content-type", b"application/json")]
+
+Handler = Callable[[Scope, Receive, Send], Awaitable[None]]
+
+
+class EncodedResponseCache:
+    """
+    Bounded cache of encoded response bodies with least-recently-used eviction.
+
+    Args:
+        max_entries: Number of bodies kept
+        ttl: Seconds a body stays valid
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 60.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, Tuple[float, bytes]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[bytes]:
+        """Return the body stored under a key, None if missing or expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, body = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return body
+
+    def put(self, key: Hashable, body: bytes) -> None:
+        """Store a body, evicting the least recently used one when full."""
+        self._entries[key] = (time.monotonic() + self.ttl, body)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+class ChatFastPath:
+    """
+    Raw ASGI handling of the hot chat endpoints.
+
+    ``POST /chat/message`` is answered without FastAPI's routing, dependency
+    resolution and ``response_model`` re-validation: the body is validated
+    from bytes by a precompiled ``TypeAdapter`` and the response is encoded
+    once. Every other request goes to the application unchanged.
+
+    When the semantic cache is enabled, the encoded body of a stateless
+    request (no ``user_id``) is kept for ``cache_ttl`` seconds, so exact
+    repeats are answered with pre-encoded bytes without creating a service.
+    The key includes the configuration version, so a reload drops stale
+    bodies.
+
+    Add it inside the logging and intake middlewares; a body the intake
+    already parsed is validated without parsing it again.
+    """
+
+    def __init__(self, app: ASGIApp, cache_size: int = 1024, cache_ttl: float = 60.0):
+        self.app = app
+        self.cache = (
+            EncodedResponseCache(cache_size, cache_ttl) if cache_size > 0 and cache_ttl > 0 else None
+        )
+        self.routes: Dict[Tuple[str, str], Handler] = {
+            ("POST", "/chat/message"): self.chat_message,
+        }
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http":
+            handler = self.routes.get((scope["method"], scope["path"]))
+            if handler is not None:
+                # Its routes are literal paths, so the path is the route template
+                # the logging middleware keys rollups by.
+                scope["route_path"] = scope["path"]
+                await handler(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
+
+    async def chat_message(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Serve ``POST /chat/message``."""
+        shared = get_request_body(scope)
+        try:
+            if shared is not None and shared.parsed:
+                # Already parsed by the intake middleware.
+                request = CHAT_REQUEST_ADAPTER.validate_python(shared.json)
+            else:
+                body = await _read_body(receive)
+                if body is None:
+                    return
+                request = CHAT_REQUEST_ADAPTER.validate_json(body)
+        except ValidationError as e:
+            await _send_json(send, 422, serializer.dumps({"detail": _validation_errors(e)}))
+            return
+
+        key = self._cache_key(request)
+        if key is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                await _send_json(send, 200, cached)
+                return
+
+        try:
+            response, service = await chat.answer_message(request, Request(scope, receive))
+        except HTTPException as e:
+            await _send_json(send, e.status_code, serializer.dumps({"detail": e.detail}))
+            return
+
+        encoded = CHAT_RESPONSE_ADAPTER.dump_json(response)
+        if key is not None and service.last_error is None:
+            self.cache.put(key, encoded)
+        await _send_json(send, 200, encoded)
+
+    def _cache_key(self, request: ChatRequest) -> Optional[Hashable]:
+        if self.cache is None or request.user_id or get_semantic_cache() is None:
+            return None
+        return (get_config().version, request.prompt, request.query)
+
+
+async def _read_body(receive: Receive) -> Optional[bytes]:
+    """Read the whole request body, None if the client disconnected."""
+    chunks = []
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            return None
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body", False):
+            return b"".join(chunks)
+
+
+async def _send_json(send: Send, status_code: int, body: bytes) -> None:
+    headers = JSON_HEADERS + [(b"content-length", str(len(body)).encode("latin-1"))]
+    await send({"type": "http.response.start", "status": status_code, "headers": headers})
+    await send({"type": "http.response.body", "body": body})
+
+
+def _validation_errors(error: ValidationError) -> List[Dict[str, Any]]:
+    """Validation errors in the shape FastAPI returns them."""
+    return [
+        {**detail, "loc": ("body", *detail["loc"])}
+        for detail in error.errors(include_url=False, include_context=False)
+    ]
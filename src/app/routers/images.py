@@ -0,0 +1,134 @@
+from fastapi import APIRouter, Depends, HTTPException, Response
+from fastapi.responses import RedirectResponse
+from app.models.chat_models import ImageRequest, ImageSet, ImageVariant
+from app.routers.chat import get_image_store
+from app.services.image import GeneratedImage, ImageGenerator, ImageStore
+from app.core.config_snapshot import get_config
+from app.config import settings
+from app.exceptions import ImageGenerationError
+from app.middleware.request_intake import SharedBodyRoute
+from typing import List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(
+    prefix="/images",
+    tags=["images"],
+    route_class=SharedBodyRoute,
+)
+
+
+def _variant(store: ImageStore, image_id: Optional[str], index: int, image: GeneratedImage) -> ImageVariant:
+    return ImageVariant(
+        index=index,
+        url=store.public_url(image_id, index, image),
+        thumbnail_url=store.thumbnail_url(image_id, index),
+        revised_prompt=image.revised_prompt,
+    )
+
+
+async def _generate(prompt: str, n: int, response_format: Optional[str] = None) -> List[GeneratedImage]:
+    try:
+        images = await ImageGenerator(get_config().llm).generate_images(prompt, n, response_format)
+    except ImageGenerationError as e:
+        raise HTTPException(status_code=502, detail=str(e))
+    if not images:
+        raise HTTPException(status_code=503, detail="Image generation is not available")
+    return images
+
+
+@router.post("", response_model=ImageSet)
+async def create_images(request: ImageRequest, store: ImageStore = Depends(get_image_store)):
+    """
+    Generate several variants of an image in as few upstream calls as the model allows.
+
+    The first ``show`` variants are returned; the others are stored for
+    ``GET /images/{image_id}/next``.
+
+    Returns:
+        ImageSet: The returned variants and the id of the stored set
+    """
+    if request.n > settings.IMAGE_MAX_VARIANTS:
+        raise HTTPException(
+            status_code=422, detail=f"At most {settings.IMAGE_MAX_VARIANTS} variants per request"
+        )
+
+    images = await _generate(request.prompt, request.n, request.response_format)
+    show = min(request.show, len(images))
+    # Base64 variants are served from the store, so they are kept even without extras.
+    keep = len(images) > show or any(image.b64_json for image in images[:show])
+    image_id = await store.save(request.prompt, images, shown=show) if keep else None
+
+    return ImageSet(
+        image_id=image_id,
+        variants=[_variant(store, image_id, index, image) for index, image in enumerate(images[:show])],
+        remaining=len(images) - show if image_id else 0,
+    )
+
+
+@router.get("/{image_id}/next", response_model=ImageSet)
+async def next_image(image_id: str, store: ImageStore = Depends(get_image_store)):
+    """
+    Show another variant of a stored image.
+
+    Stored variants are returned immediately; once they are all shown, a new
+    batch of ``IMAGE_VARIANTS`` is generated for the same prompt.
+
+    Returns:
+        ImageSet: One variant and the number still stored
+    """
+    info = await store.describe(image_id)
+    if info is None:
+        raise HTTPException(status_code=404, detail=f"Image {image_id} not found or expired")
+
+    found = await store.next_variant(image_id)
+    if found is None:
+        images = await _generate(info["prompt"], max(settings.IMAGE_VARIANTS, 1))
+        await store.add(image_id, images)
+        found = await store.next_variant(image_id)
+        if found is None:
+            raise HTTPException(status_code=503, detail="Image variants could not be stored")
+
+    index, image = found
+    info = await store.describe(image_id)
+    remaining = info["count"] - info["shown"] if info else 0
+    return ImageSet(image_id=image_id, variants=[_variant(store, image_id, index, image)], remaining=remaining)
+
+
+@router.get("/{image_id}/{index}/{rendition}")
+async def get_rendition(
+    image_id: str, index: int, rendition: str, store: ImageStore = Depends(get_image_store)
+):
+    """
+    Serve the ``thumbnail`` or ``web`` rendition of a stored variant,
+    rendering it on first request.
+    """
+    data = await store.rendition(image_id, index, rendition)
+    if data is None:
+        raise HTTPException(
+            status_code=404, detail=f"Image {image_id}/{index}/{rendition} not found or expired"
+        )
+    return Response(
+        content=data,
+        media_type=store.media_type(rendition),
+        headers={"Cache-Control": f"public, max-age={store.ttl}, immutable"},
+    )
+
+
+@router.get("/{image_id}/{index}")
+async def get_image(image_id: str, index: int, store: ImageStore = Depends(get_image_store)):
+    """
+    Serve one stored variant: the PNG itself for base64 variants, a redirect
+    to the upstream URL otherwise.
+    """
+    image = await store.get(image_id, index)
+    if image is None:
+        raise HTTPException(status_code=404, detail=f"Image {image_id}/{index} not found or expired")
+    if image.b64_json:
+        return Response(
+            content=image.content(),
+            media_type="image/png",
+            headers={"Cache-Control": f"public, max-age={store.ttl}, immutable"},
+        )
+    return RedirectResponse(image.url)
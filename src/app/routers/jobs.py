@@ -0,0 +1,96 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from app.models.chat_models import ChatRequest
+from app.routers.chat import complete_chat, get_tenant
+from app.services.jobs import JobQueue
+from app.config import settings
+from app.exceptions import ChatServiceError, JobQueueFullError
+from app.middleware.request_intake import SharedBodyRoute
+from typing import Any, Dict
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(
+    prefix="/chat/jobs",
+    tags=["jobs"],
+    route_class=SharedBodyRoute,
+)
+
+
+async def get_job_queue(request: Request) -> JobQueue:
+    return request.app.state.job_queue
+
+
+def chat_job_handler(sessions, image_store=None):
+    """
+    Build the job handler that runs chat requests.
+
+    Args:
+        sessions: Session store holding conversation history
+        image_store: Store of generated image variants
+
+    Returns:
+        The handler passed to ``JobQueue``
+    """
+
+    async def handle(payload: Dict[str, Any]) -> Dict[str, Any]:
+        # Jobs are not waited on interactively, so they use spare capacity.
+        response, service = await complete_chat(
+            ChatRequest(**payload["request"]),
+            sessions,
+            tenant=payload.get("tenant"),
+            priority_class="bulk",
+            image_store=image_store,
+        )
+        if service.last_error is not None:
+            # The response is the fallback message; fail the job with the real error.
+            raise ChatServiceError(service.last_error)
+        return {"result": response.model_dump(), "token_usage": service.last_usage}
+
+    return handle
+
+
+@router.post("", status_code=202)
+async def create_job(
+    request: ChatRequest,
+    http_request: Request,
+    response: Response,
+    job_queue: JobQueue = Depends(get_job_queue),
+):
+    """
+    Queue a chat request and return its job id immediately.
+
+    Returns:
+        dict: Job id, status and the URL to poll
+    """
+    try:
+        job = await job_queue.submit(
+            {"request": request.model_dump(), "tenant": get_tenant(http_request)},
+            kind=request.prompt,
+        )
+    except JobQueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+
+    status_url = f"{router.prefix}/{job['id']}"
+    response.headers["Location"] = status_url
+    return {"job_id": job["id"], "status": job["status"], "status_url": status_url}
+
+
+@router.get("/{job_id}")
+async def get_job(
+    job_id: str,
+    wait: float = Query(
+        0, ge=0, le=settings.JOB_MAX_WAIT, description="Seconds to wait for the job to finish"
+    ),
+    job_queue: JobQueue = Depends(get_job_queue),
+):
+    """
+    Get the state of a job, optionally long-polling until it finishes.
+
+    Returns:
+        dict: The job state, including ``result`` once it succeeded
+    """
+    job = await job_queue.wait(job_id, wait)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+    return job
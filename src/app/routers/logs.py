@@ -1,7 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from app.services.redis_service import RedisService
+from app.services.logs.rollups import LogRollups
+from app.services.logs.search_index import LogSearchIndex
 from typing import Optional, List, Dict, Any
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
@@ -10,22 +13,45 @@ router = APIRouter(
     tags=["logs"],
 )
 
-async def get_redis_service():
-    from app.main import redis_service
-    return redis_service
+MAX_STATS_RANGE = 7 * 24 * 3600
+
+
+async def get_redis_service(request: Request) -> RedisService:
+    return request.app.state.redis_service
+
+async def get_log_rollups(request: Request) -> LogRollups:
+    return request.app.state.log_rollups
+
+async def get_log_search_index(request: Request) -> LogSearchIndex:
+    return request.app.state.log_search_index
+
+async def _load_page(redis_service: RedisService, request_ids: List[str]) -> List[Dict[str, Any]]:
+    """Load the summary records of one page of search results, skipping expired ones."""
+    records = await redis_service.get_records([f"log:{request_id}" for request_id in request_ids])
+    return [record for record in records if record]
 
 @router.get("/")
 async def get_logs(
     request_id: Optional[str] = Query(None, description="Filter by specific request ID"),
-    path: Optional[str] = Query(None, description="Filter by API path"),
-    limit: int = Query(100, description="Maximum number of logs to return"),
-    redis_service: RedisService = Depends(get_redis_service)
+    path: Optional[str] = Query(
+        None, description="Filter by route template, e.g. /chat/jobs/{job_id}; <unmatched> for unknown paths"
+    ),
+    limit: int = Query(100, ge=1, le=1000, description="Maximum number of logs to return"),
+    offset: int = Query(0, ge=0, description="Number of logs to skip"),
+    redis_service: RedisService = Depends(get_redis_service),
+    search_index: LogSearchIndex = Depends(get_log_search_index)
 ):
     """
-    Get API logs from Redis with optional filtering.
+    Get API logs from Redis with optional filtering, newest first.
     """
     try:
         if request_id:
+            record = await redis_service.get_record(f"logbody:{request_id}")
+            if not record:
+                record = await redis_service.get_record(f"log:{request_id}")
+            if record:
+                return record
+
             request_log = await redis_service.get_log(f"request:{request_id}")
             response_log = await redis_service.get_log(f"response:{request_id}")
             
@@ -37,49 +63,112 @@ async def get_logs(
                 "response": response_log
             }
         
-        pattern = "request:*"
-        all_requests = await redis_service.get_logs_by_pattern(pattern)
-        
-        if path:
-            all_requests = [
-                req for req in all_requests 
-                if req["data"].get("path") and path in req["data"].get("path")
-            ]
-        
-        all_requests.sort(key=lambda x: x["data"].get("timestamp", 0), reverse=True)
-        all_requests = all_requests[:limit]
-        
-        result = []
-        for req in all_requests:
-            request_id = req["data"].get("request_id")
-            if request_id:
-                response_log = await redis_service.get_log(f"response:{request_id}")
-                result.append({
-                    "request": req["data"],
-                    "response": response_log
-                })
-        
-        return result
+        found = await search_index.search(path=path, offset=offset, limit=limit)
+        return await _load_page(redis_service, found["request_ids"])
     
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error retrieving logs: {e}")
         raise HTTPException(status_code=500, detail=f"Error retrieving logs: {str(e)}")
 
+@router.get("/search")
+async def search_logs(
+    q: Optional[str] = Query(None, description="Words that must all appear in the request query"),
+    chat_type: Optional[str] = Query(None, description="Filter by chat service type"),
+    status: Optional[List[int]] = Query(None, description="Filter by response status code (any of)"),
+    path: Optional[str] = Query(
+        None, description="Filter by route template, e.g. /chat/jobs/{job_id}; <unmatched> for unknown paths"
+    ),
+    min_latency_ms: Optional[float] = Query(None, ge=0, description="Minimum latency (bucket granularity)"),
+    max_latency_ms: Optional[float] = Query(None, ge=0, description="Maximum latency (bucket granularity)"),
+    start: Optional[float] = Query(None, description="Only requests after this epoch time"),
+    end: Optional[float] = Query(None, description="Only requests before this epoch time"),
+    offset: int = Query(0, ge=0, description="Number of matches to skip"),
+    limit: int = Query(50, ge=1, le=500, description="Maximum number of logs to return"),
+    redis_service: RedisService = Depends(get_redis_service),
+    search_index: LogSearchIndex = Depends(get_log_search_index)
+):
+    """
+    Search stored request logs by query text and attributes, newest first.
+    """
+    try:
+        found = await search_index.search(
+            query=q,
+            chat_type=chat_type,
+            status=status,
+            path=path,
+            min_latency_ms=min_latency_ms,
+            max_latency_ms=max_latency_ms,
+            start=start,
+            end=end,
+            offset=offset,
+            limit=limit,
+        )
+        return {
+            "total": found["total"],
+            "offset": offset,
+            "limit": limit,
+            "results": await _load_page(redis_service, found["request_ids"]),
+        }
+    except Exception as e:
+        logger.error(f"Error searching logs: {e}")
+        raise HTTPException(status_code=500, detail=f"Error searching logs: {str(e)}")
+
+@router.get("/stats")
+async def get_log_stats(
+    start: Optional[float] = Query(None, description="Range start as epoch seconds (default: one hour ago)"),
+    end: Optional[float] = Query(None, description="Range end as epoch seconds (default: now)"),
+    path: Optional[List[str]] = Query(None, description="Only return these route templates"),
+    service_type: Optional[List[str]] = Query(None, description="Only return these chat service types"),
+    percentiles: List[float] = Query([50, 95, 99], description="Latency percentiles to estimate"),
+    rollups: LogRollups = Depends(get_log_rollups)
+):
+    """
+    Get request counts, status histograms, latency percentiles and token sums
+    from the per-minute rollups.
+    """
+    end = end if end is not None else time.time()
+    start = start if start is not None else end - 3600
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    if end - start > MAX_STATS_RANGE:
+        raise HTTPException(status_code=400, detail=f"Time range is limited to {MAX_STATS_RANGE} seconds")
+
+    dimensions = None
+    if path or service_type:
+        dimensions = [f"path:{p}" for p in path or []] + [f"service:{s}" for s in service_type or []]
+
+    try:
+        stats = await rollups.query(start, end, dimensions=dimensions, percentiles=percentiles)
+        return {"start": start, "end": end, "stats": stats}
+    except Exception as e:
+        logger.error(f"Error retrieving log stats: {e}")
+        raise HTTPException(status_code=500, detail=f"Error retrieving log stats: {str(e)}")
+
 @router.delete("/")
-async def clear_logs(redis_service: RedisService = Depends(get_redis_service)):
+async def clear_logs(
+    redis_service: RedisService = Depends(get_redis_service),
+    search_index: LogSearchIndex = Depends(get_log_search_index)
+):
     """
     Clear all logs from Redis.
     """
     try:
+        record_keys = await redis_service.redis.keys("log:*") + await redis_service.redis.keys("logbody:*")
         request_keys = await redis_service.redis.keys("request:*")
         response_keys = await redis_service.redis.keys("response:*")
         
+        if record_keys:
+            await redis_service.redis.delete(*record_keys)
         if request_keys:
             await redis_service.redis.delete(*request_keys)
         if response_keys:
             await redis_service.redis.delete(*response_keys)
         
-        return {"message": f"Cleared {len(request_keys) + len(response_keys)} log entries"}
+        await search_index.clear()
+        
+        return {"message": f"Cleared {len(record_keys) + len(request_keys) + len(response_keys)} log entries"}
     
     except Exception as e:
         logger.error(f"Error clearing logs: {e}")
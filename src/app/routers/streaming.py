@@ -0,0 +1,261 @@
+from fastapi import APIRouter, Header, HTTPException, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from app.models.chat_models import ChatRequest, ChatType, StreamOptions
+from app.routers.chat import (
+    STREAM_HEADERS,
+    get_coalescing,
+    get_image_store,
+    get_session_store,
+    get_stream_replay,
+    get_tenant,
+    open_chat_stream,
+    start_replayable_stream,
+)
+from app.services.streaming import HEARTBEAT, SSEEncoder, coalesce
+from app.services.chat.output_format import with_fields
+from app.config import settings
+from app.core.serialization import serializer
+from app.exceptions import InvalidServiceTypeError, ChatServiceError
+from app.middleware.request_intake import SharedBodyRoute
+from typing import Dict, Optional, Tuple
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(
+    prefix="/chat",
+    tags=["streaming"],
+    route_class=SharedBodyRoute,
+)
+
+
+def _parse_event_id(event_id: Optional[str]) -> Optional[Tuple[str, int]]:
+    """Split a ``<stream_id>:<seq>`` SSE event id, None if it is malformed."""
+    stream_id, _, seq = (event_id or "").partition(":")
+    if not stream_id or not seq.isdigit():
+        return None
+    return stream_id, int(seq)
+
+
+async def _sse_events(
+    replay, stream_id: str, chat_type: str, after_seq: int = 0, http_request: Optional[Request] = None
+):
+    encoder = SSEEncoder(serializer, chat_type=chat_type)
+    try:
+        async for item in replay.follow(
+            stream_id, after_seq, heartbeat_interval=settings.STREAM_HEARTBEAT_INTERVAL
+        ):
+            if item is HEARTBEAT:
+                yield encoder.heartbeat
+            else:
+                seq, chunk = item
+                event_id = f"{stream_id}:{seq}"
+                if isinstance(chunk, dict) and "image" in chunk:
+                    yield encoder.event("image", event_id=event_id, **chunk)
+                elif isinstance(chunk, dict):
+                    yield encoder.event("field", event_id=event_id, name=chunk["field"], value=chunk["value"])
+                else:
+                    yield encoder.event("chunk", event_id=event_id, chunk=chunk)
+        state = await replay.describe(stream_id)
+        usage = state and state["usage"]
+        if http_request is not None:
+            http_request.state.token_usage = usage
+        yield encoder.event("done", usage=usage)
+    except Exception as e:
+        logger.error(f"Unexpected error during SSE streaming: {e}")
+        yield encoder.event("error", error=f"An unexpected error occurred: {str(e)}")
+
+
+def _sse_stream_response(events, stream_id: str) -> StreamingResponse:
+    return StreamingResponse(
+        events, media_type="text/event-stream", headers={**STREAM_HEADERS, "X-Stream-ID": stream_id}
+    )
+
+
+async def _sse_response(request: ChatRequest, http_request: Request) -> StreamingResponse:
+    try:
+        service, deltas = await open_chat_stream(
+            request,
+            get_session_store(http_request),
+            tenant=get_tenant(http_request),
+            image_store=get_image_store(http_request),
+        )
+    except InvalidServiceTypeError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except ChatServiceError as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    replay = get_stream_replay(http_request)
+    stream = start_replayable_stream(request, service, deltas, replay)
+    return _sse_stream_response(
+        _sse_events(replay, stream.stream_id, request.prompt, http_request=http_request),
+        stream.stream_id,
+    )
+
+
+async def _resume_sse(http_request: Request, last_event_id: Optional[str]) -> Optional[StreamingResponse]:
+    """Resume the stream named by a ``Last-Event-ID``, None if it cannot be resumed."""
+    parsed = _parse_event_id(last_event_id)
+    if parsed is None:
+        return None
+    stream_id, seq = parsed
+    replay = get_stream_replay(http_request)
+    state = await replay.describe(stream_id)
+    if state is None or seq + 1 < state["replayable_from"]:
+        return None
+    return _sse_stream_response(
+        _sse_events(replay, stream_id, state["chat_type"], after_seq=seq, http_request=http_request),
+        stream_id,
+    )
+
+
+@router.get("/sse")
+async def stream_sse(
+    http_request: Request,
+    prompt: ChatType = Query(..., description="The type of chat service to use"),
+    query: str = Query(
+        ..., max_length=settings.REQUEST_MAX_QUERY_LENGTH, description="The message/query to send to the LLM"
+    ),
+    user_id: Optional[str] = Query(None, max_length=128, description="User identifier"),
+    coalesce_ms: Optional[float] = Query(None, ge=0, le=1000, description="Chunk batching window"),
+    coalesce_bytes: Optional[int] = Query(None, ge=1, le=65536, description="Chunk batching size"),
+    last_event_id: Optional[str] = Header(None, description="Sent by EventSource when it reconnects"),
+):
+    """
+    Stream a response as server-sent events, for ``EventSource`` clients.
+
+    Events are ``chunk`` (coalesced text), ``field`` (a completed section of
+    the answer), ``image`` (a rendition of the answer's image), ``done``
+    (with token usage) and ``error``; idle periods are filled with comment
+    heartbeats. Chunk events have ``<stream_id>:<seq>`` ids, so when
+    ``EventSource`` reconnects with ``Last-Event-ID`` the original stream is
+    resumed instead of generating a new response.
+
+    Returns:
+        StreamingResponse: A ``text/event-stream`` response
+    """
+    resumed = await _resume_sse(http_request, last_event_id)
+    if resumed is not None:
+        return resumed
+
+    request = ChatRequest(
+        prompt=prompt.value,
+        query=query,
+        user_id=user_id,
+        stream_options=StreamOptions(coalesce_ms=coalesce_ms, coalesce_bytes=coalesce_bytes),
+    )
+    return await _sse_response(request, http_request)
+
+
+@router.post("/sse")
+async def stream_sse_post(request: ChatRequest, http_request: Request):
+    """
+    Stream a response as server-sent events for a JSON request body.
+
+    Returns:
+        StreamingResponse: A ``text/event-stream`` response
+    """
+    return await _sse_response(request, http_request)
+
+
+@router.websocket("/ws")
+async def chat_websocket(websocket: WebSocket):
+    """
+    Multiplex chat streams over one WebSocket connection.
+
+    Client messages:
+        ``{"type": "start", "id": ..., "prompt": ..., "query": ..., "user_id": ...}``
+        ``{"type": "cancel", "id": ...}``
+
+    Server messages carry the stream ``id`` and a ``type`` of ``chunk``,
+    ``field``, ``image``, ``done``, ``cancelled`` or ``error``. All outgoing
+    messages go through one bounded queue, so a slow client slows its
+    streams down instead of growing server memory. Keepalive relies on
+    WebSocket protocol pings.
+    """
+    await websocket.accept()
+    sessions = websocket.app.state.session_store
+    image_store = websocket.app.state.image_store
+    tenant = websocket.headers.get(settings.SCHEDULER_TENANT_HEADER)
+    outbound: asyncio.Queue = asyncio.Queue(maxsize=settings.WS_SEND_QUEUE_SIZE)
+    streams: Dict[str, asyncio.Task] = {}
+
+    async def send(message: dict) -> None:
+        await outbound.put(serializer.dumps_str(message))
+
+    async def writer() -> None:
+        while True:
+            await websocket.send_text(await outbound.get())
+
+    async def run_stream(stream_id: str, request: ChatRequest) -> None:
+        try:
+            service, deltas = await open_chat_stream(
+                request, sessions, tenant=tenant, image_store=image_store
+            )
+            async for item in service.decorate_stream(
+                with_fields(
+                    coalesce(deltas, get_coalescing(request), max_pending=settings.STREAM_MAX_PENDING_CHUNKS),
+                    service.OUTPUT_FORMAT,
+                )
+            ):
+                if isinstance(item, dict) and "image" in item:
+                    await send({"type": "image", "id": stream_id, **item})
+                elif isinstance(item, dict):
+                    await send({"type": "field", "id": stream_id, **item})
+                else:
+                    await send({"type": "chunk", "id": stream_id, "chunk": item})
+            await send({"type": "done", "id": stream_id, "usage": service.last_usage})
+        except asyncio.CancelledError:
+            try:
+                outbound.put_nowait(serializer.dumps_str({"type": "cancelled", "id": stream_id}))
+            except asyncio.QueueFull:
+                pass
+            raise
+        except Exception as e:
+            logger.error(f"Unexpected error during WebSocket streaming: {e}")
+            await send({"type": "error", "id": stream_id, "error": str(e)})
+
+    writer_task = asyncio.create_task(writer())
+    try:
+        while True:
+            try:
+                message = serializer.loads(await websocket.receive_text())
+                message_type = message.get("type")
+                stream_id = str(message.get("id") or "")
+            except (ValueError, AttributeError):
+                await send({"type": "error", "error": "Messages must be JSON objects"})
+                continue
+
+            if not stream_id:
+                await send({"type": "error", "error": "Missing stream id"})
+            elif message_type == "cancel":
+                task = streams.get(stream_id)
+                if task:
+                    task.cancel()
+            elif message_type != "start":
+                await send({"type": "error", "id": stream_id, "error": f"Unknown message type: {message_type}"})
+            elif stream_id in streams:
+                await send({"type": "error", "id": stream_id, "error": "Stream id already in use"})
+            elif len(streams) >= settings.WS_MAX_STREAMS:
+                await send({"type": "error", "id": stream_id, "error": "Too many concurrent streams"})
+            else:
+                try:
+                    request = ChatRequest.model_validate(message)
+                except ValidationError as e:
+                    errors = "; ".join(
+                        f"{'.'.join(map(str, error['loc']))}: {error['msg']}" for error in e.errors()
+                    )
+                    await send({"type": "error", "id": stream_id, "error": errors})
+                    continue
+                task = asyncio.create_task(run_stream(stream_id, request))
+                streams[stream_id] = task
+                task.add_done_callback(lambda _, stream_id=stream_id: streams.pop(stream_id, None))
+    except WebSocketDisconnect:
+        pass
+    finally:
+        tasks = [*streams.values(), writer_task]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
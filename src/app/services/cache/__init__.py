@@ -0,0 +1,15 @@
+from .semantic_cache import (
+    SemanticCache,
+    Embedder,
+    HashedNGramEmbedder,
+    SentenceTransformerEmbedder,
+    get_semantic_cache,
+)
+
+__all__ = [
+    "SemanticCache",
+    "Embedder",
+    "HashedNGramEmbedder",
+    "SentenceTransformerEmbedder",
+    "get_semantic_cache",
+]
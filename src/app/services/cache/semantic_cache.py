@@ -0,0 +1,330 @@
+import logging
+import os
+import time
+import zlib
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.executors import get_executors
+from app.core.serialization import serializer
+from app.core.text import polarity, tokenize
+from app.exceptions import ConfigurationError
+
+# Imported by _require_numpy when a semantic cache is created, so workers
+# running without one never load NumPy.
+np = None
+
+logger = logging.getLogger(__name__)
+
+
+def _require_numpy():
+    global np
+    if np is None:
+        try:
+            import numpy
+        except ImportError:
+            raise ConfigurationError("numpy is required for the semantic cache")
+        np = numpy
+    return np
+
+
+class Embedder(ABC):
+    """Abstract interface for text embedders used by the semantic cache."""
+
+    dim: int
+    # Slow enough that embedding runs in the thread pool instead of on the event loop.
+    cpu_bound: bool = False
+
+    @abstractmethod
+    def embed(self, text: str) -> "np.ndarray":
+        """Return an L2-normalized float32 vector for the text."""
+        pass
+
+
+class HashedNGramEmbedder(Embedder):
+    """
+    Cheap embedder hashing words and character n-grams into a fixed-size vector.
+
+    Stopwords are dropped so short paraphrases are compared on their content
+    words; character n-grams let inflections ("said"/"says") partially match.
+    Hashes use crc32 so vectors are identical across processes and can be
+    persisted to disk.
+    """
+
+    def __init__(self, dim: int = 1024, char_ngram: int = 3):
+        _require_numpy()
+        self.dim = dim
+        self.char_ngram = char_ngram
+
+    def embed(self, text: str) -> "np.ndarray":
+        vector = np.zeros(self.dim, dtype=np.float32)
+        words = tokenize(text, unique=False)
+
+        features: List[Tuple[str, float]] = [(f"w:{word}", 1.0) for word in words]
+        for word in words:
+            padded = f" {word} "
+            features.extend(
+                (f"c:{padded[i:i + self.char_ngram]}", 1.0)
+                for i in range(len(padded) - self.char_ngram + 1)
+            )
+
+        for feature, weight in features:
+            digest = zlib.crc32(feature.encode("utf-8"))
+            sign = 1.0 if digest & 0x80000000 else -1.0
+            vector[digest % self.dim] += sign * weight
+
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+
+class SentenceTransformerEmbedder(Embedder):
+    """Embedder backed by a local sentence-transformers model running on CPU."""
+
+    cpu_bound = True
+
+    def __init__(self, model_name: str):
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError as e:
+            raise ConfigurationError(
+                "sentence-transformers is required for SEMANTIC_CACHE_MODEL"
+            ) from e
+        _require_numpy()
+        self.model = SentenceTransformer(model_name, device="cpu")
+        self.dim = self.model.get_sentence_embedding_dimension()
+
+    def embed(self, text: str) -> "np.ndarray":
+        return self.model.encode(text, normalize_embeddings=True).astype(np.float32)
+
+
+class VectorIndex:
+    """
+    Bounded in-memory vector index with least-recently-used eviction.
+
+    Vectors live in one NumPy matrix, grown by doubling up to ``capacity``,
+    so a lookup is a single matrix-vector product over the filled rows.
+    """
+
+    def __init__(self, dim: int, capacity: int, initial_size: int = 64):
+        self.dim = dim
+        self.capacity = capacity
+        size = min(initial_size, capacity)
+        self.vectors = np.zeros((size, dim), dtype=np.float32)
+        self.last_used = np.zeros(size, dtype=np.float64)
+        self.created_at = np.zeros(size, dtype=np.float64)
+        self.entries: List[Any] = []
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def nearest(self, vector: "np.ndarray") -> Tuple[int, float]:
+        """Return the index and cosine similarity of the closest entry."""
+        if not self.entries:
+            return -1, 0.0
+        scores = self.vectors[: len(self.entries)] @ vector
+        best = int(np.argmax(scores))
+        return best, float(scores[best])
+
+    def add(self, vector: "np.ndarray", entry: Any, now: float) -> None:
+        """Insert an entry, evicting the least recently used one when full."""
+        if len(self.entries) < self.capacity:
+            slot = len(self.entries)
+            self.reserve(slot + 1)
+            self.entries.append(entry)
+        else:
+            slot = int(np.argmin(self.last_used))
+            self.entries[slot] = entry
+        self.vectors[slot] = vector
+        self.last_used[slot] = now
+        self.created_at[slot] = now
+
+    def reserve(self, size: int) -> None:
+        """Grow the backing arrays so they hold at least ``size`` rows."""
+        current = self.vectors.shape[0]
+        if size <= current:
+            return
+        new_size = min(max(size, current * 2), self.capacity)
+        self.vectors = np.resize(self.vectors, (new_size, self.dim))
+        self.vectors[current:] = 0
+        self.last_used = np.resize(self.last_used, new_size)
+        self.created_at = np.resize(self.created_at, new_size)
+
+
+class SemanticCache:
+    """
+    Response cache matching queries by embedding similarity.
+
+    Each service type has its own index and similarity threshold, so a
+    paraphrased query returns the stored response without calling the LLM.
+    Embeddings score a statement and its negation ("I don't care" / "it's
+    not fine, I do care") or its opposite quantifier ("always" / "never")
+    as near duplicates, so a hit also requires the same polarity markers.
+    """
+
+    def __init__(
+        self,
+        embedder: Embedder,
+        capacity: int = 5000,
+        default_threshold: float = 0.9,
+        thresholds: Optional[Dict[str, float]] = None,
+        ttl: Optional[float] = None,
+        persist_path: Optional[str] = None,
+    ):
+        _require_numpy()
+        self.embedder = embedder
+        self.capacity = capacity
+        self.default_threshold = default_threshold
+        self.thresholds = thresholds or {}
+        self.ttl = ttl
+        self.persist_path = persist_path
+        self.hits = 0
+        self.misses = 0
+        self._indexes: Dict[str, VectorIndex] = {}
+
+    def _index(self, service_type: str) -> VectorIndex:
+        index = self._indexes.get(service_type)
+        if index is None:
+            index = VectorIndex(self.embedder.dim, self.capacity)
+            self._indexes[service_type] = index
+        return index
+
+    async def lookup(self, service_type: str, query: str) -> Optional[Any]:
+        """
+        Return the cached response of the most similar stored query.
+
+        Args:
+            service_type: The chat service the query is for
+            query: The user's query
+
+        Returns:
+            Optional[Any]: The cached response, or None on a miss
+        """
+        index = self._index(service_type)
+        slot, score = index.nearest(await self._embed(query))
+        threshold = self.thresholds.get(service_type, self.default_threshold)
+        now = time.time()
+
+        if (
+            slot < 0
+            or score < threshold
+            or self._expired(index, slot, now)
+            or polarity(index.entries[slot]["query"]) != polarity(query)
+        ):
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        index.last_used[slot] = now
+        logger.info(f"Semantic cache hit for {service_type} (similarity {score:.3f})")
+        return index.entries[slot]["response"]
+
+    async def store(self, service_type: str, query: str, response: Any, ttl: Optional[float] = None) -> None:
+        """
+        Cache a response for a query.
+
+        Args:
+            service_type: The chat service the query is for
+            query: The user's query
+            response: The response to cache
+            ttl: Seconds the entry stays valid when shorter than the cache's TTL,
+                e.g. for responses linking to expiring images
+        """
+        entry = {"query": query, "response": response}
+        if ttl is not None:
+            entry["ttl"] = ttl
+        self._index(service_type).add(await self._embed(query), entry, time.time())
+
+    async def _embed(self, text: str) -> "np.ndarray":
+        if self.embedder.cpu_bound:
+            return await get_executors().run_in_thread(self.embedder.embed, text)
+        return self.embedder.embed(text)
+
+    def _expired(self, index: VectorIndex, slot: int, now: float) -> bool:
+        ttls = [ttl for ttl in (self.ttl, index.entries[slot].get("ttl")) if ttl]
+        return bool(ttls) and now - index.created_at[slot] > min(ttls)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and index sizes."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": {service: len(index) for service, index in self._indexes.items()},
+        }
+
+    def save(self) -> None:
+        """Persist every index to ``persist_path``."""
+        if not self.persist_path:
+            return
+        arrays = {}
+        for service, index in self._indexes.items():
+            size = len(index)
+            arrays[f"{service}.vectors"] = index.vectors[:size]
+            arrays[f"{service}.last_used"] = index.last_used[:size]
+            arrays[f"{service}.created_at"] = index.created_at[:size]
+            arrays[f"{service}.entries"] = np.frombuffer(
+                serializer.dumps(index.entries), dtype=np.uint8
+            )
+        directory = os.path.dirname(self.persist_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.persist_path}.tmp.npz"
+        np.savez_compressed(tmp_path, **arrays)
+        os.replace(tmp_path, self.persist_path)
+        logger.info(f"Semantic cache saved to {self.persist_path}")
+
+    def load(self) -> None:
+        """Load indexes from ``persist_path`` if it exists."""
+        if not self.persist_path or not os.path.exists(self.persist_path):
+            return
+        try:
+            with np.load(self.persist_path) as data:
+                services = {name.split(".", 1)[0] for name in data.files}
+                for service in services:
+                    vectors = data[f"{service}.vectors"]
+                    if vectors.shape[1] != self.embedder.dim:
+                        logger.warning(f"Skipping cached {service} vectors with a different dimension")
+                        continue
+                    entries = serializer.loads(data[f"{service}.entries"].tobytes())
+                    index = self._index(service)
+                    size = min(len(entries), self.capacity)
+                    index.reserve(size)
+                    index.vectors[:size] = vectors[:size]
+                    index.last_used[:size] = data[f"{service}.last_used"][:size]
+                    index.created_at[:size] = data[f"{service}.created_at"][:size]
+                    index.entries = entries[:size]
+            logger.info(f"Semantic cache loaded from {self.persist_path}")
+        except Exception as e:
+            logger.warning(f"Failed to load semantic cache: {e}")
+
+
+_semantic_cache: Optional[SemanticCache] = None
+
+
+def get_semantic_cache() -> Optional[SemanticCache]:
+    """
+    Return the process-wide semantic cache, or None when it is disabled.
+    """
+    global _semantic_cache
+    from app.config import settings
+
+    if not settings.SEMANTIC_CACHE_ENABLED:
+        return None
+    if _semantic_cache is None:
+        embedder = (
+            SentenceTransformerEmbedder(settings.SEMANTIC_CACHE_MODEL)
+            if settings.SEMANTIC_CACHE_MODEL
+            else HashedNGramEmbedder(settings.SEMANTIC_CACHE_DIM)
+        )
+        _semantic_cache = SemanticCache(
+            embedder,
+            capacity=settings.SEMANTIC_CACHE_MAX_ENTRIES,
+            default_threshold=settings.SEMANTIC_CACHE_THRESHOLD,
+            thresholds={
+                service: config["semantic_cache_threshold"]
+                for service, config in settings.AVAILABLE_SERVICES.items()
+                if "semantic_cache_threshold" in config
+            },
+            ttl=settings.SEMANTIC_CACHE_TTL,
+            persist_path=settings.SEMANTIC_CACHE_PATH,
+        )
+    return _semantic_cache
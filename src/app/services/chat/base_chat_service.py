@@ -1,26 +1,78 @@
 from abc import abstractmethod
-from typing import Dict, Any, AsyncGenerator
+from typing import Dict, Any, AsyncGenerator, AsyncIterator, List, Optional, Union
 import logging
 
 from app.core.interfaces import ChatService
+from app.services.chat.prompt_template import PromptTemplate
+from app.services.chat.output_format import OutputFormat
 from app.services.llm.llm_service_manager import LLMServiceManager
+from app.services.llm.model_router import RoutingDecision, get_model_router
+from app.core.config_snapshot import ConfigSnapshot, get_config
+from app.services.cache.semantic_cache import get_semantic_cache
+from app.services.image import ImageStore
 
 logger = logging.getLogger(__name__)
 
 
 class BaseChatService(ChatService):
-    """Base implementation for chat services."""
-
-    def __init__(self, config: Dict[str, Any]):
+    """
+    Base implementation for chat services.
+
+    Subclasses declare their static ``SYSTEM_PROMPT`` and a ``USER_TEMPLATE``
+    with a single ``{query}`` field. Both are compiled into a
+    ``PromptTemplate`` once per class and reused for every request.
+    Services whose answers follow a fixed layout declare it as an
+    ``OUTPUT_FORMAT``, from which responses are parsed into fields.
+    """
+
+    SYSTEM_PROMPT: str = ""
+    USER_TEMPLATE: str = "{query}"
+    OUTPUT_FORMAT: Optional[OutputFormat] = None
+
+    def __init__(
+        self,
+        config: Dict[str, Any],
+        tenant: Optional[str] = None,
+        priority_class: Optional[str] = None,
+        snapshot: Optional[ConfigSnapshot] = None,
+        image_store: Optional[ImageStore] = None,
+    ):
         self.config = config
+        self.service_config = (snapshot or get_config()).service(self.service_type)
+        self.tenant = tenant
+        self.requested_priority = priority_class
+        self.image_store = image_store
         self.llm_manager = LLMServiceManager(config)
         self.logger = logging.getLogger(self.__class__.__name__)
+        self.last_error: Optional[str] = None
+        self.last_route: Optional[RoutingDecision] = None
+
+    @classmethod
+    def compile_prompt_template(cls) -> PromptTemplate:
+        """
+        Compile and validate the prompt template of this service class.
+
+        The result is cached on the class, so this only does work the first
+        time it is called (normally at application startup).
+
+        Raises:
+            ConfigurationError: If the prompt or user template is invalid
+        """
+        template = cls.__dict__.get("_prompt_template")
+        if template is None:
+            template = PromptTemplate(cls.SYSTEM_PROMPT, cls.USER_TEMPLATE)
+            cls._prompt_template = template
+        return template
+
+    @property
+    def prompt_template(self) -> PromptTemplate:
+        """The compiled prompt template of this service."""
+        return self.compile_prompt_template()
 
     @property
-    @abstractmethod
     def system_prompt(self) -> str:
-        """Return the system prompt for this service."""
-        pass
+        """Return the normalized system prompt for this service."""
+        return self.prompt_template.system_prompt
 
     @property
     @abstractmethod
@@ -28,68 +80,148 @@ class BaseChatService(ChatService):
         """Return the service type identifier."""
         pass
 
-    async def process_query(self, query: str) -> str:
+    @property
+    def last_usage(self) -> Optional[Dict[str, int]]:
+        """Token usage of the most recent LLM call made by this service."""
+        return self.llm_manager.last_usage
+
+    def parse_output(self, response: str) -> Dict[str, str]:
+        """Return the fields of a response, empty for services without an ``OUTPUT_FORMAT``."""
+        if self.OUTPUT_FORMAT is None:
+            return {}
+        return self.OUTPUT_FORMAT.parse(response)
+
+    async def process_query(
+        self, query: str, history: Optional[List[Dict[str, str]]] = None
+    ) -> str:
         """
         Process a user query and return a response.
 
+        When the semantic cache is enabled, a sufficiently similar earlier
+        query of the same service is answered from the cache. Queries that
+        continue a conversation bypass the cache.
+
         Args:
             query: The user's query
+            history: Earlier turns of the conversation, if any
 
         Returns:
             str: The processed response or a dict with response and image_url for services that support images
         """
-        try:
-            user_message = self._format_user_message(query)
-            kwargs = self._get_llm_kwargs()
-
-            response = await self.llm_manager.generate_response(
-                system_prompt=self.system_prompt, user_message=user_message, **kwargs
-            )
-
-            return response
+        self.last_error = None
+        cache = None if history else get_semantic_cache()
+        if cache:
+            cached = await cache.lookup(self.service_type, query)
+            if cached is not None:
+                return cached
 
+        try:
+            response = await self._complete(query, history)
         except Exception as e:
             self.logger.error(f"Error processing query: {e}")
+            self.last_error = str(e)
             return self._get_error_message(str(e))
 
-    async def process_query_stream(self, query: str) -> AsyncGenerator[str, None]:
+        if cache:
+            await cache.store(self.service_type, query, response, ttl=self._cache_ttl(response))
+        return response
+
+    def _cache_ttl(self, response: Any) -> Optional[float]:
+        """
+        Semantic cache lifetime of a response, None for the cache's default.
+
+        Override in services whose responses link to resources that expire.
+        """
+        return None
+
+    async def _complete(
+        self, query: str, history: Optional[List[Dict[str, str]]] = None
+    ):
+        """
+        Generate the response for a query with the LLM. Override in subclasses
+        that post-process the completion.
+
+        Args:
+            query: The user's query
+            history: Earlier turns of the conversation, if any
+
+        Returns:
+            The service response
+        """
+        kwargs = self._get_llm_kwargs(query, history)
+
+        return await self.llm_manager.generate_response(
+            system_prompt=self.system_prompt,
+            user_message=self._format_user_message(query),
+            messages=self.prompt_template.build_messages(query, history),
+            **kwargs,
+        )
+
+    async def process_query_stream(
+        self, query: str, history: Optional[List[Dict[str, str]]] = None
+    ) -> AsyncGenerator[str, None]:
         """
         Process a user query and yield streaming response chunks.
 
         Args:
             query: The user's query
+            history: Earlier turns of the conversation, if any
 
         Yields:
             str: Chunks of the processed response
         """
+        self.last_error = None
         try:
-            user_message = self._format_user_message(query)
-            kwargs = self._get_llm_kwargs()
+            kwargs = self._get_llm_kwargs(query, history)
 
             async for chunk in self.llm_manager.generate_streaming_response(
-                system_prompt=self.system_prompt, user_message=user_message, **kwargs
+                system_prompt=self.system_prompt,
+                user_message=self._format_user_message(query),
+                messages=self.prompt_template.build_messages(query, history),
+                **kwargs,
             ):
                 yield chunk
 
         except Exception as e:
             self.logger.error(f"Error in streaming response: {e}")
+            self.last_error = str(e)
             yield self._get_error_message(str(e))
 
-    def _format_user_message(self, query: str) -> str:
-        """Format the user message. Override in subclasses if needed."""
-        return query
-
-    def _get_llm_kwargs(self) -> Dict[str, Any]:
-        """Get LLM kwargs using service configuration."""
-        from app.config import settings
+    def decorate_stream(
+        self, items: AsyncIterator[Union[str, Dict[str, str]]]
+    ) -> AsyncIterator[Union[str, Dict[str, Any]]]:
+        """
+        Add service-specific events to a stream of text chunks and parsed fields.
 
-        service_settings = settings.AVAILABLE_SERVICES.get(self.service_type, {})
+        The stream is returned unchanged; services that start work from a
+        parsed field, like the curator's image, override this.
+        """
+        return items
 
-        temperature = service_settings.get(
-            "temperature", self.config.get("temperature", 0.7)
+    def _format_user_message(self, query: str) -> str:
+        """Format the user message from the service's ``USER_TEMPLATE``."""
+        return self.prompt_template.format_user(query)
+
+    def _get_llm_kwargs(
+        self, query: str = "", history: Optional[List[Dict[str, str]]] = None
+    ) -> Dict[str, Any]:
+        """Get LLM kwargs from the service configuration and the model router's decision."""
+        service_config = self.service_config
+        self.last_route = get_model_router().route(
+            self.service_type, service_config.profile, query, history
+        )
+        priority_class = self.llm_manager.scheduler.classify(
+            service_config.priority_class, self.tenant, self.requested_priority
         )
 
-        return {"temperature": temperature}
+        return {
+            **self.last_route.as_kwargs(),
+            "temperature": service_config.temperature,
+            "prompt_cache_key": self.service_type,
+            "priority_class": priority_class,
+            "tenant": self.tenant,
+            "cost": service_config.scheduler_cost,
+        }
 
     def _get_error_message(self, error: str) -> str:
         """Get error message for the user. Override in subclasses if needed."""
@@ -1,6 +1,8 @@
 from .base_chat_service import BaseChatService
-import re
+from .output_format import OutputFormat, Section
+import asyncio
 import logging
+from typing import Any, AsyncIterator, Dict, List, Optional, Union
 from app.services.image import ImageGenerator
 
 
@@ -9,14 +11,19 @@ class CuratorChatService(BaseChatService):
     Curador de Sonhos - Transforms dreams into surreal art and stories with images.
     """
     
-    def __init__(self, config):
-        super().__init__(config)
+    def __init__(self, config, **options):
+        super().__init__(config, **options)
         self.image_generator = ImageGenerator(config)
         self.logger = logging.getLogger(self.__class__.__name__)
 
-    @property
-    def system_prompt(self) -> str:
-        return """You are a dream interpreter and surreal artist. Based on the dream description, respond with:
+    USER_TEMPLATE = 'Dream: "{query}"'
+    OUTPUT_FORMAT = OutputFormat(
+        Section("title", "Title", "🎨"),
+        Section("art_description", "Art Description", "🖼️"),
+        Section("image_prompt", "Image Prompt", "🌠"),
+        Section("micro_story", "Micro-story", "📖"),
+    )
+    SYSTEM_PROMPT = """You are a dream interpreter and surreal artist. Based on the dream description, respond with:
 
                 🎨 Title:
                 🖼️ Art Description (in surreal style):
@@ -53,56 +60,139 @@ class CuratorChatService(BaseChatService):
     def service_type(self) -> str:
         return "curator"
 
-    def _format_user_message(self, query: str) -> str:
-        """Format the user message with dream context."""
-        return f'Dream: "{query}"'
-
     def _get_error_message(self, error: str) -> str:
         """Return a context-specific error message."""
         return (
             "Sorry, I couldn't interpret that dream right now. Please try again later."
         )
 
-    async def process_query(self, query: str) -> dict:
+    def _cache_ttl(self, response: Any) -> Optional[float]:
+        """Keep cached answers no longer than their image links stay valid."""
+        if isinstance(response, dict) and response.get("image_url"):
+            return self.config.get("image_store_ttl")
+        return None
+
+    async def _complete(
+        self, query: str, history: Optional[List[Dict[str, str]]] = None
+    ) -> dict:
         """
-        Process a dream query, generate a response with image, and return both.
+        Generate a dream interpretation and the image for its image prompt.
 
         Args:
             query: The user's dream description
+            history: Earlier turns of the conversation, if any
 
         Returns:
-            dict: Response text and image URL
+            dict: Response text, its parsed fields, image and thumbnail URLs and image set id
         """
-        try:
-            response = await super().process_query(query)
+        response = await super()._complete(query, history)
 
-            image_prompt = self._extract_image_prompt(response)
+        fields = self.parse_output(response)
+        image_prompt = fields.get("image_prompt", "")
+        
+        image_url = None
+        thumbnail_url = None
+        image_id = None
+        if image_prompt:
+            self.logger.info(f"Generating image for dream with prompt: {image_prompt[:100]}...")
+            images = await self.image_generator.generate_images(
+                image_prompt, self.config.get("image_variants", 1)
+            )
             
-            image_url = None
-            if image_prompt:
-                self.logger.info(f"Generating image for dream with prompt: {image_prompt[:100]}...")
-                image_url = await self.image_generator.generate_image(image_prompt)
-                
-                if image_url:
-                    self.logger.info("Image generated successfully")
+            if images:
+                # The first variant is shown; the rest wait for "show me another".
+                if self.image_store is not None:
+                    image_id = await self.image_store.save(image_prompt, images)
+                    image_url = self.image_store.public_url(image_id, 0, images[0])
+                    thumbnail_url = self.image_store.thumbnail_url(image_id, 0)
+                    if thumbnail_url:
+                        # Ready, or nearly, by the time the client asks for it.
+                        self.image_store.prerender(image_id, 0, images[0])
                 else:
-                    self.logger.warning("Failed to generate image")
-            
-            return {
-                "response": response,
-                "image_url": image_url
-            }
+                    image_url = images[0].url or images[0].data_url
+                self.logger.info(f"{len(images)} image variant(s) generated")
+            else:
+                self.logger.warning("Failed to generate image")
+        
+        return {
+            "response": response,
+            "image_url": image_url,
+            "thumbnail_url": thumbnail_url,
+            "image_id": image_id,
+            "fields": fields,
+        }
+
+    async def decorate_stream(
+        self, items: AsyncIterator[Union[str, Dict[str, str]]]
+    ) -> AsyncIterator[Union[str, Dict[str, Any]]]:
+        """
+        Generate the image while the rest of the answer streams.
+
+        Generation starts as soon as the image prompt field is parsed. Image
+        events, ``{"image": kind, "url": ..., "image_id": ...}``, are sent
+        as they become ready: the ``thumbnail`` first, then the ``web``
+        rendition and finally the ``original``.
+        """
+        events: asyncio.Queue = asyncio.Queue()
+        task = None
+        try:
+            async for item in items:
+                yield item
+                if task is None and isinstance(item, dict) and item.get("field") == "image_prompt":
+                    task = asyncio.create_task(self._stream_image(item["value"], events))
+                while not events.empty():
+                    yield events.get_nowait()
+
+            if task is not None:
+                while (event := await events.get()) is not None:
+                    yield event
+        finally:
+            if task is not None and not task.done():
+                task.cancel()
 
+    async def _stream_image(self, image_prompt: str, events: asyncio.Queue) -> None:
+        """Generate the image of a streamed answer, putting its events on a queue."""
+        try:
+            if not image_prompt:
+                return
+            images = await self.image_generator.generate_images(
+                image_prompt, self.config.get("image_variants", 1)
+            )
+            if not images:
+                return
+
+            image_id = None
+            if self.image_store is not None:
+                image_id = await self.image_store.save(image_prompt, images)
+                if image_id is not None:
+                    async for name, url in self.image_store.renditions(image_id, 0, images[0]):
+                        await events.put({"image": name, "url": url, "image_id": image_id})
+                original = self.image_store.public_url(image_id, 0, images[0])
+            else:
+                original = images[0].url or images[0].data_url
+            await events.put({"image": "original", "url": original, "image_id": image_id})
         except Exception as e:
-            self.logger.error(f"Error processing dream query: {e}")
-            return {
-                "response": self._get_error_message(str(e)),
-                "image_url": None
-            }
-    
-    def _extract_image_prompt(self, response: str) -> str:
-        """Extract the image prompt from the response."""
-        match = re.search(r'🌠 Image Prompt: (.*?)(?:\n\n|$)', response, re.DOTALL)
-        if match:
-            return match.group(1).strip()
-        return ""
+            self.logger.warning(f"Failed to generate image for stream: {e}")
+        finally:
+            events.put_nowait(None)
+
+    async def process_query(
+        self, query: str, history: Optional[List[Dict[str, str]]] = None
+    ) -> dict:
+        """
+        Process a dream query, generate a response with image, and return both.
+
+        Args:
+            query: The user's dream description
+            history: Earlier turns of the conversation, if any
+
+        Returns:
+            dict: Response text and image URL
+        """
+        result = await super().process_query(query, history)
+        if isinstance(result, dict):
+            return result
+        return {
+            "response": result,
+            "image_url": None
+        }
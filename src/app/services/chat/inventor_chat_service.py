@@ -1,4 +1,5 @@
 from .base_chat_service import BaseChatService
+from .output_format import OutputFormat, Section
 
 
 class InventorChatService(BaseChatService):
@@ -6,9 +7,14 @@ class InventorChatService(BaseChatService):
     Inventor de Ferramentas Imaginárias - Creates whimsical inventions to solve problems.
     """
 
-    @property
-    def system_prompt(self) -> str:
-        return """You are a whimsical inventor with a sharp mind for human needs. Given a specific problem, you create a futuristic or magical product that solves it elegantly.
+    USER_TEMPLATE = "Problem: {query}"
+    OUTPUT_FORMAT = OutputFormat(
+        Section("name", "Name", "📦"),
+        Section("what_it_does", "What it does", "🧰"),
+        Section("how_it_works", "How it works", "🎯"),
+        Section("tagline", "Catchy tagline", "💬"),
+    )
+    SYSTEM_PROMPT = """You are a whimsical inventor with a sharp mind for human needs. Given a specific problem, you create a futuristic or magical product that solves it elegantly.
 
                 Respond in this format:
                 - 📦 Name:
@@ -40,10 +46,6 @@ class InventorChatService(BaseChatService):
     def service_type(self) -> str:
         return "inventor"
 
-    def _format_user_message(self, query: str) -> str:
-        """Format the user message with problem context."""
-        return f"Problem: {query}"
-
     def _get_error_message(self, error: str) -> str:
         """Return a context-specific error message."""
         return "Sorry, I couldn't invent a solution for that problem right now. Please try again later."
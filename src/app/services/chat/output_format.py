@@ -0,0 +1,154 @@
+import re
+from dataclasses import dataclass
+from typing import AsyncIterator, Dict, List, Optional, Tuple, Union
+
+Field = Tuple[str, str]
+
+
+@dataclass(frozen=True)
+class Section:
+    """
+    One labelled section of a service's answer, e.g. ``🌠 Image Prompt: ...``.
+
+    Args:
+        name: Field name in parsed output
+        label: The label text before the colon
+        emoji: Emoji the prompt puts in front of the label, optional in answers
+    """
+
+    name: str
+    label: str
+    emoji: str = ""
+
+    def pattern(self) -> str:
+        label = re.escape(self.label).replace(r"\ ", r"[ \t]+")
+        if not self.emoji:
+            return label
+        # Models often drop the variation selector (U+FE0F) or the emoji itself.
+        emoji = re.escape(self.emoji.replace("\ufe0f", "")) + "\ufe0f?"
+        return rf"(?:{emoji}[ \t]*)?{label}"
+
+
+class OutputFormat:
+    """
+    The sections a service asks the LLM to answer with, compiled once.
+
+    A section header is a label at the start of a line, optionally behind a
+    list bullet or markdown emphasis, and followed by a colon, optionally
+    after a parenthetical (``🖼️ Art Description (in surreal style):``). A
+    section's value runs until the next header or the end of the answer.
+    """
+
+    def __init__(self, *sections: Section):
+        self.sections = sections
+        alternatives = "|".join(
+            f"(?P<s{index}>{section.pattern()})" for index, section in enumerate(sections)
+        )
+        self._header = re.compile(
+            rf"^[ \t]*(?:[-*•][ \t]+)?[*_]*(?:{alternatives})[ \t]*(?:\([^)\n]*\))?[*_]*:[*_]*[ \t]*",
+            re.MULTILINE | re.IGNORECASE,
+        )
+        self._names = {f"s{index}": section.name for index, section in enumerate(sections)}
+
+    @property
+    def field_names(self) -> List[str]:
+        return [section.name for section in self.sections]
+
+    def parser(self) -> "SectionParser":
+        """Return a new incremental parser for one answer."""
+        return SectionParser(self)
+
+    def parse(self, text: str) -> Dict[str, str]:
+        """Parse a complete answer into its fields."""
+        parser = self.parser()
+        parser.feed(text)
+        parser.close()
+        return parser.fields
+
+
+class SectionParser:
+    """
+    Incremental parser of one answer, fed chunk by chunk as it streams.
+
+    A field is reported as soon as the header of the next section arrives,
+    so downstream work can start before the answer is finished. Only the
+    last, still incomplete line is searched again when more text arrives.
+    """
+
+    def __init__(self, output_format: OutputFormat):
+        self._format = output_format
+        self._text = ""
+        self._scan = 0
+        self._current: Optional[str] = None
+        self._value_start = 0
+        self.fields: Dict[str, str] = {}
+
+    def feed(self, chunk: str) -> List[Field]:
+        """
+        Add a chunk of the answer.
+
+        Returns:
+            List[Tuple[str, str]]: The ``(name, value)`` fields completed by it
+        """
+        self._text += chunk
+        completed = []
+        for match in self._format._header.finditer(self._text, self._scan):
+            completed.extend(self._finish(match.start()))
+            self._current = self._format._names[match.lastgroup]
+            self._value_start = self._scan = match.end()
+
+        # A header can only start at a line start, so the next search can
+        # skip every complete line already seen.
+        self._scan = max(self._scan, self._text.rfind("\n", self._scan) + 1)
+        if self._current is None:
+            self._text = self._text[self._scan :]
+            self._scan = 0
+        return completed
+
+    def close(self) -> List[Field]:
+        """
+        Finish the answer.
+
+        Returns:
+            List[Tuple[str, str]]: The last field, if any
+        """
+        completed = self._finish(len(self._text))
+        self._current = None
+        return completed
+
+    def _finish(self, end: int) -> List[Field]:
+        if self._current is None:
+            return []
+        value = self._text[self._value_start : end].strip()
+        # A repeated section keeps its first value.
+        if self._current in self.fields:
+            return []
+        self.fields[self._current] = value
+        return [(self._current, value)]
+
+
+async def with_fields(
+    source: AsyncIterator[str], output_format: Optional[OutputFormat]
+) -> AsyncIterator[Union[str, Dict[str, str]]]:
+    """
+    Pass a text stream through, adding an event after each completed field.
+
+    Args:
+        source: The text chunks of an answer
+        output_format: The format of the answer, None to pass chunks through
+
+    Yields:
+        Union[str, Dict[str, str]]: Text chunks, and ``{"field": name, "value": value}``
+    """
+    if output_format is None:
+        async for chunk in source:
+            yield chunk
+        return
+
+    parser = output_format.parser()
+    async for chunk in source:
+        yield chunk
+        for name, value in parser.feed(chunk):
+            yield {"field": name, "value": value}
+    for name, value in parser.close():
+        yield {"field": name, "value": value}
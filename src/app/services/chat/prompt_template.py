@@ -0,0 +1,79 @@
+import hashlib
+import inspect
+import string
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence
+
+from app.exceptions import ConfigurationError
+
+
+@dataclass(frozen=True)
+class PromptTemplate:
+    """
+    Pre-compiled system prompt and user message template of a chat service.
+
+    The system prompt is normalized once (common indentation and trailing
+    whitespace removed) so every request starts with the same bytes and
+    upstream prompt caching can reuse the prefix. The user template must
+    contain exactly one ``{query}`` field; it is split around that field at
+    compile time, so formatting a message is a plain concatenation.
+    """
+
+    system_prompt: str
+    user_template: str = "{query}"
+    _user_prefix: str = field(init=False, repr=False)
+    _user_suffix: str = field(init=False, repr=False)
+    _system_message: Dict[str, str] = field(init=False, repr=False)
+
+    def __post_init__(self):
+        system_prompt = inspect.cleandoc(self.system_prompt or "")
+        if not system_prompt:
+            raise ConfigurationError("System prompt must not be empty")
+
+        fields = [name for _, name, _, _ in string.Formatter().parse(self.user_template) if name is not None]
+        if fields != ["query"]:
+            raise ConfigurationError(
+                f"User template must contain exactly one {{query}} field: {self.user_template!r}"
+            )
+        prefix, suffix = self.user_template.split("{query}")
+
+        object.__setattr__(self, "system_prompt", system_prompt)
+        object.__setattr__(self, "_user_prefix", prefix.replace("{{", "{").replace("}}", "}"))
+        object.__setattr__(self, "_user_suffix", suffix.replace("{{", "{").replace("}}", "}"))
+        object.__setattr__(self, "_system_message", {"role": "system", "content": system_prompt})
+
+    @property
+    def prefix_hash(self) -> str:
+        """Short digest of the system prompt, for checking prefix stability in logs."""
+        return hashlib.sha256(self.system_prompt.encode("utf-8")).hexdigest()[:12]
+
+    @property
+    def prefix_tokens(self) -> int:
+        """Approximate token count of the static prefix."""
+        return len(self.system_prompt) // 4
+
+    def format_user(self, query: str) -> str:
+        """Return the user message for a query."""
+        return f"{self._user_prefix}{query}{self._user_suffix}"
+
+    def build_messages(
+        self, query: str, history: Optional[Sequence[Dict[str, Any]]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Build the chat messages for a query.
+
+        The static system message always comes first and is the same object
+        for every call; variable content follows it.
+
+        Args:
+            query: The user's query
+            history: Earlier conversation turns to place between both
+
+        Returns:
+            List[Dict[str, Any]]: Messages in provider order
+        """
+        return [
+            self._system_message,
+            *(history or ()),
+            {"role": "user", "content": self.format_user(query)},
+        ]
@@ -1,4 +1,5 @@
 from .base_chat_service import BaseChatService
+from .output_format import OutputFormat, Section
 
 
 class TranslatorChatService(BaseChatService):
@@ -6,9 +7,13 @@ class TranslatorChatService(BaseChatService):
     Tradutor de Sentimentos Não Ditos - Interprets unspoken feelings and subtext.
     """
 
-    @property
-    def system_prompt(self) -> str:
-        return """You are a subtle communication analyst. Given a message, interpret the unspoken feelings or subtext behind the words.
+    USER_TEMPLATE = 'Message: "{query}"'
+    OUTPUT_FORMAT = OutputFormat(
+        Section("original_message", "Original Message", "📩"),
+        Section("subtext", "Likely Subtext", "🧠"),
+        Section("emotion", "Emotion Detected", "😶"),
+    )
+    SYSTEM_PROMPT = """You are a subtle communication analyst. Given a message, interpret the unspoken feelings or subtext behind the words.
 
                 Respond in this format:
                 - 📩 Original Message:
@@ -44,10 +49,6 @@ class TranslatorChatService(BaseChatService):
     def service_type(self) -> str:
         return "translator"
 
-    def _format_user_message(self, query: str) -> str:
-        """Format the user message with message context."""
-        return f'Message: "{query}"'
-
     def _get_error_message(self, error: str) -> str:
         """Return a context-specific error message."""
         return (
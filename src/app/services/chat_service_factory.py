@@ -22,13 +22,16 @@ class ChatServiceFactory(ServiceFactory):
             "curator": CuratorChatService,
         }
 
-    def create_service(self, service_type: str, config: Dict[str, Any]) -> ChatService:
+    def create_service(
+        self, service_type: str, config: Dict[str, Any], **options
+    ) -> ChatService:
         """
         Create a chat service instance.
 
         Args:
             service_type: The type of service to create
             config: Configuration for the service
+            **options: Per-request service options (tenant, priority_class, snapshot)
 
         Returns:
             ChatService: The created service instance
@@ -46,7 +49,33 @@ class ChatServiceFactory(ServiceFactory):
         service_class = self._SERVICE_REGISTRY[service_type]
         logger.info(f"Creating service: {service_type}")
 
-        return service_class(config)
+        return service_class(config, **options)
+
+    def compile_prompt_templates(self) -> Dict[str, Any]:
+        """
+        Compile and validate the prompt templates of every registered service.
+
+        Called once at startup so a malformed template fails fast instead of
+        on the first request.
+
+        Returns:
+            Dict[str, Any]: Prefix hash and approximate token count per service
+
+        Raises:
+            ConfigurationError: If a template is invalid
+        """
+        summary = {}
+        for service_type, service_class in self._SERVICE_REGISTRY.items():
+            template = service_class.compile_prompt_template()
+            summary[service_type] = {
+                "prefix_hash": template.prefix_hash,
+                "prefix_tokens": template.prefix_tokens,
+            }
+            logger.info(
+                f"Prompt template for {service_type}: prefix {template.prefix_hash}, "
+                f"~{template.prefix_tokens} tokens"
+            )
+        return summary
 
     def get_available_services(self) -> list:
         """
@@ -0,0 +1,93 @@
+import asyncio
+import importlib
+import logging
+from typing import TYPE_CHECKING, Dict, Any, Optional, Tuple
+
+if TYPE_CHECKING:
+    import aiohttp
+    import openai
+
+logger = logging.getLogger(__name__)
+
+# SDKs imported on first use rather than at startup; together they account
+# for most of the application's import time.
+LAZY_SDKS = ("openai", "aiohttp")
+
+_openai_clients: Dict[Tuple[str, float], "openai.AsyncOpenAI"] = {}
+_http_session: Optional["aiohttp.ClientSession"] = None
+
+
+def get_openai_client(api_key: str, timeout: float = 60) -> "openai.AsyncOpenAI":
+    """
+    Return the shared AsyncOpenAI client for the given credentials.
+
+    Clients keep their own HTTP connection pool, so reusing one per
+    (api_key, timeout) pair avoids a TLS handshake on every request.
+
+    Args:
+        api_key: OpenAI API key
+        timeout: Request timeout in seconds
+
+    Returns:
+        openai.AsyncOpenAI: The shared client
+    """
+    key = (api_key, timeout)
+    client = _openai_clients.get(key)
+    if client is None:
+        import openai
+
+        client = openai.AsyncOpenAI(api_key=api_key, timeout=timeout)
+        _openai_clients[key] = client
+    return client
+
+
+async def get_http_session() -> "aiohttp.ClientSession":
+    """
+    Return the shared aiohttp session, creating it on first use.
+
+    Returns:
+        aiohttp.ClientSession: The shared session
+    """
+    global _http_session
+    if _http_session is None or _http_session.closed:
+        import aiohttp
+
+        _http_session = aiohttp.ClientSession()
+    return _http_session
+
+
+async def warm_up_clients(config: Dict[str, Any]) -> None:
+    """
+    Create the shared clients ahead of the first request.
+
+    The SDKs are imported in a worker thread first, so the event loop keeps
+    serving requests, such as health probes, while they load.
+
+    Args:
+        config: LLM configuration holding the API key and timeout
+    """
+    await asyncio.to_thread(_import_sdks)
+    if config.get("api_key"):
+        get_openai_client(config["api_key"], config.get("timeout", 60))
+    await get_http_session()
+    logger.info("Shared HTTP clients initialized")
+
+
+def _import_sdks() -> None:
+    for name in LAZY_SDKS:
+        importlib.import_module(name)
+
+
+async def close_clients() -> None:
+    """Close every shared client and release its connections."""
+    global _http_session
+    for client in _openai_clients.values():
+        try:
+            await client.close()
+        except Exception as e:
+            logger.warning(f"Error closing OpenAI client: {e}")
+    _openai_clients.clear()
+
+    if _http_session is not None and not _http_session.closed:
+        await _http_session.close()
+    _http_session = None
@@ -1,3 +1,5 @@
-from .image_generator import ImageGenerator
+from .image_generator import GeneratedImage, ImageGenerator
+from .image_store import ImageStore
+from .processing import ImagePipeline, Rendition
 
-__all__ = ["ImageGenerator"]
+__all__ = ["GeneratedImage", "ImageGenerator", "ImagePipeline", "ImageStore", "Rendition"]
@@ -1,13 +1,57 @@
+import asyncio
 import os
 import logging
-import re
-import aiohttp
 import base64
-from typing import Optional, Dict, Any
+from dataclasses import asdict, dataclass
+from typing import Optional, Dict, Any, List
 from app.exceptions.exceptions import ImageGenerationError
+from app.services.clients import get_http_session
 
 logger = logging.getLogger(__name__)
 
+# Most images one upstream call may return; larger requests are split into
+# parallel calls.
+MAX_IMAGES_PER_CALL = {"dall-e-2": 10, "dall-e-3": 1, "gpt-image-1": 10}
+
+RESPONSE_FORMATS = ("url", "b64_json")
+
+
+@dataclass
+class GeneratedImage:
+    """
+    One generated image.
+
+    Args:
+        url: Upstream URL of the image, valid for about an hour
+        b64_json: Base64-encoded PNG, when requested instead of a URL
+        revised_prompt: The prompt the model actually used, if it rewrote it
+    """
+
+    url: Optional[str] = None
+    b64_json: Optional[str] = None
+    revised_prompt: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "GeneratedImage":
+        return cls(
+            url=data.get("url"),
+            b64_json=data.get("b64_json"),
+            revised_prompt=data.get("revised_prompt"),
+        )
+
+    @property
+    def data_url(self) -> Optional[str]:
+        """The image as a ``data:`` URL, for base64 images."""
+        return f"data:image/png;base64,{self.b64_json}" if self.b64_json else None
+
+    def content(self) -> Optional[bytes]:
+        """The decoded PNG bytes, for base64 images."""
+        return base64.b64decode(self.b64_json) if self.b64_json else None
+
+
 class ImageGenerator:
     """Service for generating images from text prompts using OpenAI DALL-E."""
 
@@ -18,6 +62,8 @@ class ImageGenerator:
         self.size = config.get("image_size", "1024x1024")
         self.quality = config.get("image_quality", "standard")
         self.style = config.get("image_style", "vivid")
+        self.response_format = config.get("image_response_format", "url")
+        self.max_parallel = config.get("image_max_parallel", 4)
         
         
     async def generate_image(self, prompt: str) -> Optional[str]:
@@ -30,10 +76,58 @@ class ImageGenerator:
         Returns:
             Optional[str]: URL of the generated image, or None if generation failed
         """
+        images = await self.generate_images(prompt, 1, response_format="url")
+        return (images[0].url or images[0].data_url) if images else None
+
+    async def generate_images(
+        self, prompt: str, n: int = 1, response_format: Optional[str] = None
+    ) -> List[GeneratedImage]:
+        """
+        Generate several variants of an image.
+
+        Models that accept ``n`` get a single call per batch of up to
+        ``MAX_IMAGES_PER_CALL`` images; the batches, or one call per image
+        for models limited to one, run in parallel, at most
+        ``max_parallel`` at a time.
+
+        Args:
+            prompt: Text description of the desired image
+            n: Number of variants
+            response_format: ``url`` or ``b64_json``, the configured format by default
+
+        Returns:
+            List[GeneratedImage]: The variants, empty if the prompt or API key is missing
+
+        Raises:
+            ImageGenerationError: If every call failed
+        """
         if not prompt or not self.api_key:
             logger.warning("Missing prompt or API key for image generation")
-            return None
-            
+            return []
+
+        response_format = response_format or self.response_format
+        if response_format not in RESPONSE_FORMATS:
+            raise ImageGenerationError(f"Unsupported image response format: {response_format}")
+
+        per_call = MAX_IMAGES_PER_CALL.get(self.model, 1)
+        batches = [min(per_call, n - start) for start in range(0, n, per_call)]
+        semaphore = asyncio.Semaphore(self.max_parallel)
+
+        async def bounded(count: int) -> List[GeneratedImage]:
+            async with semaphore:
+                return await self._request(prompt, count, response_format)
+
+        results = await asyncio.gather(*(bounded(count) for count in batches), return_exceptions=True)
+        images = [image for result in results if isinstance(result, list) for image in result]
+        errors = [result for result in results if isinstance(result, BaseException)]
+        if errors and not images:
+            raise errors[0]
+        if errors:
+            logger.warning(f"{len(errors)} of {len(batches)} image calls failed: {errors[0]}")
+        return images
+
+    async def _request(self, prompt: str, n: int, response_format: str) -> List[GeneratedImage]:
+        """Make one image generation call."""
         try:
             headers = {
                 "Content-Type": "application/json",
@@ -47,48 +141,55 @@ class ImageGenerator:
                 "prompt": formatted_prompt,
                 "size": self.size,
                 "quality": self.quality,
-                "style": self.style,
-                "n": 1,
+                "n": n,
             }
+            if not self.model.startswith("gpt-image"):
+                # gpt-image models always answer in base64 and have no style.
+                payload["style"] = self.style
+                payload["response_format"] = response_format
             
-            logger.debug(f"Sending image generation request with prompt: {formatted_prompt[:50]}...")
+            logger.debug(f"Sending image generation request for {n} image(s) with prompt: {formatted_prompt[:50]}...")
             
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    self.base_url, 
-                    headers=headers, 
-                    json=payload
-                ) as response:
-                    response_text = await response.text()
-                    
-                    if response.status != 200:
-                        error_detail = "Unknown error"
-                        try:
-                            error_data = await response.json()
-                            if isinstance(error_data, dict) and "error" in error_data:
-                                error_msg = error_data["error"].get("message")
-                                error_type = error_data["error"].get("type")
-                                error_detail = f"{error_type}: {error_msg}" if error_msg else error_type
-                        except Exception:
-                            pass
-                            
-                        logger.error(f"Image generation failed: {error_detail}")
-                        logger.debug(f"Full error response: {response_text}")
-                        raise ImageGenerationError(f"Failed to generate image: {error_detail}")
-                    
-                    try:    
-                        data = await response.json()
-                        
-                        if "data" in data and len(data["data"]) > 0 and "url" in data["data"][0]:
-                            return data["data"][0]["url"]
-                        else:
-                            logger.warning(f"No image URL in the response: {response_text}")
-                            raise ImageGenerationError("No image URL in the response")
-                    except Exception as e:
-                        logger.error(f"Error parsing response: {str(e)}")
-                        logger.debug(f"Response content: {response_text}")
-                        raise ImageGenerationError(f"Error parsing API response")
+            session = await get_http_session()
+            async with session.post(
+                self.base_url, 
+                headers=headers, 
+                json=payload
+            ) as response:
+                response_text = await response.text()
+                
+                if response.status != 200:
+                    error_detail = "Unknown error"
+                    try:
+                        error_data = await response.json()
+                        if isinstance(error_data, dict) and "error" in error_data:
+                            error_msg = error_data["error"].get("message")
+                            error_type = error_data["error"].get("type")
+                            error_detail = f"{error_type}: {error_msg}" if error_msg else error_type
+                    except Exception:
+                        pass
                         
+                    logger.error(f"Image generation failed: {error_detail}")
+                    logger.debug(f"Full error response: {response_text}")
+                    raise ImageGenerationError(f"Failed to generate image: {error_detail}")
+                
+                try:    
+                    data = await response.json()
+                    images = [
+                        GeneratedImage.from_dict(item)
+                        for item in data.get("data") or []
+                        if item.get("url") or item.get("b64_json")
+                    ]
+                except Exception as e:
+                    logger.error(f"Error parsing response: {str(e)}")
+                    logger.debug(f"Response content: {response_text}")
+                    raise ImageGenerationError(f"Error parsing API response")
+
+                if not images:
+                    logger.warning(f"No image in the response: {response_text[:1000]}")
+                    raise ImageGenerationError("No image in the response")
+                return images
+                    
         except ImageGenerationError:
             raise
         except Exception as e:
@@ -96,11 +197,13 @@ class ImageGenerator:
             raise ImageGenerationError(f"Unexpected error: {str(e)}")
             
     def _format_prompt(self, prompt: str) -> str:
-        """Format the prompt to get better results from the image generation model."""
-        image_prompt_match = re.search(r'🌠 Image Prompt: (.*?)(?:\n\n|$)', prompt, re.DOTALL)
-        if image_prompt_match:
-            prompt = image_prompt_match.group(1).strip()
-        
+        """
+        Format the prompt to get better results from the image generation model.
+
+        Callers pass the image prompt itself, already extracted from the
+        answer (see ``CuratorChatService.OUTPUT_FORMAT``).
+        """
+        prompt = prompt.strip()
         if len(prompt) > 3800:
             logger.warning(f"Prompt too long ({len(prompt)} chars), truncating")
             prompt = prompt[:3800]
@@ -0,0 +1,307 @@
+import asyncio
+import logging
+import uuid
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple
+
+from app.core.serialization import serializer
+from app.services.image.image_generator import GeneratedImage
+from app.services.image.processing import ImagePipeline
+
+logger = logging.getLogger(__name__)
+
+
+class ImageStore:
+    """
+    Generated image variants kept in Redis for "show me another" requests.
+
+    The variants of one prompt are a Redis list ``image:<id>``, next to a
+    hash ``image:<id>:meta`` holding the prompt and how many variants were
+    shown. Showing another variant is then one round trip instead of a new
+    generation. Base64 variants are stored as they came, so they can be
+    served without downloading them from the upstream URL, which expires
+    after about an hour anyway.
+
+    With an ``ImagePipeline``, each variant also gets a thumbnail and a
+    web-optimized rendition under ``image:<id>:<index>:<name>``. They are
+    rendered in the background once a variant is shown, or on the first
+    request for them; concurrent requests share one rendering.
+    """
+
+    def __init__(
+        self,
+        redis_service,
+        ttl: int = 3600,
+        prefix: str = "image",
+        pipeline: Optional[ImagePipeline] = None,
+    ):
+        self.redis_service = redis_service
+        self.ttl = ttl
+        self.prefix = prefix
+        self.pipeline = pipeline if pipeline is not None and pipeline.available else None
+        self._rendering: Dict[Tuple[str, int], Dict[str, asyncio.Future]] = {}
+        self._tasks: Set[asyncio.Task] = set()
+
+    @classmethod
+    def from_settings(cls, redis_service, settings) -> "ImageStore":
+        """Create an image store from application settings."""
+        pipeline = ImagePipeline.from_settings(settings) if settings.IMAGE_PIPELINE_ENABLED else None
+        return cls(redis_service, ttl=settings.IMAGE_STORE_TTL, pipeline=pipeline)
+
+    @staticmethod
+    def url(image_id: str, index: int, rendition: Optional[str] = None) -> str:
+        """Path under which a stored variant, or one of its renditions, is served."""
+        if rendition:
+            return f"/images/{image_id}/{index}/{rendition}"
+        return f"/images/{image_id}/{index}"
+
+    def thumbnail_url(self, image_id: Optional[str], index: int) -> Optional[str]:
+        """URL of a variant's thumbnail, None without a pipeline or a stored set."""
+        if self.pipeline is None or image_id is None:
+            return None
+        return self.url(image_id, index, "thumbnail")
+
+    def public_url(self, image_id: Optional[str], index: int, image: GeneratedImage) -> Optional[str]:
+        """
+        URL to hand to clients for a variant.
+
+        The upstream URL when there is one, the image endpoint for stored
+        base64 variants, and a ``data:`` URL when the variant was not stored.
+        """
+        if image.url:
+            return image.url
+        if image_id is not None:
+            return self.url(image_id, index)
+        return image.data_url
+
+    def _key(self, image_id: str) -> str:
+        return f"{self.prefix}:{image_id}"
+
+    def _meta_key(self, image_id: str) -> str:
+        return f"{self.prefix}:{image_id}:meta"
+
+    def _rendition_key(self, image_id: str, index: int, rendition: str) -> str:
+        return f"{self.prefix}:{image_id}:{index}:{rendition}"
+
+    def _redis(self):
+        redis_client = self.redis_service.redis
+        if self.redis_service.connection_error or not redis_client:
+            return None
+        return redis_client
+
+    async def save(self, prompt: str, images: List[GeneratedImage], shown: int = 1) -> Optional[str]:
+        """
+        Store the variants of a prompt.
+
+        Args:
+            prompt: The prompt the variants were generated for
+            images: The variants
+            shown: How many of them the caller already shows
+
+        Returns:
+            Optional[str]: The image set id, None if Redis is unavailable
+        """
+        redis_client = self._redis()
+        if redis_client is None or not images:
+            return None
+
+        image_id = uuid.uuid4().hex
+        key, meta_key = self._key(image_id), self._meta_key(image_id)
+        try:
+            async with redis_client.pipeline(transaction=False) as pipe:
+                pipe.rpush(key, *(serializer.dumps_str(image.to_dict()) for image in images))
+                pipe.hset(meta_key, mapping={"prompt": prompt, "shown": shown})
+                pipe.expire(key, self.ttl)
+                pipe.expire(meta_key, self.ttl)
+                await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Failed to store image variants: {e}")
+            return None
+        return image_id
+
+    async def add(self, image_id: str, images: List[GeneratedImage]) -> int:
+        """
+        Append newly generated variants to a set.
+
+        Returns:
+            int: The number of variants in the set, 0 if they could not be stored
+        """
+        redis_client = self._redis()
+        if redis_client is None or not images:
+            return 0
+        key = self._key(image_id)
+        try:
+            async with redis_client.pipeline(transaction=False) as pipe:
+                pipe.rpush(key, *(serializer.dumps_str(image.to_dict()) for image in images))
+                pipe.expire(key, self.ttl)
+                pipe.expire(self._meta_key(image_id), self.ttl)
+                count, _, _ = await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Failed to store image variants of {image_id}: {e}")
+            return 0
+        return count
+
+    async def get(self, image_id: str, index: int) -> Optional[GeneratedImage]:
+        """Return one variant of a set, None if it does not exist."""
+        redis_client = self._redis()
+        if redis_client is None or index < 0:
+            return None
+        try:
+            entry = await redis_client.lindex(self._key(image_id), index)
+        except Exception as e:
+            logger.warning(f"Failed to read image {image_id}/{index}: {e}")
+            return None
+        return GeneratedImage.from_dict(serializer.loads(entry)) if entry else None
+
+    async def describe(self, image_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Return the prompt of a set and how many variants it has and showed.
+
+        Returns:
+            Optional[Dict[str, Any]]: ``prompt``, ``count`` and ``shown``, None for an unknown set
+        """
+        redis_client = self._redis()
+        if redis_client is None:
+            return None
+        try:
+            async with redis_client.pipeline(transaction=False) as pipe:
+                pipe.hgetall(self._meta_key(image_id))
+                pipe.llen(self._key(image_id))
+                meta, count = await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Failed to read image set {image_id}: {e}")
+            return None
+        if not meta:
+            return None
+        return {"prompt": meta.get("prompt", ""), "count": count, "shown": int(meta.get("shown", 0))}
+
+    async def next_variant(self, image_id: str) -> Optional[Tuple[int, GeneratedImage]]:
+        """
+        Return the first variant of a set not shown yet, and mark it shown.
+
+        Returns:
+            Optional[Tuple[int, GeneratedImage]]: Its index and the variant,
+            None when every stored variant was shown
+        """
+        redis_client = self._redis()
+        if redis_client is None:
+            return None
+        meta_key = self._meta_key(image_id)
+        try:
+            index = await redis_client.hincrby(meta_key, "shown", 1) - 1
+            image = await self.get(image_id, index)
+            if image is None:
+                await redis_client.hincrby(meta_key, "shown", -1)
+                return None
+        except Exception as e:
+            logger.warning(f"Failed to read the next variant of {image_id}: {e}")
+            return None
+        return index, image
+
+    def media_type(self, rendition: str) -> str:
+        return self.pipeline.renditions[rendition].media_type
+
+    def prerender(self, image_id: str, index: int, image: GeneratedImage) -> Dict[str, asyncio.Future]:
+        """
+        Start rendering every rendition of a variant in the background.
+
+        Returns:
+            Dict[str, asyncio.Future]: Per rendition, in rendering order, a
+            future of its bytes; None if rendering failed
+        """
+        key = (image_id, index)
+        futures = self._rendering.get(key)
+        if futures is None:
+            loop = asyncio.get_running_loop()
+            futures = {name: loop.create_future() for name in self.pipeline.renditions}
+            self._rendering[key] = futures
+            task = asyncio.create_task(self._render(image_id, index, image, futures))
+            self._tasks.add(task)
+
+            def done(task: asyncio.Task) -> None:
+                self._tasks.discard(task)
+                self._rendering.pop(key, None)
+                for future in futures.values():
+                    if not future.done():
+                        future.set_result(None)
+
+            task.add_done_callback(done)
+        return futures
+
+    async def renditions(
+        self, image_id: str, index: int, image: GeneratedImage
+    ) -> AsyncIterator[Tuple[str, str]]:
+        """
+        Render the renditions of a variant.
+
+        Yields:
+            Tuple[str, str]: The name and URL of each rendition as soon as it
+            is stored, the thumbnail first
+        """
+        if self.pipeline is None:
+            return
+        for name, future in self.prerender(image_id, index, image).items():
+            if await asyncio.shield(future) is None:
+                return
+            yield name, self.url(image_id, index, name)
+
+    async def rendition(self, image_id: str, index: int, name: str) -> Optional[bytes]:
+        """
+        Return a rendition of a stored variant, rendering it if needed.
+
+        Returns:
+            Optional[bytes]: The encoded image, None if the variant is unknown
+            or cannot be rendered
+        """
+        if self.pipeline is None or name not in self.pipeline.renditions:
+            return None
+        data = await self._get_bytes(self._rendition_key(image_id, index, name))
+        if data is not None:
+            return data
+
+        futures = self._rendering.get((image_id, index))
+        if futures is None:
+            image = await self.get(image_id, index)
+            if image is None:
+                return None
+            futures = self.prerender(image_id, index, image)
+        return await asyncio.shield(futures[name])
+
+    async def close(self) -> None:
+        """Cancel background renderings."""
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def _render(
+        self, image_id: str, index: int, image: GeneratedImage, futures: Dict[str, asyncio.Future]
+    ) -> None:
+        try:
+            data = await self.pipeline.fetch(image)
+            for name, future in futures.items():
+                rendered = await self.pipeline.render(data, name)
+                await self._set_bytes(self._rendition_key(image_id, index, name), rendered)
+                future.set_result(rendered)
+        except Exception as e:
+            logger.warning(f"Failed to render image {image_id}/{index}: {e}")
+
+    async def _get_bytes(self, key: str) -> Optional[bytes]:
+        redis_client = self._redis()
+        if redis_client is None:
+            return None
+
+        from redis.client import NEVER_DECODE
+
+        try:
+            return await redis_client.execute_command("GET", key, **{NEVER_DECODE: True})
+        except Exception as e:
+            logger.warning(f"Failed to read {key}: {e}")
+            return None
+
+    async def _set_bytes(self, key: str, data: bytes) -> None:
+        redis_client = self._redis()
+        if redis_client is None:
+            return
+        try:
+            await redis_client.set(key, data, ex=self.ttl)
+        except Exception as e:
+            logger.warning(f"Failed to store {key}: {e}")
@@ -0,0 +1,122 @@
+import importlib.util
+import io
+import logging
+from dataclasses import dataclass
+from typing import Dict
+
+from app.core.executors import get_executors
+from app.services.clients import get_http_session
+from app.services.image.image_generator import GeneratedImage
+from app.exceptions import ImageGenerationError
+
+logger = logging.getLogger(__name__)
+
+MEDIA_TYPES = {"WEBP": "image/webp", "JPEG": "image/jpeg"}
+
+
+@dataclass(frozen=True)
+class Rendition:
+    """
+    A derived version of a generated image.
+
+    Args:
+        name: Name used in URLs and storage keys
+        max_size: Longest side in pixels
+        format: ``WEBP`` or ``JPEG``; JPEG is saved progressive
+        quality: Encoder quality, 1 to 100
+    """
+
+    name: str
+    max_size: int
+    format: str = "WEBP"
+    quality: int = 80
+
+    @property
+    def media_type(self) -> str:
+        return MEDIA_TYPES[self.format]
+
+
+def render(data: bytes, max_size: int, format: str, quality: int) -> bytes:
+    """
+    Downscale an image and re-encode it for the web.
+
+    CPU-bound; runs in a worker process.
+    """
+    from PIL import Image
+
+    with Image.open(io.BytesIO(data)) as image:
+        image = image.convert("RGB")
+        image.thumbnail((max_size, max_size), Image.LANCZOS)
+        out = io.BytesIO()
+        if format == "JPEG":
+            image.save(out, "JPEG", quality=quality, optimize=True, progressive=True)
+        else:
+            image.save(out, "WEBP", quality=quality, method=4)
+        return out.getvalue()
+
+
+class ImagePipeline:
+    """
+    Post-processing of generated images into smaller renditions.
+
+    The source image is fetched once, from its base64 payload or its
+    upstream URL, and each rendition is encoded in the shared process pool
+    so the event loop never runs the resampling. Requires Pillow; without it the
+    pipeline reports itself unavailable and only originals are served.
+    """
+
+    def __init__(
+        self,
+        thumbnail_size: int = 256,
+        web_size: int = 1024,
+        format: str = "WEBP",
+        quality: int = 80,
+    ):
+        format = format.upper()
+        if format not in MEDIA_TYPES:
+            raise ValueError(f"Unsupported image format: {format}")
+        self.renditions: Dict[str, Rendition] = {
+            "thumbnail": Rendition("thumbnail", thumbnail_size, format, quality),
+            "web": Rendition("web", web_size, format, quality),
+        }
+        # Pillow is only imported by the worker processes.
+        self.available = importlib.util.find_spec("PIL") is not None
+        if not self.available:
+            logger.warning("Pillow is not installed; image thumbnails are disabled")
+
+    @classmethod
+    def from_settings(cls, settings) -> "ImagePipeline":
+        """Create an image pipeline from application settings."""
+        return cls(
+            thumbnail_size=settings.IMAGE_THUMBNAIL_SIZE,
+            web_size=settings.IMAGE_WEB_SIZE,
+            format=settings.IMAGE_WEB_FORMAT,
+            quality=settings.IMAGE_WEB_QUALITY,
+        )
+
+    async def fetch(self, image: GeneratedImage) -> bytes:
+        """
+        Return the bytes of a generated image.
+
+        Raises:
+            ImageGenerationError: If the image cannot be downloaded
+        """
+        if image.b64_json:
+            return image.content()
+        try:
+            session = await get_http_session()
+            async with session.get(image.url) as response:
+                if response.status != 200:
+                    raise ImageGenerationError(f"Image download failed with status {response.status}")
+                return await response.read()
+        except ImageGenerationError:
+            raise
+        except Exception as e:
+            raise ImageGenerationError(f"Image download failed: {str(e)}")
+
+    async def render(self, data: bytes, name: str) -> bytes:
+        """Encode one rendition of an image in the process pool."""
+        rendition = self.renditions[name]
+        return await get_executors().run_in_process(
+            render, data, rendition.max_size, rendition.format, rendition.quality
+        )
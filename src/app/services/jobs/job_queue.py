@@ -0,0 +1,250 @@
+import asyncio
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from app.core.serialization import serializer
+from app.exceptions import JobQueueFullError
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+TERMINAL_STATUSES = (SUCCEEDED, FAILED)
+
+JobHandler = Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]
+
+
+class JobQueue:
+    """
+    Bounded queue of background jobs processed by a fixed pool of workers.
+
+    Job state is kept in the Redis hash ``job:<id>`` (every field JSON
+    encoded) with a TTL, mirrored in a small local LRU so polling the
+    process that owns a job needs no round trip. Finished jobs are announced
+    on the ``job:<id>:done`` channel, which long-polling readers in other
+    processes subscribe to.
+    """
+
+    def __init__(
+        self,
+        redis_service,
+        handler: JobHandler,
+        workers: int = 4,
+        max_queue_size: int = 100,
+        timeout: float = 300.0,
+        ttl: int = 3600,
+        local_capacity: int = 1000,
+        prefix: str = "job",
+    ):
+        self.redis_service = redis_service
+        self.handler = handler
+        self.workers = workers
+        self.timeout = timeout
+        self.ttl = ttl
+        self.local_capacity = local_capacity
+        self.prefix = prefix
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue_size)
+        self._tasks: List[asyncio.Task] = []
+        self._local: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._events: Dict[str, asyncio.Event] = {}
+
+    def _key(self, job_id: str) -> str:
+        return f"{self.prefix}:{job_id}"
+
+    def _channel(self, job_id: str) -> str:
+        return f"{self.prefix}:{job_id}:done"
+
+    @property
+    def pending(self) -> int:
+        """Number of jobs waiting for a worker."""
+        return self._queue.qsize()
+
+    def start(self) -> None:
+        """Start the worker tasks."""
+        if self._tasks:
+            return
+        self._tasks = [
+            asyncio.create_task(self._worker(), name=f"job-worker-{n}")
+            for n in range(self.workers)
+        ]
+        logger.info(f"Started {self.workers} job workers (queue size {self._queue.maxsize})")
+
+    async def stop(self) -> None:
+        """Stop the workers and mark unfinished jobs of this process as failed."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+        for job_id in list(self._events):
+            await self._finish(job_id, FAILED, error="Server shut down before the job finished")
+
+    async def submit(self, payload: Dict[str, Any], kind: str = "chat") -> Dict[str, Any]:
+        """
+        Queue a job.
+
+        Args:
+            payload: Input passed to the job handler
+            kind: Job type, stored with the state for clients
+
+        Returns:
+            Dict[str, Any]: The initial job state
+
+        Raises:
+            JobQueueFullError: If the queue is at capacity
+        """
+        if self._queue.full():
+            raise JobQueueFullError("Job queue is full, please retry later")
+
+        job_id = uuid.uuid4().hex
+        state = {"id": job_id, "kind": kind, "status": QUEUED, "created_at": time.time()}
+        self._events[job_id] = asyncio.Event()
+        await self._save(job_id, state)
+        try:
+            self._queue.put_nowait((job_id, payload))
+        except asyncio.QueueFull:
+            # Concurrent submits filled the queue while the state was saved.
+            await self._discard(job_id)
+            raise JobQueueFullError("Job queue is full, please retry later")
+        return dict(state)
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Return the current state of a job.
+
+        Returns:
+            Optional[Dict[str, Any]]: The job state, or None for unknown or expired jobs
+        """
+        state = self._local.get(job_id)
+        if state is not None:
+            return dict(state)
+
+        redis_client = self.redis_service.redis
+        if self.redis_service.connection_error or not redis_client:
+            return None
+        try:
+            fields = await redis_client.hgetall(self._key(job_id))
+        except Exception as e:
+            logger.warning(f"Failed to read job {job_id}: {e}")
+            return None
+        return {name: serializer.loads(value) for name, value in fields.items()} or None
+
+    async def wait(self, job_id: str, timeout: float) -> Optional[Dict[str, Any]]:
+        """
+        Return the job state once the job finishes or ``timeout`` seconds pass.
+
+        Args:
+            job_id: The job identifier
+            timeout: Maximum time to wait in seconds
+
+        Returns:
+            Optional[Dict[str, Any]]: The job state, or None for unknown jobs
+        """
+        state = await self.get(job_id)
+        if state is None or state["status"] in TERMINAL_STATUSES or timeout <= 0:
+            return state
+
+        event = self._events.get(job_id)
+        if event is not None:
+            try:
+                await asyncio.wait_for(event.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+            return await self.get(job_id)
+
+        await self._wait_for_message(job_id, timeout)
+        return await self.get(job_id)
+
+    async def _wait_for_message(self, job_id: str, timeout: float) -> None:
+        """Wait on the completion channel of a job owned by another process."""
+        redis_client = self.redis_service.redis
+        if self.redis_service.connection_error or not redis_client:
+            return
+
+        deadline = time.monotonic() + timeout
+        pubsub = redis_client.pubsub()
+        try:
+            await pubsub.subscribe(self._channel(job_id))
+            # The job may have finished before the subscription was active.
+            state = await self.get(job_id)
+            if state is None or state["status"] in TERMINAL_STATUSES:
+                return
+            while (remaining := deadline - time.monotonic()) > 0:
+                message = await pubsub.get_message(
+                    ignore_subscribe_messages=True, timeout=remaining
+                )
+                if message is not None:
+                    return
+        except Exception as e:
+            logger.warning(f"Failed to wait for job {job_id}: {e}")
+        finally:
+            await pubsub.aclose()
+
+    async def _worker(self) -> None:
+        while True:
+            job_id, payload = await self._queue.get()
+            try:
+                await self._save(job_id, {"status": RUNNING, "started_at": time.time()})
+                outcome = await asyncio.wait_for(self.handler(payload), self.timeout)
+                await self._finish(job_id, SUCCEEDED, **outcome)
+            except asyncio.CancelledError:
+                raise
+            except asyncio.TimeoutError:
+                await self._finish(job_id, FAILED, error=f"Job timed out after {self.timeout}s")
+            except Exception as e:
+                logger.error(f"Job {job_id} failed: {e}")
+                await self._finish(job_id, FAILED, error=str(e))
+            finally:
+                self._queue.task_done()
+
+    async def _finish(self, job_id: str, status: str, **fields: Any) -> None:
+        await self._save(job_id, {"status": status, "finished_at": time.time(), **fields})
+        event = self._events.pop(job_id, None)
+        if event is not None:
+            event.set()
+
+        redis_client = self.redis_service.redis
+        if self.redis_service.connection_error or not redis_client:
+            return
+        try:
+            await redis_client.publish(self._channel(job_id), status)
+        except Exception as e:
+            logger.warning(f"Failed to announce job {job_id}: {e}")
+
+    async def _discard(self, job_id: str) -> None:
+        """Forget a job that was never queued."""
+        self._events.pop(job_id, None)
+        self._local.pop(job_id, None)
+
+        redis_client = self.redis_service.redis
+        if self.redis_service.connection_error or not redis_client:
+            return
+        try:
+            await redis_client.delete(self._key(job_id))
+        except Exception as e:
+            logger.warning(f"Failed to discard job {job_id}: {e}")
+
+    async def _save(self, job_id: str, fields: Dict[str, Any]) -> None:
+        """Merge fields into the job state, locally and in Redis."""
+        state = self._local.setdefault(job_id, {})
+        state.update(fields)
+        self._local.move_to_end(job_id)
+        while len(self._local) > self.local_capacity:
+            self._local.popitem(last=False)
+
+        redis_client = self.redis_service.redis
+        if self.redis_service.connection_error or not redis_client:
+            return
+        key = self._key(job_id)
+        try:
+            async with redis_client.pipeline(transaction=False) as pipe:
+                pipe.hset(key, mapping={name: serializer.dumps_str(value) for name, value in fields.items()})
+                pipe.expire(key, self.ttl)
+                await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Failed to store job {job_id}: {e}")
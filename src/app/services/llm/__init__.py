@@ -1,4 +1,12 @@
 from .openai_provider import OpenAIProvider
 from .llm_service_manager import LLMServiceManager
+from .model_router import ModelProfile, ModelRouter, RoutingDecision, get_model_router
 
-__all__ = ["OpenAIProvider", "LLMServiceManager"]
+__all__ = [
+    "OpenAIProvider",
+    "LLMServiceManager",
+    "ModelProfile",
+    "ModelRouter",
+    "RoutingDecision",
+    "get_model_router",
+]
@@ -1,19 +1,32 @@
-from typing import Dict, Any, AsyncGenerator
+from typing import Dict, Any, AsyncGenerator, Optional
 import logging
 
 from app.core.interfaces import LLMProvider
 from app.services.llm.openai_provider import OpenAIProvider
+from app.services.llm.scheduler import FairScheduler, get_scheduler
 from app.exceptions import ConfigurationError
 
 logger = logging.getLogger(__name__)
 
 
 class LLMServiceManager:
-    """Manager class for LLM provider interactions."""
+    """
+    Manager class for LLM provider interactions.
 
-    def __init__(self, config: Dict[str, Any]):
+    Every provider call waits for a slot of the shared ``FairScheduler``.
+    Callers pass ``priority_class``, ``tenant`` and ``cost`` along with the
+    provider kwargs to place the call in its flow.
+    """
+
+    def __init__(self, config: Dict[str, Any], scheduler: Optional[FairScheduler] = None):
         self.config = config
         self.provider = self._create_provider()
+        self.scheduler = scheduler or get_scheduler()
+
+    @property
+    def last_usage(self) -> Optional[Dict[str, int]]:
+        """Token usage reported for the provider's most recent call."""
+        return getattr(self.provider, "last_usage", None)
 
     def _create_provider(self) -> LLMProvider:
         """Create the appropriate LLM provider based on configuration."""
@@ -33,14 +46,15 @@ class LLMServiceManager:
         Args:
             system_prompt: The system prompt to set the context
             user_message: The user's message
-            **kwargs: Additional parameters for the provider
+            **kwargs: Additional parameters for the provider and scheduler
 
         Returns:
             str: The generated response
         """
-        return await self.provider.generate_response(
-            system_prompt=system_prompt, user_message=user_message, **kwargs
-        )
+        async with self._slot(kwargs):
+            return await self.provider.generate_response(
+                system_prompt=system_prompt, user_message=user_message, **kwargs
+            )
 
     async def generate_streaming_response(
         self, system_prompt: str, user_message: str, **kwargs
@@ -51,12 +65,22 @@ class LLMServiceManager:
         Args:
             system_prompt: The system prompt to set the context
             user_message: The user's message
-            **kwargs: Additional parameters for the provider
+            **kwargs: Additional parameters for the provider and scheduler
 
         Yields:
             str: Chunks of the generated response
         """
-        async for chunk in self.provider.generate_streaming_response(
-            system_prompt=system_prompt, user_message=user_message, **kwargs
-        ):
-            yield chunk
+        # The slot is held until the stream is exhausted or closed.
+        async with self._slot(kwargs):
+            async for chunk in self.provider.generate_streaming_response(
+                system_prompt=system_prompt, user_message=user_message, **kwargs
+            ):
+                yield chunk
+
+    def _slot(self, kwargs: Dict[str, Any]):
+        """Pop the scheduling kwargs and return the scheduler slot for the call."""
+        return self.scheduler.slot(
+            kwargs.pop("priority_class", None) or self.scheduler.default_class,
+            kwargs.pop("tenant", None),
+            kwargs.pop("cost", 1.0),
+        )
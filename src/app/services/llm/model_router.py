@@ -0,0 +1,135 @@
+import logging
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config_snapshot import ModelProfile
+
+logger = logging.getLogger(__name__)
+
+SENTENCE_END = re.compile(r"[.!?]+(?:\s|$)")
+CLAUSE_MARKERS = re.compile(
+    r"[,;:]|\b(?:because|although|though|but|however|whereas|while|unless|if|when|since)\b",
+    re.IGNORECASE,
+)
+
+
+@dataclass(frozen=True)
+class RoutingDecision:
+    """The model settings chosen for one call and why."""
+
+    model: str
+    max_tokens: int
+    stop: Tuple[str, ...]
+    complexity: float
+    reason: str
+
+    def as_kwargs(self) -> Dict[str, Any]:
+        """Return the provider kwargs of the decision."""
+        return {
+            "model": self.model,
+            "max_tokens": self.max_tokens,
+            "stop": list(self.stop) or None,
+        }
+
+
+class ModelRouter:
+    """
+    Send simple queries to a faster, cheaper model.
+
+    Every call starts from its service's ``ModelProfile``. When routing is
+    enabled and the service allows it, queries whose complexity score is
+    below ``complexity_threshold`` use ``fast_model`` instead. The score is
+    a cheap heuristic in [0, 1] combining query length, number of clauses
+    and sentences, and whether the query continues a conversation. Every
+    decision is logged, and the chosen model is reported with the call's
+    token usage so latency and cost can be compared per model.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = False,
+        fast_model: Optional[str] = None,
+        complexity_threshold: float = 0.3,
+    ):
+        self.enabled = enabled and bool(fast_model)
+        self.fast_model = fast_model
+        self.complexity_threshold = complexity_threshold
+
+    @classmethod
+    def from_settings(cls, settings) -> "ModelRouter":
+        """Create a model router from application settings."""
+        return cls(
+            enabled=settings.MODEL_ROUTING_ENABLED,
+            fast_model=settings.MODEL_ROUTING_FAST_MODEL,
+            complexity_threshold=settings.MODEL_ROUTING_COMPLEXITY_THRESHOLD,
+        )
+
+    @staticmethod
+    def complexity(query: str, history: Optional[List[Dict[str, str]]] = None) -> float:
+        """
+        Estimate how demanding a query is.
+
+        Returns:
+            float: A score between 0 (trivial) and 1 (complex)
+        """
+        tokens = len(query) // 4
+        clauses = len(CLAUSE_MARKERS.findall(query))
+        sentences = len(SENTENCE_END.findall(query)) or 1
+        score = (
+            0.5 * min(tokens / 200, 1.0)
+            + 0.3 * min(clauses / 6, 1.0)
+            + 0.2 * min((sentences - 1) / 4, 1.0)
+        )
+        if history:
+            score += 0.2
+        return round(min(score, 1.0), 3)
+
+    def route(
+        self,
+        service_type: str,
+        profile: ModelProfile,
+        query: str,
+        history: Optional[List[Dict[str, str]]] = None,
+    ) -> RoutingDecision:
+        """
+        Choose the model settings of a call.
+
+        Args:
+            service_type: The calling service, for the decision log
+            profile: The service's model profile
+            query: The user's query
+            history: Earlier turns of the conversation, if any
+
+        Returns:
+            RoutingDecision: The model, budget and stop sequences to use
+        """
+        if not self.enabled:
+            return RoutingDecision(profile.model, profile.max_tokens, profile.stop, 0.0, "disabled")
+
+        complexity = self.complexity(query, history)
+        if not profile.routable:
+            reason, model = "not routable", profile.model
+        elif complexity < self.complexity_threshold:
+            reason, model = "simple", self.fast_model
+        else:
+            reason, model = "complex", profile.model
+
+        logger.info(
+            f"Model routing: service={service_type} model={model} "
+            f"complexity={complexity:.3f} reason={reason}"
+        )
+        return RoutingDecision(model, profile.max_tokens, profile.stop, complexity, reason)
+
+
+_model_router: Optional[ModelRouter] = None
+
+
+def get_model_router() -> ModelRouter:
+    """Return the process-wide model router."""
+    global _model_router
+    from app.config import settings
+
+    if _model_router is None:
+        _model_router = ModelRouter.from_settings(settings)
+    return _model_router
@@ -1,10 +1,9 @@
-import openai
-from typing import Dict, Any, Optional, AsyncGenerator
+from typing import Dict, Any, List, Optional, AsyncGenerator
 import logging
 import time
-from tenacity import retry, stop_after_attempt, wait_exponential
 
 from app.core.interfaces import LLMProvider
+from app.services.clients import get_openai_client
 from app.exceptions import (
     LLMServiceError,
     ConfigurationError,
@@ -22,8 +21,8 @@ class OpenAIProvider(LLMProvider):
     def __init__(self, config: Dict[str, Any]):
         self._validate_config(config)
         self.config = config
-        self.client = openai.AsyncOpenAI(
-            api_key=config.get("api_key", ""), timeout=config.get("timeout", 60)
+        self.client = get_openai_client(
+            config.get("api_key", ""), config.get("timeout", 60)
         )
 
         self.model = config.get("model", "gpt-4")
@@ -32,6 +31,7 @@ class OpenAIProvider(LLMProvider):
         self.top_p = config.get("top_p", 1.0)
         self.frequency_penalty = config.get("frequency_penalty", 0.0)
         self.presence_penalty = config.get("presence_penalty", 0.0)
+        self.last_usage: Optional[Dict[str, int]] = None
 
     def _validate_config(self, config: Dict[str, Any]) -> None:
         """Validate the configuration."""
@@ -51,6 +51,8 @@ class OpenAIProvider(LLMProvider):
         Raises:
             ConfigurationError: If connection fails
         """
+        import openai
+
         try:
             response = await self.client.chat.completions.create(
                 model=self.model,
@@ -83,19 +85,17 @@ class OpenAIProvider(LLMProvider):
             logger.error(f"Error getting model info: {e}")
             raise LLMServiceError(f"Failed to get model info: {str(e)}")
 
-    @retry(
-        stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10)
-    )
     async def generate_response(
         self, system_prompt: str, user_message: str, **kwargs
     ) -> str:
         """
-        Generate a response using OpenAI's API.
+        Generate a response using OpenAI's API, retrying failed calls.
 
         Args:
             system_prompt: The system prompt to set the context
             user_message: The user's message
-            **kwargs: Additional parameters (temperature, max_tokens, etc.)
+            **kwargs: Additional parameters (model, temperature, max_tokens,
+                stop, messages, prompt_cache_key, etc.)
 
         Returns:
             str: The generated response
@@ -103,23 +103,39 @@ class OpenAIProvider(LLMProvider):
         Raises:
             LLMServiceError: If the API call fails
         """
+        from tenacity import AsyncRetrying, stop_after_attempt, wait_exponential
+
+        async for attempt in AsyncRetrying(
+            stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10)
+        ):
+            with attempt:
+                return await self._generate_response(system_prompt, user_message, **kwargs)
+
+    async def _generate_response(
+        self, system_prompt: str, user_message: str, **kwargs
+    ) -> str:
+        """Make one completion call."""
+        import openai
+
         try:
             temperature = kwargs.get("temperature", self.default_temperature)
-            max_tokens = kwargs.get("max_tokens", self.default_max_tokens)
+            max_tokens = kwargs.get("max_tokens") or self.default_max_tokens
+            model = kwargs.get("model") or self.model
 
             response = await self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_message},
-                ],
+                model=model,
+                messages=self._build_messages(system_prompt, user_message, kwargs),
                 temperature=temperature,
                 max_tokens=max_tokens,
                 top_p=self.top_p,
                 frequency_penalty=self.frequency_penalty,
                 presence_penalty=self.presence_penalty,
+                **self._stop_options(kwargs),
+                **self._cache_options(kwargs),
             )
 
+            self.last_usage = self._usage_to_dict(response.usage, model)
+
             content = response.choices[0].message.content
             if not content:
                 raise LLMServiceError("Empty response from OpenAI")
@@ -156,26 +172,31 @@ class OpenAIProvider(LLMProvider):
         Yields:
             str: Chunks of the generated response
         """
+        import openai
+
         try:
             temperature = kwargs.get("temperature", self.default_temperature)
-            max_tokens = kwargs.get("max_tokens", self.default_max_tokens)
+            max_tokens = kwargs.get("max_tokens") or self.default_max_tokens
+            model = kwargs.get("model") or self.model
 
             stream = await self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_message},
-                ],
+                model=model,
+                messages=self._build_messages(system_prompt, user_message, kwargs),
                 temperature=temperature,
                 max_tokens=max_tokens,
                 top_p=self.top_p,
                 frequency_penalty=self.frequency_penalty,
                 presence_penalty=self.presence_penalty,
                 stream=True,
+                stream_options={"include_usage": True},
+                **self._stop_options(kwargs),
+                **self._cache_options(kwargs),
             )
 
             async for chunk in stream:
-                if chunk.choices[0].delta.content is not None:
+                if chunk.usage is not None:
+                    self.last_usage = self._usage_to_dict(chunk.usage, model)
+                if chunk.choices and chunk.choices[0].delta.content is not None:
                     yield chunk.choices[0].delta.content
 
         except openai.RateLimitError as e:
@@ -194,6 +215,53 @@ class OpenAIProvider(LLMProvider):
             logger.error(f"Unexpected error in streaming: {e}")
             raise LLMServiceError(f"Failed to generate streaming response: {str(e)}")
 
+    @staticmethod
+    def _build_messages(
+        system_prompt: str, user_message: str, kwargs: Dict[str, Any]
+    ) -> List[Dict[str, Any]]:
+        """Use prebuilt messages when given, otherwise a system + user pair."""
+        messages = kwargs.get("messages")
+        if messages:
+            return messages
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_message},
+        ]
+
+    @staticmethod
+    def _cache_options(kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Request options routing calls that share a prompt prefix to the same
+        upstream cache. Sent through ``extra_body`` so older SDKs accept it.
+        """
+        cache_key = kwargs.get("prompt_cache_key")
+        return {"extra_body": {"prompt_cache_key": cache_key}} if cache_key else {}
+
+    @staticmethod
+    def _stop_options(kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        """Stop sequences of the call, omitted when there are none."""
+        stop = kwargs.get("stop")
+        return {"stop": stop} if stop else {}
+
+    @staticmethod
+    def _usage_to_dict(usage, model: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Convert the usage block of a completion into a plain dict."""
+        if usage is None:
+            return None
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached_tokens = getattr(details, "cached_tokens", None) or 0
+        if usage.prompt_tokens:
+            logger.debug(
+                f"Prompt cache: {cached_tokens}/{usage.prompt_tokens} prompt tokens cached"
+            )
+        return {
+            "prompt_tokens": usage.prompt_tokens,
+            "completion_tokens": usage.completion_tokens,
+            "total_tokens": usage.total_tokens,
+            "cached_tokens": cached_tokens,
+            "model": model,
+        }
+
     async def count_tokens(self, text: str) -> int:
         """
         Count tokens in text (approximate).
@@ -0,0 +1,190 @@
+import asyncio
+import hashlib
+import heapq
+import itertools
+import logging
+import time
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from app.exceptions import ConfigurationError, TimeoutError
+
+logger = logging.getLogger(__name__)
+
+Flow = Tuple[str, str]
+
+
+def tenant_label(tenant: Optional[str]) -> str:
+    """Return a short, non-reversible label for a tenant key, safe for logs."""
+    if not tenant:
+        return "anonymous"
+    return hashlib.sha256(tenant.encode("utf-8")).hexdigest()[:12]
+
+
+class FairScheduler:
+    """
+    Weighted fair queuing of LLM calls over a shared concurrency budget.
+
+    Every call belongs to a flow, the pair of its priority class and tenant.
+    While all ``max_concurrency`` slots are busy, waiting calls are ordered by
+    a virtual finish tag ``max(V, last tag of the flow) + cost / weight``
+    (self-clocked fair queuing), so each flow receives upstream capacity in
+    proportion to its class weight: interactive calls overtake a backlog of
+    bulk calls, and one tenant cannot starve the others of its class. When
+    slots are free, calls run immediately whatever their class.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 8,
+        class_weights: Optional[Dict[str, float]] = None,
+        default_class: str = "standard",
+        tenant_classes: Optional[Dict[str, str]] = None,
+        queue_timeout: Optional[float] = None,
+    ):
+        self.max_concurrency = max_concurrency
+        self.class_weights = class_weights or {"interactive": 4.0, "standard": 2.0, "bulk": 1.0}
+        if default_class not in self.class_weights:
+            raise ConfigurationError(f"Unknown default priority class: {default_class}")
+        if any(weight <= 0 for weight in self.class_weights.values()):
+            raise ConfigurationError("Priority class weights must be positive")
+        self.default_class = default_class
+        self.tenant_classes = tenant_classes or {}
+        self.queue_timeout = queue_timeout
+
+        self.in_flight = 0
+        self._virtual_time = 0.0
+        self._last_tags: Dict[Flow, float] = {}
+        self._waiters: List[Tuple[float, int, Flow, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        self._wait_totals: Dict[str, float] = defaultdict(float)
+        self._call_counts: Dict[str, int] = defaultdict(int)
+
+    def classify(
+        self,
+        service_priority: Optional[str] = None,
+        tenant: Optional[str] = None,
+        requested: Optional[str] = None,
+    ) -> str:
+        """
+        Resolve the priority class of a call.
+
+        An explicitly requested class wins, then the tenant's configured class,
+        then the service's class, then the default.
+        """
+        for priority_class in (requested, self.tenant_classes.get(tenant or ""), service_priority):
+            if priority_class in self.class_weights:
+                return priority_class
+        return self.default_class
+
+    @asynccontextmanager
+    async def slot(
+        self, priority_class: str, tenant: Optional[str] = None, cost: float = 1.0
+    ) -> AsyncIterator[None]:
+        """
+        Hold one upstream concurrency slot for the duration of the block.
+
+        Args:
+            priority_class: Priority class from ``classify``
+            tenant: Tenant key, calls without one share the anonymous flow
+            cost: Relative cost of the call; expensive calls advance their
+                flow's tag further
+
+        Raises:
+            TimeoutError: If no slot frees up within ``queue_timeout``
+        """
+        await self._acquire(priority_class, tenant or "", cost)
+        try:
+            yield
+        finally:
+            self._release()
+
+    async def _acquire(self, priority_class: str, tenant: str, cost: float) -> None:
+        flow = (priority_class, tenant)
+        weight = self.class_weights.get(priority_class, self.class_weights[self.default_class])
+        start = max(self._virtual_time, self._last_tags.get(flow, 0.0))
+        tag = start + cost / weight
+        self._last_tags[flow] = tag
+        self._call_counts[priority_class] += 1
+
+        while self._waiters and self._waiters[0][3].cancelled():
+            heapq.heappop(self._waiters)
+        if self.in_flight < self.max_concurrency and not self._waiters:
+            self.in_flight += 1
+            self._virtual_time = max(self._virtual_time, start)
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (tag, next(self._sequence), flow, future))
+        queued_at = time.monotonic()
+        try:
+            await asyncio.wait_for(asyncio.shield(future), self.queue_timeout)
+        except (asyncio.CancelledError, asyncio.TimeoutError) as e:
+            if future.done() and not future.cancelled():
+                # The slot was granted while we were being cancelled; hand it on.
+                self._release()
+            else:
+                future.cancel()
+            if isinstance(e, asyncio.TimeoutError):
+                logger.warning(
+                    f"LLM call of class {priority_class} for tenant {tenant_label(tenant)} "
+                    f"waited more than {self.queue_timeout}s for a slot"
+                )
+                raise TimeoutError("Timed out waiting for LLM capacity")
+            raise
+        finally:
+            self._wait_totals[priority_class] += time.monotonic() - queued_at
+
+    def _release(self) -> None:
+        self.in_flight -= 1
+        while self._waiters:
+            tag, _, _, future = heapq.heappop(self._waiters)
+            if future.cancelled():
+                continue
+            self.in_flight += 1
+            self._virtual_time = tag
+            future.set_result(None)
+            break
+
+        if len(self._last_tags) > 1024:
+            # Flows whose tag is behind virtual time are equivalent to new flows.
+            self._last_tags = {
+                flow: tag for flow, tag in self._last_tags.items() if tag > self._virtual_time
+            }
+
+    def stats(self) -> Dict[str, object]:
+        """Return slot usage, queue lengths and average queueing delay per class."""
+        queued: Dict[str, int] = defaultdict(int)
+        for _, _, (priority_class, _), future in self._waiters:
+            if not future.cancelled():
+                queued[priority_class] += 1
+        return {
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "queued": dict(queued),
+            "avg_wait_seconds": {
+                priority_class: round(self._wait_totals[priority_class] / count, 4)
+                for priority_class, count in self._call_counts.items()
+                if count
+            },
+        }
+
+
+_scheduler: Optional[FairScheduler] = None
+
+
+def get_scheduler() -> FairScheduler:
+    """Return the process-wide LLM scheduler."""
+    global _scheduler
+    from app.config import settings
+
+    if _scheduler is None:
+        _scheduler = FairScheduler(
+            max_concurrency=settings.SCHEDULER_MAX_CONCURRENCY,
+            class_weights=settings.SCHEDULER_CLASS_WEIGHTS,
+            default_class=settings.SCHEDULER_DEFAULT_CLASS,
+            tenant_classes=settings.SCHEDULER_TENANT_CLASSES,
+            queue_timeout=settings.SCHEDULER_QUEUE_TIMEOUT,
+        )
+    return _scheduler
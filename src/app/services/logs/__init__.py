@@ -0,0 +1,12 @@
+from .record_codec import LogRecordCodec
+from .retention_policy import LogRetentionPolicy, LogDecision
+from .rollups import LogRollups
+from .search_index import LogSearchIndex
+
+__all__ = [
+    "LogRecordCodec",
+    "LogRetentionPolicy",
+    "LogDecision",
+    "LogRollups",
+    "LogSearchIndex",
+]
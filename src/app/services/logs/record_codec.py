@@ -0,0 +1,248 @@
+import logging
+import struct
+import zlib
+from typing import Any, Dict, Iterable, Optional, Tuple, Union
+
+from app.core.serialization import default_hook, serializer
+from app.exceptions import ConfigurationError
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"LR"
+HEADER = struct.Struct("!2sBB")
+
+ENCODING_JSON = 0
+ENCODING_MSGPACK = 1
+
+COMPRESSION_NONE = 0
+COMPRESSION_ZLIB = 1
+COMPRESSION_ZSTD = 2
+
+REDACTED = "[redacted]"
+
+# Each schema version lists the sections of a record and the ordered fields
+# stored for each of them. Records are written as positional arrays so field
+# names are not repeated in every entry.
+SCHEMAS: Dict[int, Tuple[Tuple[str, Tuple[str, ...]], ...]] = {
+    1: (
+        (
+            "request",
+            (
+                "request_id",
+                "method",
+                "path",
+                "query_params",
+                "headers",
+                "client_ip",
+                "body",
+                "timestamp",
+            ),
+        ),
+        (
+            "response",
+            (
+                "status_code",
+                "headers",
+                "body",
+                "process_time",
+                "timestamp",
+            ),
+        ),
+    ),
+}
+CURRENT_VERSION = max(SCHEMAS)
+
+
+class LogRecordCodec:
+    """
+    Versioned compact encoding for request/response log records.
+
+    A record is a dict with ``request`` and ``response`` sections. It is
+    redacted and truncated, packed as a schema-ordered array (msgpack when
+    available, compact JSON otherwise) and compressed once it exceeds
+    ``compression_threshold`` bytes. A four byte header holds the magic,
+    schema version and format flags so older records stay readable.
+    """
+
+    def __init__(
+        self,
+        encoding: str = "auto",
+        compression: str = "auto",
+        compression_threshold: int = 1024,
+        compression_level: int = 3,
+        redact_headers: Iterable[str] = (),
+        redact_fields: Iterable[str] = (),
+        max_field_length: int = 2000,
+    ):
+        self.encoding = self._resolve_encoding(encoding)
+        self.compression = self._resolve_compression(compression)
+        self.compression_threshold = compression_threshold
+        self.compression_level = compression_level
+        self.redact_headers = {h.lower() for h in redact_headers}
+        self.redact_fields = {f.lower() for f in redact_fields}
+        self.max_field_length = max_field_length
+
+        self._zstd_compressor = None
+        self._zstd_decompressor = None
+        if zstandard is not None:
+            self._zstd_compressor = zstandard.ZstdCompressor(level=compression_level)
+            self._zstd_decompressor = zstandard.ZstdDecompressor()
+
+    @classmethod
+    def from_settings(cls, settings) -> "LogRecordCodec":
+        """Create a codec from application settings."""
+        return cls(
+            encoding=settings.LOG_RECORD_ENCODING,
+            compression=settings.LOG_COMPRESSION,
+            compression_threshold=settings.LOG_COMPRESSION_THRESHOLD,
+            redact_headers=settings.LOG_REDACT_HEADERS,
+            redact_fields=settings.LOG_REDACT_FIELDS,
+            max_field_length=settings.LOG_MAX_FIELD_LENGTH,
+        )
+
+    def encode(self, record: Dict[str, Any]) -> bytes:
+        """
+        Encode a log record.
+
+        Args:
+            record: Dict with optional ``request`` and ``response`` sections
+
+        Returns:
+            bytes: The encoded record
+        """
+        packed = []
+        for section, fields in SCHEMAS[CURRENT_VERSION]:
+            values = record.get(section)
+            if values is None:
+                packed.append(None)
+                continue
+            packed.append([self._sanitize(field, values.get(field)) for field in fields])
+
+        if self.encoding == ENCODING_MSGPACK:
+            payload = msgpack.packb(packed, default=default_hook, use_bin_type=True)
+        else:
+            payload = serializer.dumps(packed)
+
+        compression = COMPRESSION_NONE
+        if self.compression != COMPRESSION_NONE and len(payload) >= self.compression_threshold:
+            payload = self._compress(payload)
+            compression = self.compression
+
+        flags = self.encoding | (compression << 2)
+        return HEADER.pack(MAGIC, CURRENT_VERSION, flags) + payload
+
+    def decode(self, data: Union[bytes, str]) -> Optional[Dict[str, Any]]:
+        """
+        Decode a record written by ``encode``.
+
+        Plain JSON values written before the compact format existed are
+        returned as-is.
+
+        Args:
+            data: Raw value read from Redis
+
+        Returns:
+            Optional[Dict[str, Any]]: The decoded record
+        """
+        if not data:
+            return None
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        if not data.startswith(MAGIC):
+            return serializer.loads(data)
+
+        _, version, flags = HEADER.unpack_from(data)
+        schema = SCHEMAS.get(version)
+        if schema is None:
+            raise ValueError(f"Unsupported log record version: {version}")
+
+        payload = data[HEADER.size:]
+        compression = (flags >> 2) & 0b11
+        if compression != COMPRESSION_NONE:
+            payload = self._decompress(payload, compression)
+
+        if flags & 0b11 == ENCODING_MSGPACK:
+            if msgpack is None:
+                raise ConfigurationError("msgpack is required to read this log record")
+            packed = msgpack.unpackb(payload, raw=False)
+        else:
+            packed = serializer.loads(payload)
+
+        record = {}
+        for (section, fields), values in zip(schema, packed):
+            record[section] = dict(zip(fields, values)) if values is not None else None
+        return record
+
+    def _sanitize(self, field: str, value: Any) -> Any:
+        """Redact sensitive values and truncate long strings."""
+        if field == "headers" and isinstance(value, dict):
+            return {
+                name: REDACTED if name.lower() in self.redact_headers else self._truncate(v)
+                for name, v in value.items()
+            }
+        return self._truncate(value)
+
+    def _truncate(self, value: Any) -> Any:
+        if isinstance(value, str):
+            if len(value) > self.max_field_length:
+                dropped = len(value) - self.max_field_length
+                return f"{value[:self.max_field_length]}...[truncated {dropped} chars]"
+            return value
+        if isinstance(value, dict):
+            return {
+                k: REDACTED if str(k).lower() in self.redact_fields else self._truncate(v)
+                for k, v in value.items()
+            }
+        if isinstance(value, (list, tuple)):
+            return [self._truncate(v) for v in value]
+        if hasattr(value, "model_dump"):
+            return self._truncate(value.model_dump())
+        return value
+
+    def _compress(self, payload: bytes) -> bytes:
+        if self.compression == COMPRESSION_ZSTD:
+            return self._zstd_compressor.compress(payload)
+        return zlib.compress(payload, self.compression_level)
+
+    def _decompress(self, payload: bytes, compression: int) -> bytes:
+        if compression == COMPRESSION_ZSTD:
+            if self._zstd_decompressor is None:
+                raise ConfigurationError("zstandard is required to read this log record")
+            return self._zstd_decompressor.decompress(payload)
+        return zlib.decompress(payload)
+
+    @staticmethod
+    def _resolve_encoding(encoding: str) -> int:
+        if encoding == "json":
+            return ENCODING_JSON
+        if encoding in ("auto", "msgpack"):
+            if msgpack is not None:
+                return ENCODING_MSGPACK
+            if encoding == "msgpack":
+                logger.warning("msgpack requested but not installed, falling back to JSON")
+            return ENCODING_JSON
+        raise ConfigurationError(f"Unsupported log record encoding: {encoding}")
+
+    @staticmethod
+    def _resolve_compression(compression: str) -> int:
+        if compression == "none":
+            return COMPRESSION_NONE
+        if compression == "zlib":
+            return COMPRESSION_ZLIB
+        if compression in ("auto", "zstd"):
+            if zstandard is not None:
+                return COMPRESSION_ZSTD
+            if compression == "zstd":
+                logger.warning("zstandard requested but not installed, falling back to zlib")
+            return COMPRESSION_ZLIB
+        raise ConfigurationError(f"Unsupported log compression: {compression}")
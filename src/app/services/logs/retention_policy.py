@@ -0,0 +1,119 @@
+import random
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, Optional
+
+
+@dataclass(frozen=True)
+class LogDecision:
+    """What to keep for a single request and for how long."""
+
+    store_summary: bool
+    store_body: bool
+    reason: str
+    summary_ttl: int
+    body_ttl: int
+
+
+class LogRetentionPolicy:
+    """
+    Decide which requests are logged and at which level of detail.
+
+    Every request is either dropped, kept as a summary (method, path, status,
+    timing) or kept with its full headers and bodies. Errors and slow requests
+    are always kept in full; everything else is sampled by path and status
+    class. Summaries and bodies are stored with separate TTLs.
+    """
+
+    def __init__(
+        self,
+        default_sample_rate: float = 1.0,
+        path_sample_rates: Optional[Dict[str, float]] = None,
+        status_sample_rates: Optional[Dict[str, float]] = None,
+        body_sample_rate: float = 1.0,
+        excluded_paths: Iterable[str] = (),
+        slow_request_threshold: float = 5.0,
+        always_keep_status: int = 400,
+        summary_ttl: int = 604800,
+        body_ttl: int = 86400,
+        rng: Callable[[], float] = random.random,
+    ):
+        self.default_sample_rate = default_sample_rate
+        # Longest prefixes first so the most specific rule wins.
+        self.path_sample_rates = sorted(
+            (path_sample_rates or {}).items(), key=lambda item: len(item[0]), reverse=True
+        )
+        self.status_sample_rates = status_sample_rates or {}
+        self.body_sample_rate = body_sample_rate
+        self.excluded_paths = tuple(excluded_paths)
+        self.slow_request_threshold = slow_request_threshold
+        self.always_keep_status = always_keep_status
+        self.summary_ttl = summary_ttl
+        self.body_ttl = body_ttl
+        self._rng = rng
+
+    @classmethod
+    def from_settings(cls, settings) -> "LogRetentionPolicy":
+        """Create a policy from application settings."""
+        return cls(
+            default_sample_rate=settings.LOG_SAMPLE_RATE,
+            path_sample_rates=settings.LOG_PATH_SAMPLE_RATES,
+            status_sample_rates=settings.LOG_STATUS_SAMPLE_RATES,
+            body_sample_rate=settings.LOG_BODY_SAMPLE_RATE,
+            excluded_paths=settings.LOG_EXCLUDED_PATHS,
+            slow_request_threshold=settings.LOG_SLOW_REQUEST_THRESHOLD,
+            always_keep_status=settings.LOG_ALWAYS_KEEP_STATUS,
+            summary_ttl=settings.REDIS_LOG_TTL,
+            body_ttl=settings.LOG_BODY_TTL,
+        )
+
+    def is_excluded(self, path: str) -> bool:
+        """Return True for paths that are never logged, such as health probes."""
+        for excluded in self.excluded_paths:
+            if path == excluded or path.startswith(excluded.rstrip("/") + "/"):
+                return True
+        return False
+
+    def decide(self, path: str, status_code: int, process_time: float) -> LogDecision:
+        """
+        Decide what to store for a finished request.
+
+        Args:
+            path: Request path
+            status_code: Response status code
+            process_time: Request duration in seconds
+
+        Returns:
+            LogDecision: The storage decision
+        """
+        if self.is_excluded(path):
+            return self._decision(False, False, "excluded")
+
+        if status_code >= self.always_keep_status:
+            return self._decision(True, True, "error")
+
+        if process_time >= self.slow_request_threshold:
+            return self._decision(True, True, "slow")
+
+        rate = self._path_rate(path) * self.status_sample_rates.get(
+            f"{status_code // 100}xx", 1.0
+        )
+        if rate < 1.0 and self._rng() >= rate:
+            return self._decision(False, False, "unsampled")
+
+        store_body = self.body_sample_rate >= 1.0 or self._rng() < self.body_sample_rate
+        return self._decision(True, store_body, "sampled")
+
+    def _path_rate(self, path: str) -> float:
+        for prefix, rate in self.path_sample_rates:
+            if path.startswith(prefix):
+                return rate
+        return self.default_sample_rate
+
+    def _decision(self, store_summary: bool, store_body: bool, reason: str) -> LogDecision:
+        return LogDecision(
+            store_summary=store_summary,
+            store_body=store_body,
+            reason=reason,
+            summary_ttl=self.summary_ttl,
+            body_ttl=self.body_ttl,
+        )
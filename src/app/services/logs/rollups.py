@@ -0,0 +1,186 @@
+import logging
+import math
+import time
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+BUCKET_SECONDS = 60
+
+# Upper bounds (ms) of the latency histogram buckets. Fixed buckets make the
+# per-minute sketches mergeable with a plain HINCRBY.
+LATENCY_BUCKETS_MS: Tuple[float, ...] = (
+    5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000, math.inf,
+)
+
+TOKEN_FIELDS = ("prompt_tokens", "completion_tokens", "total_tokens", "cached_tokens")
+
+
+def bucket_label(bound: float) -> str:
+    """Return the field label of a latency bucket upper bound."""
+    return "inf" if math.isinf(bound) else str(int(bound))
+
+
+class LogRollups:
+    """
+    Per-minute pre-aggregated request statistics stored in Redis hashes.
+
+    Every request increments counters in the ``stats:<minute>`` hash for the
+    ``all`` dimension, its path and, for chat requests, its service type and
+    the model that answered.
+    Fields are named ``<dimension>|<metric>``. Queries merge one hash per
+    minute, so their cost depends on the time range, not on the number of
+    requests.
+    """
+
+    def __init__(self, redis_service, ttl: int = 604800, prefix: str = "stats"):
+        self.redis_service = redis_service
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def _key(self, bucket: int) -> str:
+        return f"{self.prefix}:{bucket}"
+
+    async def record(
+        self,
+        path: str,
+        status_code: int,
+        process_time: float,
+        service_type: Optional[str] = None,
+        token_usage: Optional[Dict[str, Any]] = None,
+        timestamp: Optional[float] = None,
+    ) -> bool:
+        """
+        Add a finished request to the current minute's rollup.
+
+        Args:
+            path: Route template of the request
+            status_code: Response status code
+            process_time: Request duration in seconds
+            service_type: Chat service used, if any
+            token_usage: Token counts and model reported by the LLM provider
+            timestamp: Completion time, defaults to now
+
+        Returns:
+            bool: True if the rollup was updated
+        """
+        redis_client = self.redis_service.redis
+        if self.redis_service.connection_error or not redis_client:
+            return False
+
+        bucket = int((timestamp or time.time()) // BUCKET_SECONDS) * BUCKET_SECONDS
+        key = self._key(bucket)
+        latency_ms = process_time * 1000
+        latency_label = next(
+            bucket_label(bound) for bound in LATENCY_BUCKETS_MS if latency_ms <= bound
+        )
+
+        dimensions = ["all", f"path:{path}"]
+        if service_type:
+            dimensions.append(f"service:{service_type}")
+        model = (token_usage or {}).get("model")
+        if model:
+            dimensions.append(f"model:{model}")
+
+        try:
+            async with redis_client.pipeline(transaction=False) as pipe:
+                for dim in dimensions:
+                    pipe.hincrby(key, f"{dim}|count", 1)
+                    pipe.hincrby(key, f"{dim}|status:{status_code}", 1)
+                    pipe.hincrby(key, f"{dim}|lat:{latency_label}", 1)
+                    pipe.hincrbyfloat(key, f"{dim}|lat_sum_ms", round(latency_ms, 3))
+                    for field in TOKEN_FIELDS:
+                        value = (token_usage or {}).get(field)
+                        if value:
+                            pipe.hincrby(key, f"{dim}|{field}", int(value))
+                pipe.expire(key, self.ttl)
+                await pipe.execute()
+            return True
+        except Exception as e:
+            logger.warning(f"Failed to update log rollups: {e}")
+            return False
+
+    async def query(
+        self,
+        start: float,
+        end: float,
+        dimensions: Optional[Iterable[str]] = None,
+        percentiles: Iterable[float] = (50, 95, 99),
+    ) -> Dict[str, Any]:
+        """
+        Aggregate the rollups of a time range.
+
+        Args:
+            start: Range start (epoch seconds)
+            end: Range end (epoch seconds)
+            dimensions: Dimensions to return (e.g. "path:/chat/message"),
+                all recorded dimensions when omitted
+            percentiles: Latency percentiles to estimate
+
+        Returns:
+            Dict[str, Any]: Statistics per dimension
+        """
+        redis_client = self.redis_service.redis
+        if self.redis_service.connection_error or not redis_client:
+            return {}
+
+        first = int(start // BUCKET_SECONDS) * BUCKET_SECONDS
+        buckets = list(range(first, int(end) + 1, BUCKET_SECONDS))
+
+        async with redis_client.pipeline(transaction=False) as pipe:
+            for bucket in buckets:
+                pipe.hgetall(self._key(bucket))
+            hashes = await pipe.execute()
+
+        wanted = set(dimensions) if dimensions else None
+        merged: Dict[str, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+        for fields in hashes:
+            for name, value in fields.items():
+                dim, _, metric = name.rpartition("|")
+                if wanted is None or dim in wanted:
+                    merged[dim][metric] += float(value)
+
+        return {
+            dim: self._summarize(metrics, percentiles) for dim, metrics in sorted(merged.items())
+        }
+
+    @staticmethod
+    def _summarize(metrics: Dict[str, float], percentiles: Iterable[float]) -> Dict[str, Any]:
+        count = int(metrics.get("count", 0))
+        statuses = {
+            metric.split(":", 1)[1]: int(value)
+            for metric, value in metrics.items()
+            if metric.startswith("status:")
+        }
+        errors = sum(value for status, value in statuses.items() if int(status) >= 500)
+        histogram = [(bound, int(metrics.get(f"lat:{bucket_label(bound)}", 0))) for bound in LATENCY_BUCKETS_MS]
+
+        return {
+            "count": count,
+            "status": statuses,
+            "error_rate": errors / count if count else 0.0,
+            "latency_ms": {
+                "avg": metrics.get("lat_sum_ms", 0.0) / count if count else None,
+                **{f"p{p:g}": LogRollups._percentile(histogram, count, p) for p in percentiles},
+            },
+            "tokens": {field: int(metrics.get(field, 0)) for field in TOKEN_FIELDS},
+        }
+
+    @staticmethod
+    def _percentile(histogram: List[Tuple[float, int]], count: int, percentile: float) -> Optional[float]:
+        """Estimate a percentile by interpolating inside the matching histogram bucket."""
+        if not count:
+            return None
+        target = count * percentile / 100
+        cumulative = 0
+        lower = 0.0
+        for bound, bucket_count in histogram:
+            if bucket_count and cumulative + bucket_count >= target:
+                if math.isinf(bound):
+                    return lower
+                fraction = (target - cumulative) / bucket_count
+                return round(lower + (bound - lower) * fraction, 3)
+            cumulative += bucket_count
+            lower = bound
+        return lower
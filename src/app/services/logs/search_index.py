@@ -0,0 +1,183 @@
+import logging
+import time
+import uuid
+from typing import Any, Dict, Iterable, List, Optional
+
+from app.core.text import tokenize
+from app.services.logs.rollups import LATENCY_BUCKETS_MS, bucket_label
+
+logger = logging.getLogger(__name__)
+
+MAX_TERMS_PER_QUERY = 64
+
+
+class LogSearchIndex:
+    """
+    Inverted and attribute indexes over stored request logs.
+
+    Request ids are added to a sorted set ordered by timestamp, and to one
+    per query term, chat type, status, route and latency bucket. Every one
+    of them is trimmed to the log TTL on each write, so ids of expired
+    records don't pile up in busy terms whose keys never expire. Searches
+    intersect those sets server-side and page through the result ordered by
+    time, so only the requested page of records is loaded.
+    """
+
+    def __init__(self, redis_service, ttl: int = 604800, prefix: str = "idx"):
+        self.redis_service = redis_service
+        self.ttl = ttl
+        self.prefix = prefix
+        self.time_key = f"{prefix}:time"
+
+    def _key(self, attribute: str, value: Any) -> str:
+        return f"{self.prefix}:{attribute}:{value}"
+
+    async def index(
+        self,
+        request_id: str,
+        timestamp: float,
+        path: str,
+        status_code: int,
+        process_time: float,
+        chat_type: Optional[str] = None,
+        query_text: Optional[str] = None,
+    ) -> bool:
+        """
+        Add a logged request to the indexes.
+
+        Returns:
+            bool: True if the request was indexed
+        """
+        redis_client = self.redis_service.redis
+        if self.redis_service.connection_error or not redis_client:
+            return False
+
+        latency_ms = process_time * 1000
+        latency_label = next(
+            bucket_label(bound) for bound in LATENCY_BUCKETS_MS if latency_ms <= bound
+        )
+        keys = [
+            self._key("path", path),
+            self._key("status", status_code),
+            self._key("latency", latency_label),
+        ]
+        if chat_type:
+            keys.append(self._key("chat_type", chat_type))
+        if query_text:
+            keys.extend(self._key("term", term) for term in tokenize(query_text, MAX_TERMS_PER_QUERY))
+
+        try:
+            async with redis_client.pipeline(transaction=False) as pipe:
+                cutoff = time.time() - self.ttl
+                for key in (self.time_key, *keys):
+                    pipe.zadd(key, {request_id: timestamp})
+                    # Drop entries whose records have expired.
+                    pipe.zremrangebyscore(key, "-inf", cutoff)
+                    pipe.expire(key, self.ttl)
+                await pipe.execute()
+            return True
+        except Exception as e:
+            logger.warning(f"Failed to index request log: {e}")
+            return False
+
+    async def search(
+        self,
+        query: Optional[str] = None,
+        chat_type: Optional[str] = None,
+        status: Optional[Iterable[int]] = None,
+        path: Optional[str] = None,
+        min_latency_ms: Optional[float] = None,
+        max_latency_ms: Optional[float] = None,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        offset: int = 0,
+        limit: int = 100,
+    ) -> Dict[str, Any]:
+        """
+        Find request ids matching every given filter, newest first.
+
+        Query terms are ANDed, multiple statuses are ORed, and latency bounds
+        are matched at histogram bucket granularity.
+
+        Returns:
+            Dict[str, Any]: ``total`` matches and the ``request_ids`` of the page
+        """
+        redis_client = self.redis_service.redis
+        if self.redis_service.connection_error or not redis_client:
+            return {"total": 0, "request_ids": []}
+
+        temp_prefix = f"{self.prefix}:tmp:{uuid.uuid4().hex}"
+        temp_keys: List[str] = []
+        filters: List[str] = []
+
+        if query:
+            terms = tokenize(query, MAX_TERMS_PER_QUERY)
+            if not terms:
+                return {"total": 0, "request_ids": []}
+            filters.extend(self._key("term", term) for term in terms)
+        if chat_type:
+            filters.append(self._key("chat_type", chat_type))
+        if path:
+            filters.append(self._key("path", path))
+
+        unions = []
+        if status:
+            unions.append([self._key("status", code) for code in status])
+        if min_latency_ms is not None or max_latency_ms is not None:
+            unions.append(self._latency_keys(min_latency_ms, max_latency_ms))
+
+        min_score = start if start is not None else "-inf"
+        max_score = end if end is not None else "+inf"
+
+        try:
+            async with redis_client.pipeline(transaction=False) as pipe:
+                for keys in unions:
+                    if len(keys) == 1:
+                        filters.append(keys[0])
+                        continue
+                    union_key = f"{temp_prefix}:{len(temp_keys)}"
+                    temp_keys.append(union_key)
+                    filters.append(union_key)
+                    pipe.zunionstore(union_key, keys)
+
+                if filters:
+                    result_key = f"{temp_prefix}:result"
+                    temp_keys.append(result_key)
+                    weights = {self.time_key: 1, **{key: 0 for key in filters}}
+                    pipe.zinterstore(result_key, weights, aggregate="SUM")
+                else:
+                    result_key = self.time_key
+
+                pipe.zcount(result_key, min_score, max_score)
+                pipe.zrevrangebyscore(
+                    result_key, max_score, min_score, start=offset, num=limit
+                )
+                if temp_keys:
+                    pipe.delete(*temp_keys)
+                results = await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Log search failed: {e}")
+            return {"total": 0, "request_ids": []}
+
+        offset_in_results = -3 if temp_keys else -2
+        total, request_ids = results[offset_in_results], results[offset_in_results + 1]
+        return {"total": total, "request_ids": request_ids}
+
+    def _latency_keys(self, min_ms: Optional[float], max_ms: Optional[float]) -> List[str]:
+        keys = []
+        lower = 0.0
+        for bound in LATENCY_BUCKETS_MS:
+            # Bucket covers (lower, bound]; keep it if it overlaps [min_ms, max_ms].
+            if (min_ms is None or bound >= min_ms) and (max_ms is None or lower <= max_ms):
+                keys.append(self._key("latency", bucket_label(bound)))
+            lower = bound
+        return keys
+
+    async def clear(self) -> None:
+        """Remove every index key."""
+        redis_client = self.redis_service.redis
+        if self.redis_service.connection_error or not redis_client:
+            return
+        keys = await redis_client.keys(f"{self.prefix}:*")
+        if keys:
+            await redis_client.delete(*keys)
@@ -1,124 +1,335 @@
-import json
-import redis.asyncio as redis
+import asyncio
+import random
 import logging
-from typing import Dict, Any, Optional
-import datetime
+from collections import deque
+from typing import Deque, Dict, Any, List, Optional, Tuple, Union
+from app.core.executors import get_executors
+from app.core.serialization import serializer
+from app.services.logs.record_codec import LogRecordCodec
 
 logger = logging.getLogger(__name__)
 
 class RedisService:
-    def __init__(self, redis_url: str, ttl: int = 604800, optional: bool = True):
+    def __init__(
+        self,
+        redis_url: str,
+        ttl: int = 604800,
+        optional: bool = True,
+        max_connections: int = 20,
+        health_check_interval: int = 30,
+        socket_timeout: float = 5.0,
+        socket_connect_timeout: float = 5.0,
+        buffer_size: int = 1000,
+        reconnect_initial_delay: float = 1.0,
+        reconnect_max_delay: float = 60.0,
+        codec: Optional[LogRecordCodec] = None,
+    ):
         self.redis_url = redis_url
         self.redis = None
+        self.pool = None
         self.ttl = ttl
         self.optional = optional
+        self.max_connections = max_connections
+        self.health_check_interval = health_check_interval
+        self.socket_timeout = socket_timeout
+        self.socket_connect_timeout = socket_connect_timeout
+        self.reconnect_initial_delay = reconnect_initial_delay
+        self.reconnect_max_delay = reconnect_max_delay
+        self.codec = codec or LogRecordCodec()
         self.connection_error = False
+        self.dropped_writes = 0
+
+        self._buffer: Deque[Tuple[str, Union[str, bytes], int]] = deque(maxlen=buffer_size)
+        self._reconnect_task: Optional[asyncio.Task] = None
+        self._closing = False
 
     async def initialize(self):
-        """Initialize the Redis connection."""
+        """Initialize the pooled Redis client and verify the connection."""
+        import redis.asyncio as redis
+
+        self._closing = False
         try:
-            self.redis = await redis.from_url(self.redis_url, encoding="utf-8", decode_responses=True)
-            logger.info(f"Connected to Redis at {self.redis_url}")
+            # Inside the try: a malformed REDIS_URL fails here, not on ping.
+            self.pool = redis.ConnectionPool.from_url(
+                self.redis_url,
+                encoding="utf-8",
+                decode_responses=True,
+                max_connections=self.max_connections,
+                health_check_interval=self.health_check_interval,
+                socket_timeout=self.socket_timeout,
+                socket_connect_timeout=self.socket_connect_timeout,
+                socket_keepalive=True,
+                retry_on_timeout=True,
+            )
+            self.redis = redis.Redis(connection_pool=self.pool)
+            await self.redis.ping()
+            logger.info(
+                f"Connected to Redis at {self.redis_url} "
+                f"(max_connections={self.max_connections})"
+            )
             self.connection_error = False
         except Exception as e:
-            self.connection_error = True
             if not self.optional:
                 logger.error(f"Failed to connect to Redis: {e}")
                 raise
+            if self.redis is None:
+                logger.warning(f"Invalid Redis configuration: {e}. Running in reduced functionality mode.")
             else:
-                logger.warning(f"Redis connection failed: {e}. Running in reduced functionality mode.")
+                logger.warning(
+                    f"Redis connection failed: {e}. Running in reduced functionality mode "
+                    f"and retrying in the background."
+                )
+            self._mark_disconnected()
+
+    @property
+    def buffered_writes(self) -> int:
+        """Number of writes waiting for Redis to come back."""
+        return len(self._buffer)
+
+    async def store_log(self, key: str, data: Dict[str, Any], ttl: Optional[int] = None) -> bool:
+        """
+        Store a log entry in Redis with TTL.
+
+        While Redis is unavailable the entry is kept in a bounded local buffer
+        and written once the connection recovers.
+
+        Returns:
+            bool: True if the entry was written to Redis immediately
+        """
+        return await self._write(key, serializer.dumps_str(data), ttl or self.ttl)
+
+    async def store_record(
+        self, key: str, record: Dict[str, Any], ttl: Optional[int] = None, size_hint: int = 0
+    ) -> bool:
+        """
+        Store a request/response record in the compact binary log format.
+
+        Args:
+            key: Redis key
+            record: The record to encode
+            ttl: Expiry in seconds, the store's default if not given
+            size_hint: Approximate size of the bodies in the record; large
+                records are encoded off the event loop
+
+        Returns:
+            bool: True if the record was written to Redis immediately
+        """
+        data = await get_executors().offload(self.codec.encode, record, size=size_hint)
+        return await self._write(key, data, ttl or self.ttl)
+
+    async def get_record(self, key: str) -> Optional[Dict[str, Any]]:
+        """Retrieve and decode a log record, whatever format it was written in."""
+        if self.connection_error or not self.redis:
+            return None
+
+        from redis.client import NEVER_DECODE
 
-    async def store_log(self, key: str, data: Dict[str, Any]) -> bool:
-        """Store a log entry in Redis with TTL."""
-        if self.connection_error:
-            return False
-        
-        if not self.redis:
-            return False
-        
         try:
-            serializable_data = self._prepare_for_serialization(data)
-            json_data = json.dumps(serializable_data)
-            
-            await self.redis.set(key, json_data, ex=self.ttl)
-            return True
+            data = await self.redis.execute_command("GET", key, **{NEVER_DECODE: True})
         except Exception as e:
-            if not self.connection_error:
-                logger.warning(f"Failed to store log in Redis: {e}. Further Redis errors will be suppressed.")
-                self.connection_error = True
-            return False
-    
+            self._mark_disconnected(e)
+            return None
+        return self._decode_record(key, data)
+
+    async def get_records_by_pattern(self, pattern: str) -> list:
+        """Retrieve and decode every log record whose key matches a pattern."""
+        if self.connection_error or not self.redis:
+            return []
+
+        try:
+            keys = await self.redis.keys(pattern)
+        except Exception as e:
+            self._mark_disconnected(e)
+            return []
+
+        records = await self.get_records(keys)
+        return [
+            {"key": key, "data": record}
+            for key, record in zip(keys, records)
+            if record
+        ]
+
+    async def get_records(self, keys: List[str]) -> List[Optional[Dict[str, Any]]]:
+        """Retrieve and decode several log records in one round trip."""
+        if not keys or self.connection_error or not self.redis:
+            return [None] * len(keys)
+
+        from redis.client import NEVER_DECODE
+
+        try:
+            values = await self.redis.execute_command("MGET", *keys, **{NEVER_DECODE: True})
+        except Exception as e:
+            self._mark_disconnected(e)
+            return [None] * len(keys)
+        return [self._decode_record(key, data) for key, data in zip(keys, values)]
+
     async def get_log(self, key: str) -> Optional[Dict[str, Any]]:
         """Retrieve a log entry from Redis."""
         if self.connection_error or not self.redis:
             return None
-        
+
         try:
             data = await self.redis.get(key)
             if data:
-                return json.loads(data)
+                return serializer.loads(data)
             return None
         except Exception as e:
-            if not self.connection_error:
-                logger.warning(f"Failed to retrieve log from Redis: {e}")
-                self.connection_error = True
+            self._mark_disconnected(e)
             return None
-    
+
     async def get_logs_by_pattern(self, pattern: str) -> list:
         """Retrieve logs matching a pattern."""
         if self.connection_error or not self.redis:
             return []
-        
+
         try:
             keys = await self.redis.keys(pattern)
             if not keys:
                 return []
-            
+
             logs = []
             for key in keys:
                 log = await self.get_log(key)
                 if log:
                     logs.append({"key": key, "data": log})
-            
+
             return logs
         except Exception as e:
-            if not self.connection_error:
-                logger.warning(f"Failed to retrieve logs by pattern from Redis: {e}")
-                self.connection_error = True
+            self._mark_disconnected(e)
             return []
-    
+
     async def close(self):
-        """Close the Redis connection."""
+        """Stop reconnecting, close the Redis client and release every pooled connection."""
+        self._closing = True
+        if self._reconnect_task and not self._reconnect_task.done():
+            self._reconnect_task.cancel()
+            try:
+                await self._reconnect_task
+            except asyncio.CancelledError:
+                pass
+        self._reconnect_task = None
+
+        if self._buffer:
+            logger.warning(f"Discarding {len(self._buffer)} buffered log writes on shutdown")
+            self._buffer.clear()
+
         if self.redis:
-            await self.redis.close()
-    
+            await self.redis.aclose()
+            self.redis = None
+        if self.pool:
+            await self.pool.disconnect()
+            self.pool = None
+
     async def clear_all_logs(self) -> bool:
         """Clear all logs stored in Redis."""
         if self.connection_error or not self.redis:
             return False
-        
+
         try:
-            keys = await self.redis.keys("request:*") + await self.redis.keys("response:*")
+            keys = (
+                await self.redis.keys("log:*")
+                + await self.redis.keys("logbody:*")
+                + await self.redis.keys("request:*")
+                + await self.redis.keys("response:*")
+            )
             if keys:
                 await self.redis.delete(*keys)
                 logger.info(f"Cleared {len(keys)} log entries from Redis")
             return True
         except Exception as e:
+            self._mark_disconnected(e)
+            return False
+
+    async def _write(self, key: str, payload: Union[str, bytes], ttl: int) -> bool:
+        """Write a value, buffering it locally while Redis is unavailable."""
+        if self.connection_error or not self.redis:
+            self._buffer_write(key, payload, ttl)
+            return False
+
+        try:
+            await self.redis.set(key, payload, ex=ttl)
+            return True
+        except Exception as e:
+            self._buffer_write(key, payload, ttl)
+            self._mark_disconnected(e)
+            return False
+
+    def _decode_record(self, key: str, data: Optional[bytes]) -> Optional[Dict[str, Any]]:
+        if not data:
+            return None
+        try:
+            return self.codec.decode(data)
+        except Exception as e:
+            logger.warning(f"Failed to decode log record {key}: {e}")
+            return None
+
+    def _buffer_write(self, key: str, payload: Union[str, bytes], ttl: int) -> None:
+        """Keep a write for later, dropping the oldest one when the buffer is full."""
+        if len(self._buffer) == self._buffer.maxlen:
+            self.dropped_writes += 1
+        self._buffer.append((key, payload, ttl))
+
+    def _requeue(self, batch: List[Tuple[str, Union[str, bytes], int]]) -> None:
+        """Put a failed batch back in front of the buffer, dropping the oldest entries if it overflows."""
+        entries = batch + list(self._buffer)
+        overflow = max(len(entries) - self._buffer.maxlen, 0)
+        self.dropped_writes += overflow
+        self._buffer.clear()
+        self._buffer.extend(entries[overflow:])
+
+    def _mark_disconnected(self, error: Optional[Exception] = None) -> None:
+        """Flag the connection as lost and start the background reconnect loop."""
+        if not self.connection_error:
+            if error:
+                logger.warning(f"Lost connection to Redis: {error}. Buffering writes until it recovers.")
+            self.connection_error = True
+
+        if self._closing or not self.redis:
+            return
+        if self._reconnect_task is None or self._reconnect_task.done():
+            self._reconnect_task = asyncio.create_task(self._reconnect_loop())
+
+    async def _reconnect_loop(self) -> None:
+        """Ping Redis with exponential backoff until it answers, then flush the buffer."""
+        delay = self.reconnect_initial_delay
+        while not self._closing:
+            await asyncio.sleep(delay * random.uniform(0.8, 1.2))
+            try:
+                await self.redis.ping()
+            except Exception as e:
+                logger.debug(f"Redis still unavailable ({e}), retrying in {delay:.1f}s")
+                delay = min(delay * 2, self.reconnect_max_delay)
+                continue
+
+            logger.info(f"Reconnected to Redis at {self.redis_url}")
+            self.connection_error = False
+            await self._flush_buffer()
             if not self.connection_error:
-                logger.warning(f"Failed to clear logs from Redis: {e}")
+                return
+            delay = self.reconnect_initial_delay
+
+    async def _flush_buffer(self, batch_size: int = 100) -> None:
+        """Write buffered entries to Redis in pipelined batches."""
+        flushed = 0
+        while self._buffer and not self.connection_error:
+            # Taken out before the await: writes buffered meanwhile may evict
+            # the oldest entries, which must not be the ones being written.
+            batch = [self._buffer.popleft() for _ in range(min(batch_size, len(self._buffer)))]
+            try:
+                async with self.redis.pipeline(transaction=False) as pipe:
+                    for key, payload, ttl in batch:
+                        pipe.set(key, payload, ex=ttl)
+                    await pipe.execute()
+            except Exception as e:
+                logger.warning(f"Failed to flush buffered log writes: {e}")
+                self._requeue(batch)
                 self.connection_error = True
-            return False
-    
-    def _prepare_for_serialization(self, data: Dict[str, Any]) -> Dict[str, Any]:
-        """Prepare data for JSON serialization by converting non-serializable types."""
-        serializable_data = {}
-        
-        for key, value in data.items():
-            if isinstance(value, dict):
-                serializable_data[key] = self._prepare_for_serialization(value)
-            elif isinstance(value, (datetime.datetime, datetime.date)):
-                serializable_data[key] = value.isoformat()
-            else:
-                serializable_data[key] = value
-        
-        return serializable_data
+                break
+
+            flushed += len(batch)
+
+        if flushed:
+            logger.info(f"Flushed {flushed} buffered log writes to Redis")
+        if self.dropped_writes:
+            logger.warning(f"{self.dropped_writes} log writes were dropped while Redis was unavailable")
+            self.dropped_writes = 0
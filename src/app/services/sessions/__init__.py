@@ -0,0 +1,3 @@
+from .session_store import SessionStore
+
+__all__ = ["SessionStore"]
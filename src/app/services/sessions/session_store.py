@@ -0,0 +1,253 @@
+import logging
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+
+from app.core.serialization import serializer
+from app.models.message import MessageHistory
+
+logger = logging.getLogger(__name__)
+
+# Turns are stored as two-element arrays with a one-letter role code.
+ROLE_CODES = {"user": "u", "assistant": "a"}
+ROLES = {code: role for role, code in ROLE_CODES.items()}
+
+SUMMARY_PREFIX = "Summary of the earlier conversation:\n"
+SENTENCE_END = re.compile(r"(?<=[.!?])\s")
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count, consistent with ``OpenAIProvider.count_tokens``."""
+    return len(text) // 4
+
+
+@dataclass
+class Session:
+    """Turns of one conversation plus a summary of the turns dropped from it."""
+
+    turns: List[Tuple[str, str]] = field(default_factory=list)
+    summary: str = ""
+    loaded_at: float = 0.0
+
+
+class SessionStore:
+    """
+    Bounded multi-turn conversation history per service and user.
+
+    Turns are appended to a Redis list ``session:<service>:<user_id>`` as
+    compact ``[role, content]`` arrays. When a session exceeds its turn or
+    token budget, the oldest exchanges are trimmed from the list and folded
+    into a short extractive summary kept next to it, so the history sent to
+    the LLM stays bounded. Recently used sessions are kept in a local LRU
+    and only reloaded from Redis once ``local_cache_ttl`` has passed.
+    """
+
+    def __init__(
+        self,
+        redis_service,
+        max_tokens: int = 2000,
+        max_turns: int = 20,
+        summary_max_tokens: int = 300,
+        ttl: int = 86400,
+        local_cache_size: int = 1000,
+        local_cache_ttl: float = 30.0,
+        prefix: str = "session",
+    ):
+        self.redis_service = redis_service
+        self.max_tokens = max_tokens
+        self.max_turns = max_turns
+        self.summary_max_tokens = summary_max_tokens
+        self.ttl = ttl
+        self.local_cache_size = local_cache_size
+        self.local_cache_ttl = local_cache_ttl
+        self.prefix = prefix
+        self._local: "OrderedDict[str, Session]" = OrderedDict()
+
+    @classmethod
+    def from_settings(cls, redis_service, settings) -> "SessionStore":
+        """Create a session store from application settings."""
+        return cls(
+            redis_service,
+            max_tokens=settings.SESSION_MAX_TOKENS,
+            max_turns=settings.SESSION_MAX_TURNS,
+            summary_max_tokens=settings.SESSION_SUMMARY_MAX_TOKENS,
+            ttl=settings.SESSION_TTL,
+            local_cache_size=settings.SESSION_LOCAL_CACHE_SIZE,
+            local_cache_ttl=settings.SESSION_LOCAL_CACHE_TTL,
+        )
+
+    def _key(self, service_type: str, user_id: str) -> str:
+        return f"{self.prefix}:{service_type}:{user_id}"
+
+    async def get_messages(self, service_type: str, user_id: str) -> List[Dict[str, str]]:
+        """
+        Return the stored history as chat messages, oldest first.
+
+        Args:
+            service_type: The chat service of the conversation
+            user_id: The user's identifier
+
+        Returns:
+            List[Dict[str, str]]: Messages to place between the system prompt
+                and the new user message
+        """
+        session = await self._load(self._key(service_type, user_id))
+        messages = []
+        if session.summary:
+            messages.append({"role": "system", "content": SUMMARY_PREFIX + session.summary})
+        messages.extend({"role": ROLES[code], "content": content} for code, content in session.turns)
+        return messages
+
+    async def get_history(self, service_type: str, user_id: str) -> MessageHistory:
+        """Return the stored history of a user as a ``MessageHistory``."""
+        return MessageHistory(
+            user_id=user_id, messages=await self.get_messages(service_type, user_id)
+        )
+
+    async def append(
+        self, service_type: str, user_id: str, user_message: str, assistant_message: str
+    ) -> None:
+        """
+        Append one exchange and compact the session if it exceeds its budget.
+
+        Args:
+            service_type: The chat service of the conversation
+            user_id: The user's identifier
+            user_message: The user message as sent to the LLM
+            assistant_message: The LLM's answer
+        """
+        key = self._key(service_type, user_id)
+        session = await self._load(key)
+        expected_length = len(session.turns) + 2
+
+        # At about four characters per token, each message gets at most a
+        # quarter of the budget, so the exchange _compact always keeps
+        # never takes more than half of it.
+        limit = self.max_tokens
+        new_turns = [
+            (ROLE_CODES["user"], self._clip(user_message, limit)),
+            (ROLE_CODES["assistant"], self._clip(assistant_message, limit)),
+        ]
+        session.turns.extend(new_turns)
+        dropped = self._compact(session)
+        self._remember(key, session)
+
+        redis_client = self.redis_service.redis
+        if self.redis_service.connection_error or not redis_client:
+            return
+
+        summary_key = f"{key}:summary"
+        try:
+            async with redis_client.pipeline(transaction=False) as pipe:
+                pipe.rpush(key, *(serializer.dumps_str(list(turn)) for turn in new_turns))
+                if dropped:
+                    pipe.ltrim(key, dropped, -1)
+                    pipe.set(summary_key, session.summary, ex=self.ttl)
+                else:
+                    pipe.expire(summary_key, self.ttl)
+                pipe.expire(key, self.ttl)
+                results = await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Failed to store session turn: {e}")
+            return
+
+        if results[0] != expected_length:
+            # Another worker wrote to this session; reload it on the next turn.
+            self._local.pop(key, None)
+
+    async def clear(self, service_type: str, user_id: str) -> None:
+        """Delete a user's session."""
+        key = self._key(service_type, user_id)
+        self._local.pop(key, None)
+        redis_client = self.redis_service.redis
+        if self.redis_service.connection_error or not redis_client:
+            return
+        await redis_client.delete(key, f"{key}:summary")
+
+    async def _load(self, key: str) -> Session:
+        """Return a session from the local cache, reloading stale entries from Redis."""
+        now = time.monotonic()
+        session = self._local.get(key)
+        if session is not None:
+            self._local.move_to_end(key)
+
+        redis_client = self.redis_service.redis
+        if self.redis_service.connection_error or not redis_client:
+            return session or Session(loaded_at=now)
+        if session is not None and now - session.loaded_at < self.local_cache_ttl:
+            return session
+
+        try:
+            async with redis_client.pipeline(transaction=False) as pipe:
+                pipe.lrange(key, 0, -1)
+                pipe.get(f"{key}:summary")
+                entries, summary = await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Failed to load session: {e}")
+            return session or Session(loaded_at=now)
+
+        turns = []
+        for entry in entries:
+            try:
+                code, content = serializer.loads(entry)
+            except ValueError:
+                continue
+            if code in ROLES:
+                turns.append((code, content))
+
+        session = Session(turns=turns, summary=summary or "", loaded_at=now)
+        self._remember(key, session)
+        return session
+
+    def _remember(self, key: str, session: Session) -> None:
+        self._local[key] = session
+        self._local.move_to_end(key)
+        while len(self._local) > self.local_cache_size:
+            self._local.popitem(last=False)
+
+    def _compact(self, session: Session) -> int:
+        """
+        Drop the oldest exchanges until the session fits its budget.
+
+        Returns:
+            int: Number of turns removed from the front of the session
+        """
+        dropped = 0
+        summary = session.summary
+        # The summary grows with every exchange folded into it, so it is
+        # counted as it will be stored.
+        while len(session.turns) - dropped > 2 and (
+            len(session.turns) - dropped > self.max_turns
+            or estimate_tokens(summary)
+            + sum(estimate_tokens(content) for _, content in session.turns[dropped:])
+            > self.max_tokens
+        ):
+            summary = self._summarize(summary, session.turns[dropped : dropped + 2])
+            dropped += 2
+
+        if dropped:
+            session.summary = summary
+            del session.turns[:dropped]
+        return dropped
+
+    def _summarize(self, summary: str, turns: List[Tuple[str, str]]) -> str:
+        """
+        Fold dropped turns into the summary, keeping the first sentence of each.
+
+        The most recent lines are kept when the summary outgrows its budget.
+        """
+        lines = summary.splitlines() if summary else []
+        for code, content in turns:
+            sentence = SENTENCE_END.split(" ".join(content.split()), 1)[0]
+            lines.append(f"{ROLES[code]}: {self._clip(sentence, 160)}")
+
+        max_chars = self.summary_max_tokens * 4
+        while lines and sum(len(line) + 1 for line in lines) > max_chars:
+            lines.pop(0)
+        return "\n".join(lines)
+
+    @staticmethod
+    def _clip(text: str, max_chars: int) -> str:
+        return text if len(text) <= max_chars else text[: max_chars - 3] + "..."
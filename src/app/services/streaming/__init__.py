@@ -0,0 +1,13 @@
+from .coalescer import CoalescingOptions, HEARTBEAT, Heartbeat, coalesce
+from .replay import ReplayBuffer, StreamReplayStore
+from .sse import SSEEncoder
+
+__all__ = [
+    "CoalescingOptions",
+    "HEARTBEAT",
+    "Heartbeat",
+    "coalesce",
+    "ReplayBuffer",
+    "StreamReplayStore",
+    "SSEEncoder",
+]
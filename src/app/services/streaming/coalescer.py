@@ -0,0 +1,156 @@
+import asyncio
+import logging
+from dataclasses import dataclass, replace
+from typing import AsyncIterator, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+
+class Heartbeat:
+    """Marker yielded by ``coalesce`` when the stream has been idle for a while."""
+
+    __slots__ = ()
+
+
+HEARTBEAT = Heartbeat()
+_END = object()
+
+
+class _Failure:
+    __slots__ = ("error",)
+
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+@dataclass(frozen=True)
+class CoalescingOptions:
+    """
+    How stream deltas are batched before they are written to the client.
+
+    Args:
+        max_delay_ms: Longest time a delta may wait for others to join it;
+            0 disables batching
+        max_bytes: Flush as soon as the batch reaches this many characters
+        flush_first: Send the first delta on its own, without waiting, to
+            keep time-to-first-token unchanged
+    """
+
+    max_delay_ms: float = 50.0
+    max_bytes: int = 512
+    flush_first: bool = True
+
+    def with_overrides(
+        self, max_delay_ms: Optional[float] = None, max_bytes: Optional[int] = None
+    ) -> "CoalescingOptions":
+        """Return a copy with the per-request values that are set."""
+        if max_delay_ms is None and max_bytes is None:
+            return self
+        return replace(
+            self,
+            max_delay_ms=self.max_delay_ms if max_delay_ms is None else max_delay_ms,
+            max_bytes=self.max_bytes if max_bytes is None else max_bytes,
+        )
+
+    @classmethod
+    def from_settings(cls, settings) -> "CoalescingOptions":
+        """Create the default options from application settings."""
+        return cls(
+            max_delay_ms=settings.STREAM_COALESCE_MS,
+            max_bytes=settings.STREAM_COALESCE_BYTES,
+            flush_first=settings.STREAM_FLUSH_FIRST_CHUNK,
+        )
+
+
+async def coalesce(
+    source: AsyncIterator[str],
+    options: CoalescingOptions,
+    heartbeat_interval: Optional[float] = None,
+    max_pending: int = 64,
+) -> AsyncIterator[Union[str, Heartbeat]]:
+    """
+    Batch the deltas of a text stream by time window and size.
+
+    The source is read by a pump task into a queue of at most
+    ``max_pending`` deltas. When the consumer (the client connection) is
+    slower than the upstream, the queue fills up and the pump stops reading,
+    so backpressure reaches the upstream instead of buffering without bound.
+    A batch is flushed once it holds ``max_bytes`` characters or its oldest
+    delta has waited ``max_delay_ms``; with ``flush_first`` the first delta
+    is sent as soon as it arrives. If nothing arrives for
+    ``heartbeat_interval`` seconds, ``HEARTBEAT`` is yielded so the transport
+    can keep idle connections open through proxies.
+
+    Args:
+        source: The stream of text deltas
+        options: Batching thresholds
+        heartbeat_interval: Idle time before a heartbeat, None to disable
+        max_pending: Capacity of the queue between upstream and client
+
+    Yields:
+        Union[str, Heartbeat]: Batched text, or ``HEARTBEAT``
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=max_pending)
+
+    async def pump() -> None:
+        try:
+            async for delta in source:
+                if delta:
+                    await queue.put(delta)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            await queue.put(_Failure(e))
+        finally:
+            # Release the upstream (and its scheduler slot) when the client goes away.
+            aclose = getattr(source, "aclose", None)
+            if aclose is not None:
+                await aclose()
+        await queue.put(_END)
+
+    loop = asyncio.get_running_loop()
+    pump_task = asyncio.create_task(pump())
+    max_delay = options.max_delay_ms / 1000
+    buffer = []
+    size = 0
+    deadline = 0.0
+    flush_next = options.flush_first
+
+    try:
+        while True:
+            try:
+                item = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                timeout = max(deadline - loop.time(), 0) if buffer else heartbeat_interval
+                try:
+                    item = await asyncio.wait_for(queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    if buffer:
+                        yield "".join(buffer)
+                        buffer, size = [], 0
+                    else:
+                        yield HEARTBEAT
+                    continue
+
+            if item is _END or isinstance(item, _Failure):
+                if buffer:
+                    yield "".join(buffer)
+                if isinstance(item, _Failure):
+                    raise item.error
+                return
+
+            if not buffer:
+                deadline = loop.time() + max_delay
+            buffer.append(item)
+            size += len(item)
+            if flush_next or size >= options.max_bytes or max_delay <= 0:
+                flush_next = False
+                yield "".join(buffer)
+                buffer, size = [], 0
+    finally:
+        if not pump_task.done():
+            pump_task.cancel()
+            try:
+                await pump_task
+            except (asyncio.CancelledError, Exception):
+                pass
@@ -0,0 +1,391 @@
+import asyncio
+import itertools
+import logging
+import time
+import uuid
+from collections import OrderedDict, deque
+from typing import Any, AsyncIterator, Callable, Deque, Dict, List, Optional, Tuple, Union
+
+from app.core.serialization import serializer
+from app.exceptions import AsyncProcessingError, StreamExpiredError, StreamNotFoundError
+from .coalescer import HEARTBEAT, Heartbeat
+
+logger = logging.getLogger(__name__)
+
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+# Text chunks, or JSON objects for structured events such as parsed fields.
+Item = Union[str, Dict[str, Any]]
+Chunk = Tuple[int, Item]
+
+
+class ReplayBuffer:
+    """
+    Sequence-numbered chunks of one stream, numbered from 1.
+
+    Only the newest chunks are kept in ``chunks``; ``chunks[0]`` has sequence
+    number ``first_seq``. Older chunks have been spilled to Redis, where the
+    first ``stored_seq`` chunks are stored in order.
+    """
+
+    def __init__(self, stream_id: str, chat_type: str):
+        self.stream_id = stream_id
+        self.chat_type = chat_type
+        self.chunks: Deque[Item] = deque()
+        self.first_seq = 1
+        self.last_seq = 0
+        self.stored_seq = 0
+        self.status = RUNNING
+        self.error: Optional[BaseException] = None
+        self.usage: Optional[Dict[str, Any]] = None
+        self.finished_at: Optional[float] = None
+        self.changed = asyncio.Event()
+
+    @property
+    def done(self) -> bool:
+        return self.status != RUNNING
+
+    @property
+    def replayable_from(self) -> int:
+        """Lowest sequence number that can still be replayed."""
+        return 1 if self.stored_seq >= self.first_seq - 1 else self.first_seq
+
+    def append(self, chunk: Item) -> None:
+        self.chunks.append(chunk)
+        self.last_seq += 1
+        self.notify()
+
+    def since(self, seq: int) -> List[Chunk]:
+        """Return the buffered chunks after ``seq``."""
+        start = max(seq + 1, self.first_seq)
+        return [(n, self.chunks[n - self.first_seq]) for n in range(start, self.last_seq + 1)]
+
+    def notify(self) -> None:
+        """Wake up the readers waiting for new chunks."""
+        self.changed.set()
+        self.changed = asyncio.Event()
+
+
+class StreamReplayStore:
+    """
+    Resumable streams backed by bounded, expiring replay buffers.
+
+    ``start`` consumes a stream in a background task, so the upstream
+    generation runs to completion even when the client that started it goes
+    away. Chunks are numbered and buffered; once a stream buffers more than
+    ``max_chunks`` in memory, the oldest half is spilled to the Redis list
+    ``stream:<id>``, and when it finishes everything left is written there
+    along with its state in the hash ``stream:<id>:meta``. Both expire after
+    ``ttl`` seconds. ``follow`` replays a stream from any sequence number and
+    then tails it; readers in other processes see the chunks that reached
+    Redis, polling until the stream finishes.
+    """
+
+    def __init__(
+        self,
+        redis_service,
+        max_chunks: int = 256,
+        max_streams: int = 1000,
+        ttl: int = 600,
+        poll_interval: float = 0.5,
+        prefix: str = "stream",
+    ):
+        self.redis_service = redis_service
+        self.max_chunks = max_chunks
+        self.max_streams = max_streams
+        self.ttl = ttl
+        self.poll_interval = poll_interval
+        self.prefix = prefix
+        self._local: "OrderedDict[str, ReplayBuffer]" = OrderedDict()
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    @classmethod
+    def from_settings(cls, redis_service, settings) -> "StreamReplayStore":
+        """Create a replay store from application settings."""
+        return cls(
+            redis_service,
+            max_chunks=settings.STREAM_REPLAY_MAX_CHUNKS,
+            max_streams=settings.STREAM_REPLAY_MAX_STREAMS,
+            ttl=settings.STREAM_REPLAY_TTL,
+            poll_interval=settings.STREAM_REPLAY_POLL_INTERVAL,
+        )
+
+    def _key(self, stream_id: str) -> str:
+        return f"{self.prefix}:{stream_id}"
+
+    def _meta_key(self, stream_id: str) -> str:
+        return f"{self.prefix}:{stream_id}:meta"
+
+    def _redis(self):
+        redis_client = self.redis_service.redis
+        if self.redis_service.connection_error or not redis_client:
+            return None
+        return redis_client
+
+    def start(
+        self,
+        source: AsyncIterator[Item],
+        chat_type: str,
+        usage: Optional[Callable[[], Optional[Dict[str, Any]]]] = None,
+    ) -> ReplayBuffer:
+        """
+        Start buffering a stream in the background.
+
+        Args:
+            source: The (already coalesced) text chunks and events
+            chat_type: The chat service producing the stream
+            usage: Called once the source is exhausted to get its token usage
+
+        Returns:
+            ReplayBuffer: The new stream's buffer; its ``stream_id`` is what
+                clients resume with
+        """
+        buffer = ReplayBuffer(uuid.uuid4().hex, chat_type)
+        self._remember(buffer)
+        task = asyncio.create_task(
+            self._produce(buffer, source, usage), name=f"stream-{buffer.stream_id}"
+        )
+        self._tasks[buffer.stream_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(buffer.stream_id, None))
+        return buffer
+
+    async def close(self) -> None:
+        """Cancel the streams that are still being produced."""
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def describe(self, stream_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Return the state of a stream.
+
+        Returns:
+            Optional[Dict[str, Any]]: ``chat_type``, ``status``, ``last_seq``,
+                ``replayable_from``, ``usage`` and ``error``, or None for
+                unknown or expired streams
+        """
+        buffer = self._get_local(stream_id)
+        if buffer is not None:
+            return {
+                "stream_id": stream_id,
+                "chat_type": buffer.chat_type,
+                "status": buffer.status,
+                "last_seq": buffer.last_seq,
+                "replayable_from": buffer.replayable_from,
+                "usage": buffer.usage,
+                "error": str(buffer.error) if buffer.error is not None else None,
+            }
+        meta = await self._load_meta(stream_id)
+        if meta is None:
+            return None
+        return {"stream_id": stream_id, "replayable_from": 1, **meta}
+
+    async def follow(
+        self, stream_id: str, after_seq: int = 0, heartbeat_interval: Optional[float] = None
+    ) -> AsyncIterator[Union[Chunk, Heartbeat]]:
+        """
+        Replay a stream after ``after_seq`` and tail it until it finishes.
+
+        Args:
+            stream_id: The stream identifier
+            after_seq: Last sequence number the client received, 0 for all
+            heartbeat_interval: Idle time before a heartbeat, None to disable
+
+        Yields:
+            Union[Tuple[int, Item], Heartbeat]: ``(seq, chunk)`` pairs, or ``HEARTBEAT``
+
+        Raises:
+            StreamNotFoundError: If the stream is unknown or has expired
+            StreamExpiredError: If chunks after ``after_seq`` are no longer stored
+        """
+        buffer = self._get_local(stream_id)
+        if buffer is None:
+            async for item in self._follow_stored(stream_id, after_seq, heartbeat_interval):
+                yield item
+            return
+
+        seq = after_seq
+        while True:
+            changed = buffer.changed
+            if seq + 1 < buffer.first_seq:
+                if seq + 1 < buffer.replayable_from:
+                    raise StreamExpiredError(f"Stream {stream_id} can no longer be replayed from {seq}")
+                # Chunks before first_seq have been spilled to Redis.
+                chunks = await self._read_stored(stream_id, seq, buffer.first_seq - 2)
+                if len(chunks) < buffer.first_seq - 1 - seq:
+                    raise StreamExpiredError(f"Stream {stream_id} can no longer be replayed from {seq}")
+                for chunk in chunks:
+                    seq += 1
+                    yield seq, chunk
+                continue
+
+            for seq, chunk in buffer.since(seq):
+                yield seq, chunk
+            if seq < buffer.last_seq:
+                continue
+            if buffer.done:
+                if buffer.error is not None:
+                    raise buffer.error
+                return
+            try:
+                await asyncio.wait_for(changed.wait(), heartbeat_interval)
+            except asyncio.TimeoutError:
+                yield HEARTBEAT
+
+    async def _follow_stored(
+        self, stream_id: str, after_seq: int, heartbeat_interval: Optional[float]
+    ) -> AsyncIterator[Union[Chunk, Heartbeat]]:
+        """Replay a stream owned by another process from Redis."""
+        seq = after_seq
+        idle = 0.0
+        while True:
+            meta = await self._load_meta(stream_id)
+            if meta is None:
+                raise StreamNotFoundError(f"Stream not found: {stream_id}")
+            chunks = await self._read_stored(stream_id, seq, -1)
+            for chunk in chunks:
+                seq += 1
+                yield seq, chunk
+            if chunks:
+                idle = 0.0
+
+            if meta["status"] != RUNNING:
+                if seq < meta["last_seq"]:
+                    raise StreamExpiredError(f"Stream {stream_id} can no longer be replayed from {seq}")
+                if meta["status"] == FAILED:
+                    raise AsyncProcessingError(meta.get("error") or "Stream failed")
+                return
+
+            await asyncio.sleep(self.poll_interval)
+            idle += self.poll_interval
+            if heartbeat_interval is not None and idle >= heartbeat_interval:
+                idle = 0.0
+                yield HEARTBEAT
+
+    async def _produce(
+        self,
+        buffer: ReplayBuffer,
+        source: AsyncIterator[Item],
+        usage: Optional[Callable[[], Optional[Dict[str, Any]]]],
+    ) -> None:
+        await self._save_meta(buffer, status=RUNNING, chat_type=buffer.chat_type)
+        try:
+            async for chunk in source:
+                buffer.append(chunk)
+                if len(buffer.chunks) > self.max_chunks:
+                    await self._spill(buffer, len(buffer.chunks) - self.max_chunks // 2)
+            buffer.usage = usage() if usage else None
+            buffer.status = SUCCEEDED
+        except asyncio.CancelledError:
+            buffer.error = AsyncProcessingError("Stream was cancelled")
+            buffer.status = FAILED
+            raise
+        except Exception as e:
+            logger.error(f"Stream {buffer.stream_id} failed: {e}")
+            buffer.error = e
+            buffer.status = FAILED
+        finally:
+            aclose = getattr(source, "aclose", None)
+            if aclose is not None:
+                await aclose()
+            buffer.finished_at = time.monotonic()
+            buffer.notify()
+            await self._spill(buffer, len(buffer.chunks), keep=True)
+            await self._save_meta(
+                buffer,
+                status=buffer.status,
+                last_seq=buffer.last_seq,
+                usage=buffer.usage,
+                error=str(buffer.error) if buffer.error is not None else None,
+            )
+
+    async def _spill(self, buffer: ReplayBuffer, count: int, keep: bool = False) -> None:
+        """
+        Store the oldest ``count`` buffered chunks in Redis.
+
+        Unless ``keep`` is set they are then dropped from memory, whether or
+        not they could be stored; readers that need them get
+        ``StreamExpiredError``.
+        """
+        redis_client = self._redis()
+        # Redis holds a prefix of the stream; never store past a gap.
+        if count and redis_client is not None and buffer.stored_seq == buffer.first_seq - 1:
+            chunks = list(itertools.islice(buffer.chunks, count))
+            key = self._key(buffer.stream_id)
+            try:
+                async with redis_client.pipeline(transaction=False) as pipe:
+                    pipe.rpush(key, *(serializer.dumps_str(chunk) for chunk in chunks))
+                    pipe.expire(key, self.ttl)
+                    await pipe.execute()
+                buffer.stored_seq += count
+            except Exception as e:
+                logger.warning(f"Failed to spill stream {buffer.stream_id}: {e}")
+
+        if not keep:
+            for _ in range(count):
+                buffer.chunks.popleft()
+            buffer.first_seq += count
+
+    async def _read_stored(self, stream_id: str, after_seq: int, end: int) -> List[Item]:
+        redis_client = self._redis()
+        if redis_client is None:
+            return []
+        try:
+            entries = await redis_client.lrange(self._key(stream_id), after_seq, end)
+        except Exception as e:
+            logger.warning(f"Failed to read stream {stream_id}: {e}")
+            return []
+        return [serializer.loads(entry) for entry in entries]
+
+    async def _save_meta(self, buffer: ReplayBuffer, **fields: Any) -> None:
+        redis_client = self._redis()
+        if redis_client is None:
+            return
+        key = self._meta_key(buffer.stream_id)
+        try:
+            async with redis_client.pipeline(transaction=False) as pipe:
+                pipe.hset(key, mapping={name: serializer.dumps_str(value) for name, value in fields.items()})
+                pipe.expire(key, self.ttl)
+                await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Failed to store state of stream {buffer.stream_id}: {e}")
+
+    async def _load_meta(self, stream_id: str) -> Optional[Dict[str, Any]]:
+        redis_client = self._redis()
+        if redis_client is None:
+            return None
+        try:
+            fields = await redis_client.hgetall(self._meta_key(stream_id))
+        except Exception as e:
+            logger.warning(f"Failed to read state of stream {stream_id}: {e}")
+            return None
+        if not fields:
+            return None
+        meta = {name: serializer.loads(value) for name, value in fields.items()}
+        meta.setdefault("last_seq", 0)
+        meta.setdefault("usage", None)
+        meta.setdefault("error", None)
+        return meta
+
+    def _get_local(self, stream_id: str) -> Optional[ReplayBuffer]:
+        buffer = self._local.get(stream_id)
+        if buffer is None:
+            return None
+        if buffer.finished_at is not None and time.monotonic() - buffer.finished_at > self.ttl:
+            del self._local[stream_id]
+            return None
+        self._local.move_to_end(stream_id)
+        return buffer
+
+    def _remember(self, buffer: ReplayBuffer) -> None:
+        self._local[buffer.stream_id] = buffer
+        if len(self._local) <= self.max_streams:
+            return
+        # Evict the least recently used finished streams; running ones stay.
+        for stream_id in [sid for sid, other in self._local.items() if other.done]:
+            del self._local[stream_id]
+            if len(self._local) <= self.max_streams:
+                break
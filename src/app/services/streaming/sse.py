@@ -0,0 +1,32 @@
+from typing import Any, Dict, Optional
+
+from app.core.serialization import JSONSerializer, NDJSONLineEncoder
+
+
+class SSEEncoder:
+    """
+    Encode server-sent events whose data is a JSON object.
+
+    Like ``NDJSONLineEncoder``, the static fields are encoded once and the
+    ``event:`` line of each event type is built only on first use.
+    """
+
+    heartbeat = b": ping\n\n"
+
+    def __init__(self, serializer: JSONSerializer, **static_fields: Any):
+        self._lines = NDJSONLineEncoder(serializer, **static_fields)
+        self._prefixes: Dict[str, bytes] = {}
+
+    def event(self, event: str, event_id: Optional[str] = None, **fields: Any) -> bytes:
+        """
+        Encode one event holding the given fields plus the static ones.
+
+        ``event_id`` becomes the ``id:`` line, which ``EventSource`` sends
+        back as ``Last-Event-ID`` when it reconnects.
+        """
+        prefix = self._prefixes.get(event)
+        if prefix is None:
+            prefix = self._prefixes[event] = f"event: {event}\ndata: ".encode("utf-8")
+        if event_id is not None:
+            prefix = f"id: {event_id}\n".encode("utf-8") + prefix
+        return prefix + self._lines.encode(**fields) + b"\n"
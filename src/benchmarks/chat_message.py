@@ -0,0 +1,127 @@
+"""
+Compare the cost of POST /chat/message through FastAPI and the fast path.
+
+    cd src && python -m benchmarks.chat_message --requests 5000
+
+Requests are sent straight to the ASGI application, without a server, and
+answered from the semantic cache with the LLM call stubbed out, so the
+numbers measure the framework overhead of a cached response. The fast path
+is measured with and without its pre-encoded response cache.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from typing import Callable, List
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+os.environ["SEMANTIC_CACHE_ENABLED"] = "true"
+os.environ["SEMANTIC_CACHE_PATH"] = ""
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import FastAPI  # noqa: E402
+
+from app.routers import chat  # noqa: E402
+from app.routers.fast_path import ChatFastPath  # noqa: E402
+from app.services.llm.llm_service_manager import LLMServiceManager  # noqa: E402
+
+BODY = b'{"prompt": "inventor", "query": "I keep losing my keys"}'
+ANSWER = (
+    "Name: The Key Whisperer\n"
+    "What it does: Hums until you find your keys.\n"
+    "How it works: A tiny speaker tuned to your sense of guilt.\n"
+    "Catchy tagline: Never lose them again."
+)
+
+
+async def _stub_generate(self, system_prompt: str, user_message: str, **kwargs) -> str:
+    return ANSWER
+
+
+def build_app() -> FastAPI:
+    LLMServiceManager.generate_response = _stub_generate
+    app = FastAPI()
+    app.include_router(chat.router)
+    app.state.session_store = None
+    app.state.image_store = None
+    return app
+
+
+async def call(app: Callable, body: bytes, fastapi_app: FastAPI) -> int:
+    """Send one request to an ASGI app and return its status code."""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": "/chat/message",
+        "raw_path": b"/chat/message",
+        "root_path": "",
+        "query_string": b"",
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+        ],
+        "client": ("127.0.0.1", 1234),
+        "server": ("127.0.0.1", 8000),
+        # Set by Starlette before the middleware stack runs.
+        "app": fastapi_app,
+    }
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+    status = 0
+
+    async def receive():
+        if messages:
+            return messages.pop()
+        await asyncio.sleep(3600)
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(scope, receive, send)
+    return status
+
+
+async def measure(app: Callable, requests: int, fastapi_app: FastAPI) -> List[float]:
+    assert await call(app, BODY, fastapi_app) == 200  # Fill the caches
+    timings = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        await call(app, BODY, fastapi_app)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+async def run(requests: int) -> None:
+    app = build_app()
+    paths = {
+        "fastapi route": app,
+        "fast path, no response cache": ChatFastPath(app, cache_size=0),
+        "fast path": ChatFastPath(app),
+    }
+    print(f"{'path':<30} {'req/s':>10} {'mean us':>9} {'p50 us':>9} {'p99 us':>9}")
+    for name, asgi_app in paths.items():
+        timings = await measure(asgi_app, requests, app)
+        timings.sort()
+        p99 = timings[int(len(timings) * 0.99) - 1]
+        print(
+            f"{name:<30} {len(timings) / sum(timings):>10.0f} "
+            f"{statistics.mean(timings) * 1e6:>9.1f} "
+            f"{statistics.median(timings) * 1e6:>9.1f} {p99 * 1e6:>9.1f}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=5000)
+    args = parser.parse_args()
+    asyncio.run(run(args.requests))
+
+
+if __name__ == "__main__":
+    main()
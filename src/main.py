@@ -1,21 +1,150 @@
+import asyncio
 import sys
 import os
 
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-import uvicorn
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from app.routers import chat
+from app.routers import chat, images, jobs, logs, streaming
 from app.config import settings
+from app.core.config_snapshot import get_config, get_config_manager
+from app.core.executors import LoopMonitor, get_executors
+from app.middleware.logging_middleware import LoggingMiddleware
+from app.middleware.compression_middleware import CompressionMiddleware
+from app.middleware.request_intake import RequestIntakeMiddleware
+from app.routers.fast_path import ChatFastPath
+from app.services.redis_service import RedisService
+from app.services.logs import (
+    LogRecordCodec,
+    LogRetentionPolicy,
+    LogRollups,
+    LogSearchIndex,
+)
+from app.services.clients import warm_up_clients, close_clients
+from app.services.cache import get_semantic_cache
+from app.services.sessions import SessionStore
+from app.services.jobs import JobQueue
+from app.services.streaming import StreamReplayStore
+from app.services.image import ImageStore
+import logging
 import time
 
+logger = logging.getLogger(__name__)
+
+redis_service = RedisService(
+    settings.REDIS_URL,
+    ttl=settings.REDIS_LOG_TTL,
+    optional=settings.REDIS_OPTIONAL,
+    max_connections=settings.REDIS_MAX_CONNECTIONS,
+    health_check_interval=settings.REDIS_HEALTH_CHECK_INTERVAL,
+    socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+    socket_connect_timeout=settings.REDIS_CONNECT_TIMEOUT,
+    buffer_size=settings.REDIS_LOG_BUFFER_SIZE,
+    reconnect_max_delay=settings.REDIS_RECONNECT_MAX_DELAY,
+    codec=LogRecordCodec.from_settings(settings),
+)
+log_rollups = LogRollups(redis_service, ttl=settings.LOG_ROLLUP_TTL)
+log_search_index = LogSearchIndex(redis_service, ttl=settings.REDIS_LOG_TTL)
+session_store = SessionStore.from_settings(redis_service, settings)
+stream_replay = StreamReplayStore.from_settings(redis_service, settings)
+image_store = ImageStore.from_settings(redis_service, settings)
+loop_monitor = LoopMonitor.from_settings(settings) if settings.LOOP_MONITOR_ENABLED else None
+job_queue = JobQueue(
+    redis_service,
+    handler=jobs.chat_job_handler(session_store, image_store),
+    workers=settings.JOB_WORKERS,
+    max_queue_size=settings.JOB_QUEUE_SIZE,
+    timeout=settings.JOB_TIMEOUT,
+    ttl=settings.JOB_TTL,
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open shared connections on startup and release them on shutdown."""
+    chat.factory.compile_prompt_templates()
+    config_manager = get_config_manager()
+    config_manager.start()
+    if loop_monitor:
+        loop_monitor.start()
+    await redis_service.initialize()
+    # Warm up in the background: the SDK imports should not delay the first
+    # health probe.
+    warm_up = asyncio.create_task(warm_up_clients(get_config().llm), name="client-warm-up")
+    semantic_cache = get_semantic_cache()
+    if semantic_cache:
+        semantic_cache.load()
+    job_queue.start()
+    logger.info(f"{settings.APP_NAME} started")
+    try:
+        yield
+    finally:
+        await job_queue.stop()
+        await stream_replay.close()
+        await image_store.close()
+        if semantic_cache:
+            semantic_cache.save()
+        warm_up.cancel()
+        await asyncio.gather(warm_up, return_exceptions=True)
+        await close_clients()
+        await redis_service.close()
+        await config_manager.stop()
+        if loop_monitor:
+            await loop_monitor.stop()
+        get_executors().shutdown()
+        logger.info(f"{settings.APP_NAME} stopped")
+
+
 app = FastAPI(
     title=settings.APP_NAME,
     description=settings.APP_DESCRIPTION,
     version=settings.APP_VERSION,
+    lifespan=lifespan,
 )
+app.state.redis_service = redis_service
+app.state.log_rollups = log_rollups
+app.state.log_search_index = log_search_index
+app.state.session_store = session_store
+app.state.job_queue = job_queue
+app.state.stream_replay = stream_replay
+app.state.image_store = image_store
+
+if settings.FAST_PATH_ENABLED:
+    # Added first so it runs inside the intake and logging middlewares.
+    app.add_middleware(
+        ChatFastPath,
+        cache_size=settings.FAST_PATH_CACHE_SIZE,
+        cache_ttl=settings.FAST_PATH_CACHE_TTL,
+    )
+# Inside the logging middleware, so rejected requests are logged too.
+app.add_middleware(
+    RequestIntakeMiddleware,
+    max_body_size=settings.REQUEST_MAX_BODY_SIZE,
+    max_query_length=settings.REQUEST_MAX_QUERY_LENGTH,
+    endpoints=settings.REQUEST_ENDPOINT_LIMITS,
+)
+app.add_middleware(
+    LoggingMiddleware,
+    redis_service=redis_service,
+    policy=LogRetentionPolicy.from_settings(settings),
+    rollups=log_rollups,
+    search_index=log_search_index,
+)
+if settings.COMPRESSION_ENABLED:
+    # Added last so it wraps the logging middleware, which sees plain bodies.
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.COMPRESSION_MIN_SIZE,
+        gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+        brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+    )
 
 app.include_router(chat.router)
+app.include_router(jobs.router)
+app.include_router(images.router)
+app.include_router(streaming.router)
+app.include_router(logs.router)
 
 
 @app.get("/")
@@ -45,10 +174,14 @@ async def health_check():
         "timestamp": time.time(),
         "version": settings.APP_VERSION
     }
+    if loop_monitor:
+        health["event_loop"] = loop_monitor.stats()
     return health
 
 
 if __name__ == "__main__":
+    import uvicorn
+
     uvicorn.run(
         "main:app", host=settings.HOST, port=settings.PORT, reload=settings.DEBUG
     )
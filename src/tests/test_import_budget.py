@@ -0,0 +1,6 @@
+from app.core.import_profile import check_budget, profile_imports
+
+
+def test_main_import_within_budget():
+    """``import main`` stays within the default time, module and SDK budget."""
+    assert check_budget(profile_imports("main")) == []
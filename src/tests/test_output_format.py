@@ -0,0 +1,132 @@
+import asyncio
+
+import pytest
+
+from app.services.chat.output_format import OutputFormat, Section, with_fields
+
+FORMAT = OutputFormat(
+    Section("title", "Title", "🎨"),
+    Section("art_description", "Art Description", "🖼️"),
+    Section("image_prompt", "Image Prompt", "🌠"),
+    Section("micro_story", "Micro-story", "📖"),
+)
+
+ANSWER = (
+    "Here is your dream:\n"
+    "🎨 Title: The Clockwork Tide\n"
+    "🖼️ Art Description (in surreal style): Waves of brass gears\n"
+    "rolling over a sleeping city.\n"
+    "🌠 Image Prompt: brass gear ocean, moonlit city, surrealism\n"
+    "📖 Micro-story: Every night the sea wound itself up again."
+)
+
+FIELDS = {
+    "title": "The Clockwork Tide",
+    "art_description": "Waves of brass gears\nrolling over a sleeping city.",
+    "image_prompt": "brass gear ocean, moonlit city, surrealism",
+    "micro_story": "Every night the sea wound itself up again.",
+}
+
+
+def feed_chunks(chunks):
+    parser = FORMAT.parser()
+    completed = []
+    for chunk in chunks:
+        completed.extend(parser.feed(chunk))
+    completed.extend(parser.close())
+    return parser, completed
+
+
+def test_parse_complete_answer():
+    assert FORMAT.parse(ANSWER) == FIELDS
+
+
+@pytest.mark.parametrize("split", range(1, len(ANSWER)))
+def test_split_at_any_chunk_boundary(split):
+    parser, completed = feed_chunks([ANSWER[:split], ANSWER[split:]])
+    assert parser.fields == FIELDS
+    assert completed == list(FIELDS.items())
+
+
+def test_one_character_chunks():
+    parser, completed = feed_chunks(list(ANSWER))
+    assert parser.fields == FIELDS
+    assert completed == list(FIELDS.items())
+
+
+def test_header_split_across_chunks():
+    parser = FORMAT.parser()
+    assert parser.feed("🎨 Title: Moon\n🌠 Ima") == []
+    assert parser.feed("ge Prompt: a cat\n📖 Micro") == [("title", "Moon")]
+    assert parser.feed("-story: once") == [("image_prompt", "a cat")]
+    assert parser.close() == [("micro_story", "once")]
+
+
+def test_field_completes_when_next_header_arrives():
+    parser = FORMAT.parser()
+    assert parser.feed("🎨 Title: Moon\n") == []
+    assert parser.feed("🖼️ Art Description: ") == [("title", "Moon")]
+
+
+def test_missing_sections_are_absent():
+    answer = "🎨 Title: Moon\n📖 Micro-story: The moon overslept."
+    parser, _ = feed_chunks([answer[:20], answer[20:]])
+    assert parser.fields == {"title": "Moon", "micro_story": "The moon overslept."}
+    assert "image_prompt" not in parser.fields
+
+
+def test_answer_without_sections():
+    parser, completed = feed_chunks(["I could not interpret ", "that dream."])
+    assert parser.fields == {}
+    assert completed == []
+
+
+def test_trailing_partial_section_completes_on_close():
+    parser = FORMAT.parser()
+    parser.feed("🎨 Title: Moon\n📖 Micro-story: Once upon a")
+    assert parser.close() == [("micro_story", "Once upon a")]
+    assert parser.close() == []
+
+
+def test_trailing_partial_header_is_not_a_field():
+    parser, _ = feed_chunks(["🎨 Title: Moon\n", "📖 Micro-st"])
+    assert list(parser.fields) == ["title"]
+
+
+def test_header_variants():
+    answer = (
+        "- **🎨 Title:** Moon\n"
+        "* 🖼 art description: Pale\n"
+        "Image Prompt : a cat\n"
+    )
+    assert FORMAT.parse(answer) == {"title": "Moon", "art_description": "Pale", "image_prompt": "a cat"}
+
+
+def test_repeated_section_keeps_first_value():
+    assert FORMAT.parse("🎨 Title: Moon\n🎨 Title: Sun") == {"title": "Moon"}
+
+
+def test_with_fields_interleaves_field_events():
+    async def source():
+        for chunk in ("🎨 Title: Moon\n", "🌠 Image Prompt: a cat"):
+            yield chunk
+
+    async def collect():
+        return [item async for item in with_fields(source(), FORMAT)]
+
+    assert asyncio.run(collect()) == [
+        "🎨 Title: Moon\n",
+        "🌠 Image Prompt: a cat",
+        {"field": "title", "value": "Moon"},
+        {"field": "image_prompt", "value": "a cat"},
+    ]
+
+
+def test_with_fields_without_format_passes_chunks_through():
+    async def source():
+        yield "plain"
+
+    async def collect():
+        return [item async for item in with_fields(source(), None)]
+
+    assert asyncio.run(collect()) == ["plain"]
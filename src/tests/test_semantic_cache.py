@@ -0,0 +1,76 @@
+import asyncio
+
+import pytest
+
+from app.config import settings
+from app.services.cache.semantic_cache import HashedNGramEmbedder, SemanticCache
+
+
+@pytest.fixture
+def cache():
+    return SemanticCache(
+        HashedNGramEmbedder(),
+        thresholds={
+            service: config["semantic_cache_threshold"]
+            for service, config in settings.AVAILABLE_SERVICES.items()
+        },
+    )
+
+
+def lookup_after_store(cache, service_type, stored, query):
+    async def run():
+        await cache.store(service_type, stored, "cached answer")
+        return await cache.lookup(service_type, query)
+
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize(
+    "service_type, stored, query",
+    [
+        ("translator", "my boss said it's fine", "boss says it's fine"),
+        ("translator", "My boss said it's fine.", "my boss said it's fine"),
+        ("inventor", "I can't find my keys in the morning", "I can't find my keys in the morning!"),
+    ],
+)
+def test_paraphrase_hits(cache, service_type, stored, query):
+    assert lookup_after_store(cache, service_type, stored, query) == "cached answer"
+    assert cache.hits == 1
+
+
+@pytest.mark.parametrize(
+    "stored, query",
+    [
+        (
+            "It's fine, do whatever you want. I don't care.",
+            "It's not fine, do whatever you want. I do care.",
+        ),
+        (
+            "You always get the recognition for the work I do.",
+            "You never get the recognition for the work I do.",
+        ),
+        ("I can make it to dinner tonight", "I can't make it to dinner tonight"),
+        ("Everyone on the team liked my presentation today", "Nobody on the team liked my presentation today"),
+    ],
+)
+def test_opposite_meaning_misses(cache, stored, query):
+    assert lookup_after_store(cache, "translator", stored, query) is None
+    assert cache.misses == 1
+
+
+def test_unrelated_query_misses(cache):
+    assert lookup_after_store(cache, "inventor", "a tool to fold fitted sheets", "my cat ignores me") is None
+
+
+def test_services_do_not_share_entries(cache):
+    assert lookup_after_store(cache, "translator", "boss says it's fine", "boss says it's fine") == "cached answer"
+    assert asyncio.run(cache.lookup("inventor", "boss says it's fine")) is None
+
+
+def test_expired_entry_misses(cache):
+    async def run():
+        await cache.store("translator", "boss says it's fine", "cached answer", ttl=60)
+        cache._index("translator").created_at[0] -= 61
+        return await cache.lookup("translator", "boss says it's fine")
+
+    assert asyncio.run(run()) is None
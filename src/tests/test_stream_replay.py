@@ -0,0 +1,217 @@
+import asyncio
+
+import pytest
+
+from app.core.serialization import serializer
+from app.exceptions import StreamExpiredError, StreamNotFoundError
+from app.services.streaming.replay import StreamReplayStore
+
+
+class StubPipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self.commands.append((name, args, kwargs))
+
+    async def execute(self):
+        return [await getattr(self.redis, name)(*args, **kwargs) for name, args, kwargs in self.commands]
+
+
+class StubRedis:
+    """In-memory stand-in for the few Redis commands the replay store uses."""
+
+    def __init__(self):
+        self.lists = {}
+        self.hashes = {}
+        self.fail_writes = False
+
+    def pipeline(self, transaction=True):
+        return StubPipeline(self)
+
+    async def rpush(self, key, *values):
+        if self.fail_writes:
+            raise ConnectionError("Redis is down")
+        self.lists.setdefault(key, []).extend(values)
+        return len(self.lists[key])
+
+    async def lrange(self, key, start, end):
+        values = self.lists.get(key, [])
+        return values[start:] if end == -1 else values[start : end + 1]
+
+    async def hset(self, key, mapping):
+        self.hashes.setdefault(key, {}).update(mapping)
+
+    async def hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+    async def expire(self, key, ttl):
+        return True
+
+
+class StubRedisService:
+    def __init__(self, redis=None):
+        self.redis = redis
+        self.connection_error = redis is None
+
+
+async def chunks(count):
+    for n in range(1, count + 1):
+        yield f"c{n}"
+
+
+async def collect(store, stream_id, after_seq=0):
+    return [item async for item in store.follow(stream_id, after_seq)]
+
+
+def produce(store, count):
+    """Run a stream of ``count`` chunks to completion and return its buffer."""
+
+    async def run():
+        buffer = store.start(chunks(count), "translator")
+        await store._tasks[buffer.stream_id]
+        return buffer
+
+    return run()
+
+
+def expected(first, last):
+    return [(n, f"c{n}") for n in range(first, last + 1)]
+
+
+@pytest.fixture
+def redis():
+    return StubRedis()
+
+
+def test_resume_from_memory():
+    async def run():
+        store = StreamReplayStore(StubRedisService(), max_chunks=16)
+        buffer = await produce(store, 5)
+        assert buffer.first_seq == 1
+        assert await collect(store, buffer.stream_id) == expected(1, 5)
+        assert await collect(store, buffer.stream_id, after_seq=3) == expected(4, 5)
+        assert await collect(store, buffer.stream_id, after_seq=5) == []
+
+    asyncio.run(run())
+
+
+def test_resume_across_a_spill(redis):
+    async def run():
+        store = StreamReplayStore(StubRedisService(redis), max_chunks=4)
+        buffer = await produce(store, 10)
+        # The oldest chunks left memory but are stored in Redis, in order.
+        assert buffer.first_seq > 1
+        assert buffer.replayable_from == 1
+        assert [serializer.loads(v) for v in redis.lists[f"stream:{buffer.stream_id}"]] == [
+            f"c{n}" for n in range(1, 11)
+        ]
+        assert await collect(store, buffer.stream_id) == expected(1, 10)
+        # Resuming inside, at the edge of, and after the spilled range.
+        for after_seq in (2, buffer.first_seq - 2, buffer.first_seq - 1, buffer.first_seq):
+            assert await collect(store, buffer.stream_id, after_seq) == expected(after_seq + 1, 10)
+
+    asyncio.run(run())
+
+
+def test_live_reader_keeps_up_across_spills(redis):
+    async def run():
+        store = StreamReplayStore(StubRedisService(redis), max_chunks=4)
+        queue = asyncio.Queue()
+
+        async def source():
+            while (chunk := await queue.get()) is not None:
+                yield chunk
+
+        buffer = store.start(source(), "translator")
+        reader = asyncio.create_task(collect(store, buffer.stream_id))
+        for n in range(1, 13):
+            await queue.put(f"c{n}")
+            await asyncio.sleep(0)
+        await queue.put(None)
+        assert await reader == expected(1, 12)
+
+    asyncio.run(run())
+
+
+def test_expired_after_failed_spill(redis):
+    async def run():
+        redis.fail_writes = True
+        store = StreamReplayStore(StubRedisService(redis), max_chunks=4)
+        buffer = await produce(store, 10)
+        # The spilled chunks were dropped although Redis refused them.
+        assert buffer.replayable_from == buffer.first_seq > 1
+        with pytest.raises(StreamExpiredError):
+            await collect(store, buffer.stream_id)
+        with pytest.raises(StreamExpiredError):
+            await collect(store, buffer.stream_id, buffer.first_seq - 2)
+        assert await collect(store, buffer.stream_id, buffer.first_seq - 1) == expected(buffer.first_seq, 10)
+
+    asyncio.run(run())
+
+
+def test_no_spill_past_a_gap(redis):
+    async def run():
+        store = StreamReplayStore(StubRedisService(redis), max_chunks=4)
+        queue = asyncio.Queue()
+
+        async def source():
+            while (chunk := await queue.get()) is not None:
+                yield chunk
+
+        buffer = store.start(source(), "translator")
+        for n in range(1, 6):
+            await queue.put(f"c{n}")
+        while buffer.last_seq < 5:
+            await asyncio.sleep(0)
+        stored = buffer.stored_seq
+        assert stored > 0
+
+        redis.fail_writes = True
+        for n in range(6, 9):
+            await queue.put(f"c{n}")
+        while buffer.last_seq < 8:
+            await asyncio.sleep(0)
+        redis.fail_writes = False
+        await queue.put(None)
+        await store._tasks[buffer.stream_id]
+
+        # Redis keeps the prefix written before the failure and nothing after the gap.
+        assert buffer.stored_seq == stored
+        assert len(redis.lists[f"stream:{buffer.stream_id}"]) == stored
+        with pytest.raises(StreamExpiredError):
+            await collect(store, buffer.stream_id)
+        assert await collect(store, buffer.stream_id, buffer.first_seq - 1) == expected(buffer.first_seq, 8)
+
+    asyncio.run(run())
+
+
+def test_expired_when_spilled_chunks_are_gone(redis):
+    async def run():
+        store = StreamReplayStore(StubRedisService(redis), max_chunks=4)
+        buffer = await produce(store, 10)
+        del redis.lists[f"stream:{buffer.stream_id}"]
+        with pytest.raises(StreamExpiredError):
+            await collect(store, buffer.stream_id)
+
+    asyncio.run(run())
+
+
+def test_resume_in_another_process(redis):
+    async def run():
+        owner = StreamReplayStore(StubRedisService(redis), max_chunks=4)
+        buffer = await produce(owner, 10)
+        other = StreamReplayStore(StubRedisService(redis), max_chunks=4)
+        assert await collect(other, buffer.stream_id) == expected(1, 10)
+        assert await collect(other, buffer.stream_id, after_seq=7) == expected(8, 10)
+        with pytest.raises(StreamNotFoundError):
+            await collect(other, "unknown")
+
+    asyncio.run(run())